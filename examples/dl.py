@@ -1,32 +1,66 @@
+import asyncio
+import functools
 import subprocess
 import argparse
 from pysrt import SubRipFile
 from pysrt import SubRipItem
 from pysrt import SubRipTime
 import os
+import csv
 import glob
+import shutil
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
-def download_video(video_url, title):
-    # Downloading video
+
+# External tools, overridable so the flow can run against local stand-ins
+YT_DLP = os.environ.get("YT_DLP", "yt-dlp")
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+
+SUB_LANGS = {
+    0: None,
+    1: "zh-Hans,zh-Hans-en",
+    2: "en,zh-Hans,zh-Hans-en",
+    3: "en",
+}
+
+def video_command(video_url, title):
     # Ensure the video is downloaded in mp4 format
-    subprocess.run([
-        'yt-dlp', '-f', 'bestvideo[height<=1080]+bestaudio/best[height<=1080]',
+    return [
+        YT_DLP, '-f', 'bestvideo[height<=1080]+bestaudio/best[height<=1080]',
         '-o', 'subtitles.%(ext)s', '--merge-output-format', 'mp4', '-o', title, video_url
-    ])
+    ]
 
-def download_subtitles(video_url, title, sub_lang=None):
+def subtitles_command(video_url, title, sub_lang=None):
     # Use default languages if sub_lang is not specified
     if sub_lang is None:
         sub_lang = 'en,zh-Hans,zh-Hans-en'
-    # Downloading subtitles with the specified or default language
-    subprocess.run([
-        'yt-dlp', '--write-auto-subs', '--skip-download',
+    return [
+        YT_DLP, '--write-auto-subs', '--skip-download',
         '--sub-lang', sub_lang, '--convert-subs', 'srt',
         '-o', title, video_url
-    ])
+    ]
+
+def thumbnail_command(video_url, output_file, extension="jpg"):
+    return [
+        YT_DLP,
+        '--write-thumbnail',
+        '--convert-thumbnails', extension,
+        '--skip-download',
+        '-o', output_file,
+        video_url
+    ]
+
+def download_video(video_url, title):
+    # Downloading video
+    subprocess.run(video_command(video_url, title))
+
+def download_subtitles(video_url, title, sub_lang=None):
+    # Downloading subtitles with the specified or default language
+    subprocess.run(subtitles_command(video_url, title, sub_lang))
 
 # Remove repetitions in both subtitle files
 def clean_duplicates(file_path):
@@ -63,30 +97,25 @@ def merge_subtitles(file1, file2, output_file):
     if os.path.exists(file1) and os.path.exists(file2):
         subs1 = SubRipFile.open(file1)
         subs2 = SubRipFile.open(file2)
+        # merge_subtitle expects each track to show one cue at a time, which
+        # rolling auto-captions do not
+        subs1.fix_overlaps("trim")
+        subs2.fix_overlaps("trim")
         delta = SubRipTime(milliseconds=0)
         merged_subs = merge_subtitle(subs1, subs2, delta)
-        merged_subs.save(output_file, encoding='utf-8')
     else:
         if os.path.exists(file1):
             os.rename(file1, output_file)
         elif os.path.exists(file2):
             os.rename(file2, output_file)
-    # Adjust the first subtitle's start time to ensure the interval is at least 1000ms
-    # Otherwise, ffmpeg will ignore the first subtitle
-    merged_subs = SubRipFile.open(output_file)
-    if len(merged_subs) > 0:
-        for sub in merged_subs:
-            if sub.text.strip():
-                first_sub = sub
-                break
-        interval = first_sub.end.ordinal - first_sub.start.ordinal
-        if interval < 2000:
-            # Adjust the start time relative to the end time
-            if first_sub.end.ordinal <= 2000:
-                first_sub.start = SubRipTime(milliseconds=0)
-            else:
-                first_sub.start = SubRipTime(milliseconds=first_sub.end.ordinal - 2000)
-        merged_subs.save(output_file, encoding='utf-8')
+        merged_subs = SubRipFile.open(output_file)
+        merged_subs.fix_overlaps("trim")
+    # Make the first subtitle last at least 2s by starting it earlier.
+    # Otherwise, ffmpeg will ignore it
+    first_sub = next((sub for sub in merged_subs if sub.text.strip()), None)
+    if first_sub is not None and first_sub.duration.ordinal < 2000:
+        first_sub.start = SubRipTime(milliseconds=max(0, first_sub.end.ordinal - 2000))
+    merged_subs.save(output_file, encoding='utf-8')
 
 def join_lines(txtsub1, txtsub2):
     if (len(txtsub1) > 0) & (len(txtsub2) > 0):
@@ -133,8 +162,25 @@ def merge_subtitle(sub_a, sub_b, delta):
     return out
 
 
-def apply_subtitles_to_video(video_file, subtitle_file, output_file, font_size="medium"):
-    """Apply subtitles to a video with the specified font size."""
+# How subtitles end up in the final video:
+#   burn -> drawn into the picture, which forces a full video re-encode
+#   burn-parallel -> same, rendered as keyframe-aligned segments side by side
+#   soft -> muxed as a selectable subtitle track, video and audio stream-copied
+SUBTITLE_MODES = ("burn", "burn-parallel", "soft")
+
+# Target length of the segments rendered by burn-parallel, in seconds
+SEGMENT_SECONDS = 60
+
+# Subtitle codec to use for a soft track, by output container
+SOFT_SUBTITLE_CODECS = {
+    ".mp4": "mov_text",
+    ".m4v": "mov_text",
+    ".mov": "mov_text",
+    ".mkv": "srt",
+}
+
+def burn_subtitles(video_file, subtitle_file, output_file, font_size="medium"):
+    """Draw the subtitles into the picture with ffmpeg's subtitles filter."""
     # Map font size values to actual font sizes
     font_size_map = {
         "small": 16,
@@ -143,24 +189,115 @@ def apply_subtitles_to_video(video_file, subtitle_file, output_file, font_size="
     }
     # Default to medium if the font size is not recognized
     font_size_value = font_size_map.get(font_size, 24)
+    os.environ["FFMPEG_LOG_LEVEL"] = "quiet"
+    return subprocess.run([
+        FFMPEG, '-i', video_file, '-vf',
+        f"subtitles={subtitle_file}:force_style='FontName=Arial,FontSize={font_size_value},PrimaryColour=&H00FF00&,OutlineColour=&H54000008&,BackColour=&H80000000&,BorderStyle=3,Outline=1'",
+        '-c:a', 'copy', output_file
+    ])
+
+def mux_subtitles(video_file, subtitle_file, output_file, language="chi"):
+    """Add the subtitles as a default soft track, stream-copying video and audio."""
+    codec = SOFT_SUBTITLE_CODECS.get(os.path.splitext(output_file)[1].lower(), "mov_text")
+    return subprocess.run([
+        FFMPEG, '-i', video_file, '-i', subtitle_file,
+        '-map', '0:v', '-map', '0:a?', '-map', '1:0',
+        '-c:v', 'copy', '-c:a', 'copy', '-c:s', codec,
+        '-metadata:s:s:0', f'language={language}', '-disposition:s:0', 'default',
+        output_file
+    ])
+
+def split_video(video_file, segment_dir, segment_seconds=SEGMENT_SECONDS):
+    """Cut a video into stream-copied segments of about `segment_seconds`.
+
+    With stream copy the segment muxer can only cut on keyframes, so every
+    segment starts on one. Return a list of (segment file, start, end) with
+    the times in milliseconds, as reported by ffmpeg.
+    """
+    segment_list = os.path.join(segment_dir, 'segments.csv')
+    subprocess.run([
+        FFMPEG, '-loglevel', 'error', '-i', video_file, '-map', '0', '-c', 'copy',
+        '-f', 'segment', '-segment_time', str(segment_seconds), '-reset_timestamps', '1',
+        '-segment_list', segment_list, '-segment_list_type', 'csv',
+        os.path.join(segment_dir, 'segment%04d' + os.path.splitext(video_file)[1])
+    ], check=True)
+    with open(segment_list, newline='') as list_file:
+        return [(os.path.join(segment_dir, name), int(round(float(start) * 1000)), int(round(float(end) * 1000)))
+                for name, start, end in csv.reader(list_file)]
+
+def write_segment_subtitles(subs, start, end, subtitle_file):
+    """Save the cues visible in [start, end) shifted to the segment's own clock."""
+    part = subs.slice(ends_after=start, starts_before=end)
+    part.shift(milliseconds=-start)
+    part.clean_indexes()
+    part.save(subtitle_file, encoding='utf-8')
+    # slice() shares its items with `subs`; undo the shift for the next segment
+    part.shift(milliseconds=start)
+
+def concat_videos(video_files, output_file):
+    """Join videos with identical codecs without re-encoding them."""
+    list_file = os.path.splitext(video_files[0])[0] + '.concat.txt'
+    with open(list_file, 'w', encoding='utf-8') as concat_list:
+        for video_file in video_files:
+            escaped = os.path.abspath(video_file).replace("'", "'\\''")
+            concat_list.write(f"file '{escaped}'\n")
+    subprocess.run([
+        FFMPEG, '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_file,
+        '-c', 'copy', output_file
+    ], check=True)
+
+def burn_subtitles_parallel(video_file, subtitle_file, output_file, font_size="medium",
+                            segment_seconds=SEGMENT_SECONDS, workers=None):
+    """Burn subtitles segment by segment, `workers` ffmpeg processes at a time.
+
+    The video is cut on keyframes, each segment gets the matching slice of
+    the subtitles and is rendered by its own ffmpeg process, then the
+    rendered segments are concatenated losslessly.
+    """
+    workers = workers or os.cpu_count() or 1
+    subs = SubRipFile.open(subtitle_file)
+    segment_dir = tempfile.mkdtemp(prefix='.segments-', dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        segments = split_video(video_file, segment_dir, segment_seconds)
+        jobs = []
+        for segment_file, start, end in segments:
+            base_name = os.path.splitext(segment_file)[0]
+            write_segment_subtitles(subs, start, end, base_name + '.srt')
+            jobs.append((segment_file, base_name + '.srt', base_name + '.subbed' + os.path.splitext(segment_file)[1]))
+
+        # Every worker thread only waits on its own ffmpeg child process
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda job: burn_subtitles(*job, font_size=font_size), jobs))
+        failed = [job[0] for job, result in zip(jobs, results) if result.returncode != 0]
+        if failed:
+            raise RuntimeError(f"Failed to render segments: {', '.join(failed)}")
+        concat_videos([rendered for _, _, rendered in jobs], output_file)
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+def apply_subtitles_to_video(video_file, subtitle_file, output_file, font_size="medium", mode="burn"):
+    """Apply subtitles to a video, either burnt in with the specified font size
+    or muxed as a soft track (see SUBTITLE_MODES)."""
+    if mode not in SUBTITLE_MODES:
+        raise ValueError(f"Unknown subtitle mode: {mode}")
 
     if os.path.exists(subtitle_file):
-        logger.debug(f"Applying subtitles from {subtitle_file} to {video_file}")
-        os.environ["FFMPEG_LOG_LEVEL"] = "quiet"
-        subprocess.run([
-            'ffmpeg', '-i', video_file, '-vf',
-            f"subtitles={subtitle_file}:force_style='FontName=Arial,FontSize={font_size_value},PrimaryColour=&H00FF00&,OutlineColour=&H54000008&,BackColour=&H80000000&,BorderStyle=3,Outline=1'",
-            '-c:a', 'copy', output_file
-        ])
+        logger.debug(f"Applying subtitles from {subtitle_file} to {video_file} ({mode})")
+        if mode == "soft":
+            mux_subtitles(video_file, subtitle_file, output_file)
+        elif mode == "burn-parallel":
+            burn_subtitles_parallel(video_file, subtitle_file, output_file, font_size)
+        else:
+            burn_subtitles(video_file, subtitle_file, output_file, font_size)
     else:
         logger.debug(f"Subtitle file {subtitle_file} does not exist. Skipping subtitle application.")
         subprocess.run([
-            'ffmpeg', '-i', video_file, '-c:a', 'copy', '-c:v', 'copy', output_file
+            FFMPEG, '-i', video_file, '-c:a', 'copy', '-c:v', 'copy', output_file
         ])
 
 def get_video_title(video_url):
     result = subprocess.run(
-        ['yt-dlp', '--get-title', video_url],
+        [YT_DLP, '--get-title', video_url],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True
@@ -183,21 +320,126 @@ def sanitize_subtitles(subtitle_file):
 def download_thumbnail(video_url, output_file, extension="jpg"):
     """Download and convert the thumbnail of a YouTube video using yt-dlp."""
     try:
-        subprocess.run(
-            [
-                'yt-dlp',
-                '--write-thumbnail',
-                '--convert-thumbnails', extension,
-                '--skip-download',
-                '-o', output_file,
-                video_url
-            ],
-            check=True
-        )
+        subprocess.run(thumbnail_command(video_url, output_file, extension), check=True)
+        print(f"Thumbnail downloaded and converted to {extension}: {output_file}")
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to download thumbnail: {e}")
+
+def sanitize_title(video_title):
+    """Turn a video title into a safe base name for the downloaded files."""
+    return "".join(c if c.isalnum() or c in "_-" else "_" for c in video_title)
+
+def prepare_workspace(sanitized_title):
+    """Remove subtitle and video files left over from a previous run."""
+    for file in glob.glob(f"{sanitized_title}.*.srt"):
+        os.remove(file)
+    for file in glob.glob(f"{sanitized_title}.mp4"):
+        os.remove(file)
+
+async def run_command(command, check=False):
+    """Run `command` as an asyncio subprocess and return its exit code."""
+    process = await asyncio.create_subprocess_exec(*command)
+    try:
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        # Don't leave the process running on its own
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+        raise
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+    return returncode
+
+async def download_thumbnail_async(video_url, output_file, extension="jpg"):
+    """Asynchronous counterpart of download_thumbnail."""
+    try:
+        await run_command(thumbnail_command(video_url, output_file, extension), check=True)
         print(f"Thumbnail downloaded and converted to {extension}: {output_file}")
     except subprocess.CalledProcessError as e:
         print(f"Failed to download thumbnail: {e}")
 
+async def fetch_assets_async(video_url, sanitized_title, sub_lang, after_subtitles=None):
+    """Download subtitles, thumbnail and video concurrently.
+
+    `after_subtitles`, a blocking callable, runs in a thread as soon as the
+    subtitles are on disk, so their post-processing overlaps the video
+    download instead of waiting for it.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def subtitles():
+        if sub_lang is None:
+            return
+        await run_command(subtitles_command(video_url, sanitized_title, sub_lang))
+        if after_subtitles is not None:
+            await loop.run_in_executor(None, after_subtitles)
+
+    tasks = [
+        asyncio.ensure_future(subtitles()),
+        asyncio.ensure_future(download_thumbnail_async(video_url, sanitized_title)),
+        asyncio.ensure_future(run_command(video_command(video_url, sanitized_title))),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Stop the other downloads and wait for their processes to exit
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+def fetch_assets(video_url, sanitized_title, sub_lang, after_subtitles=None):
+    """Download subtitles (if any language is requested), thumbnail and video."""
+    asyncio.run(fetch_assets_async(video_url, sanitized_title, sub_lang, after_subtitles))
+
+def translate_missing_track(subtitle_file_en, subtitle_file_zh, translator):
+    """Produce the missing language locally when only one track was downloaded."""
+    if os.path.exists(subtitle_file_en) and not os.path.exists(subtitle_file_zh):
+        source_file, target_file, source, target = subtitle_file_en, subtitle_file_zh, 'en', 'zh-CN'
+    elif os.path.exists(subtitle_file_zh) and not os.path.exists(subtitle_file_en):
+        source_file, target_file, source, target = subtitle_file_zh, subtitle_file_en, 'zh-CN', 'en'
+    else:
+        return
+    logger.debug(f"Translating {source_file} to {target}")
+    translated = translator.translate_subtitles(SubRipFile.open(source_file), source, target)
+    translated.save(target_file, encoding='utf-8')
+
+def process_subtitles(sanitized_title, censor=True, translator=None):
+    """Censor and merge the downloaded tracks, return the merged subtitle path.
+
+    With a `translator` (see translation.TranslationStage), a lone English or
+    Chinese track is translated to make the bilingual merge possible.
+    """
+    merged_file = f'{sanitized_title}.merged_subtitles.srt'
+    subtitle_file_en = f'{sanitized_title}.en.srt'
+    subtitle_file_zh = f'{sanitized_title}.zh-Hans.srt' if os.path.exists(f'{sanitized_title}.zh-Hans.srt') else f'{sanitized_title}.zh-Hans-en.srt'
+    if not (os.path.exists(subtitle_file_en) or os.path.exists(subtitle_file_zh)):
+        return merged_file
+    if translator is not None:
+        translate_missing_track(subtitle_file_en, subtitle_file_zh, translator)
+    if censor:
+        if os.path.exists(subtitle_file_en):
+            sanitize_subtitles(subtitle_file_en)
+        if os.path.exists(subtitle_file_zh):
+            sanitize_subtitles(subtitle_file_zh)
+    merge_subtitles(subtitle_file_en, subtitle_file_zh, merged_file)
+    print("Merging completed. The merged subtitles have been saved to 'merged_subtitles.srt'.")
+    return merged_file
+
+def render_video(sanitized_title, subtitle_file, font_size="medium", mode="burn"):
+    """Apply subtitles, drop the intermediate files and return the final video path."""
+    output_video_file = f"{sanitized_title}.subbed.mp4"
+    apply_subtitles_to_video(f'{sanitized_title}.mp4', subtitle_file, output_video_file, font_size, mode)
+
+    # Delete the original video and all subtitle files
+    for file in glob.glob(f"{sanitized_title}.*.srt"):
+        os.remove(file)
+
+    os.rename(output_video_file, f"{sanitized_title}.mp4")
+    print(f"Subtitles have been applied to the video and saved as {output_video_file}.")
+    return f"{sanitized_title}.mp4"
+
 def main(args=None, censor=True, dry=False):
     parser = argparse.ArgumentParser(description='Download and merge YouTube subtitles.')
     parser.add_argument('video_url', type=str, help='URL of the YouTube video')
@@ -205,6 +447,9 @@ def main(args=None, censor=True, dry=False):
                         help='Comma-separated list of subtitle languages (e.g., "en,zh-Hans")')
     parser.add_argument('font_size', type=str, nargs='?', choices=["small", "medium", "large"], default="medium",
                         help="Specify the font size for subtitles (small, medium, large)")
+    parser.add_argument('--subtitle-mode', choices=SUBTITLE_MODES, default="burn",
+                        help="Burn subtitles into the picture (re-encode), burn them segment by segment in parallel, "
+                             "or mux them as a soft track (stream copy)")
 
     if args is None:
         args = parser.parse_args()
@@ -214,47 +459,16 @@ def main(args=None, censor=True, dry=False):
     # Existing code for downloading and processing the video
     video_url = args.video_url
     font_size = args.font_size  # Get the font size from arguments
-    if args.sub_lang == 1:
-        sub_lang = "zh-Hans,zh-Hans-en"
-    elif args.sub_lang == 2:
-        sub_lang = "en,zh-Hans,zh-Hans-en"
-    elif args.sub_lang == 3:
-        sub_lang = "en"
-    elif args.sub_lang == 0:
-        sub_lang = None
+    sub_lang = SUB_LANGS[args.sub_lang]
     video_title = get_video_title(video_url)
-    sanitized_title = "".join(c if c.isalnum() or c in "_-" else "_" for c in video_title)
+    sanitized_title = sanitize_title(video_title)
     output_video_file = f"{sanitized_title}.subbed.mp4"
     if dry:
         return output_video_file
-    # Remove existing subtitle files
-    for file in glob.glob(f"{sanitized_title}.*.srt"):
-        os.remove(file)
+    prepare_workspace(sanitized_title)
+    fetch_assets(video_url, sanitized_title, sub_lang,
+                 after_subtitles=functools.partial(process_subtitles, sanitized_title, censor))
+    return render_video(sanitized_title, f'{sanitized_title}.merged_subtitles.srt', font_size, args.subtitle_mode)
 
-    # Remove existing video files
-    for file in glob.glob(f"{sanitized_title}.mp4"):
-        os.remove(file)
-        # Determine subtitle language based on sub_lang argument
-    if(sub_lang is not None):
-        download_subtitles(video_url, sanitized_title, sub_lang)
-        subtitle_file_zh = f'{sanitized_title}.zh-Hans.srt' if os.path.exists(f'{sanitized_title}.zh-Hans.srt') else f'{sanitized_title}.zh-Hans-en.srt'
-        if censor:
-            if os.path.exists(f'{sanitized_title}.en.srt'):
-                sanitize_subtitles(f'{sanitized_title}.en.srt')
-            if os.path.exists(subtitle_file_zh):
-                sanitize_subtitles(subtitle_file_zh)
-        merge_subtitles(f'{sanitized_title}.en.srt', subtitle_file_zh, f'{sanitized_title}.merged_subtitles.srt')
-        print("Merging completed. The merged subtitles have been saved to 'merged_subtitles.srt'.")
-    download_thumbnail(video_url, sanitized_title)
-    download_video(video_url, sanitized_title)
-    apply_subtitles_to_video(f'{sanitized_title}.mp4', f'{sanitized_title}.merged_subtitles.srt', output_video_file, font_size)
-    
-    # Delete the original video and all subtitle files
-    for file in glob.glob(f"{sanitized_title}.*.srt"):
-        os.remove(file)
-
-    os.rename(output_video_file, f"{sanitized_title}.mp4")
-    print(f"Subtitles have been applied to the video and saved as {output_video_file}.")
-    return f"{sanitized_title}.mp4"
 if __name__ == "__main__":
     main()
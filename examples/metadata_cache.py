@@ -0,0 +1,86 @@
+"""
+Local cache of YouTube video metadata for the channel worker.
+
+Entries are keyed by video ID and hold the details returned by
+`get_video_details` together with the ETag the listing reported for the
+video and the translated title. An entry is reused until it is older than
+the TTL or the listing reports a different ETag, so unchanged videos cost
+neither a details call nor a translation on the next polling cycle.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+
+class MetadataCache:
+    """
+    MetadataCache(path, ttl)
+
+    path -> SQLite database file, typically the worker's DB_FILE.
+    ttl -> seconds an entry stays valid. Default to 24 hours.
+    """
+
+    def __init__(self, path, ttl=24 * 3600, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS video_metadata (
+                    video_id TEXT PRIMARY KEY,
+                    etag TEXT,
+                    fetched_at REAL NOT NULL,
+                    details TEXT NOT NULL,
+                    translated_title TEXT
+                )
+            """)
+
+    def get(self, video_id, etag=None):
+        """
+        Return the cached details of `video_id`, or None if missing, expired
+        or if `etag` is given and differs from the cached one.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT etag, fetched_at, details, translated_title FROM video_metadata"
+                " WHERE video_id = ?", (video_id,)).fetchone()
+        if row is None:
+            return None
+        cached_etag, fetched_at, details, translated_title = row
+        if self.clock() - fetched_at > self.ttl:
+            return None
+        if etag is not None and cached_etag is not None and etag != cached_etag:
+            return None
+        details = json.loads(details)
+        if translated_title is not None:
+            details["translated_title"] = translated_title
+        return details
+
+    def put(self, details, etag=None):
+        """Store the `details` of one video, dropping any cached translation."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO video_metadata"
+                " (video_id, etag, fetched_at, details, translated_title)"
+                " VALUES (?, ?, ?, ?, NULL)",
+                (details["video_id"], etag, self.clock(), json.dumps(details)))
+
+    def set_translated_title(self, video_id, translated_title):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE video_metadata SET translated_title = ? WHERE video_id = ?",
+                (translated_title, video_id))
+
+    def purge(self):
+        """Delete expired entries."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM video_metadata WHERE fetched_at < ?", (self.clock() - self.ttl,))
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
@@ -0,0 +1,158 @@
+"""
+Bounded executor stages for the channel worker.
+
+A job flows through a chain of stages (fetch metadata, download, subtitle
+processing, render, upload). Every stage owns an input queue and a bounded
+pool of workers, so a slow ffmpeg render never stops the next download from
+starting, and a full queue pushes back on the stage feeding it.
+
+Stage functions are plain callables taking a job and returning the job for
+the next stage, or None to drop it. They know nothing about yt-dlp, ffmpeg
+or YouTube beyond what they call themselves, so a pipeline can be exercised
+with local stand-ins.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class StopPipeline(Exception):
+    """Raised by a stage function to abandon every job still in flight."""
+
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    name -> label used in logs and error reports.
+    func -> callable(job) returning the next job, None to drop it, or an
+        iterable of jobs when `fanout` is set.
+    workers -> size of the stage's pool.
+    kind -> "thread" runs `func` on the stage's own threads, "process" runs
+        it in a process pool (`func` and jobs must then be picklable).
+    maxsize -> bound of the stage's input queue. Default to 2 * workers.
+    """
+
+    def __init__(self, name, func, workers=1, kind="thread", maxsize=None, fanout=False):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown stage kind: {kind}")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.kind = kind
+        self.maxsize = maxsize if maxsize is not None else 2 * workers
+        self.fanout = fanout
+
+
+class Pipeline:
+    """
+    Run jobs through a chain of stages concurrently.
+
+    >>> pipeline = Pipeline([Stage("download", download, workers=3),
+    ...                      Stage("render", render, workers=2)])
+    >>> results = pipeline.run(jobs)
+
+    Failures of a single job are logged and recorded in `errors` as
+    (stage name, job, exception); they do not stop the other jobs.
+    """
+
+    def __init__(self, stages):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = list(stages)
+        self.errors = []
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """Drop every pending job; workers drain their queues and exit."""
+        self._stopped.set()
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def run(self, jobs):
+        """Feed `jobs` to the first stage, block until all stages are done
+        and return the jobs that came out of the last one."""
+        self.errors = []
+        self._stopped.clear()
+        queues = [queue.Queue(stage.maxsize) for stage in self.stages]
+        pools = [ProcessPoolExecutor(stage.workers) if stage.kind == "process" else None
+                 for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        lock = threading.Lock()
+        results = []
+
+        def forward(index, job):
+            if index + 1 < len(self.stages):
+                queues[index + 1].put(job)
+            else:
+                with lock:
+                    results.append(job)
+
+        def finish(index):
+            # The last worker out of a stage closes the next one.
+            with lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    queues[index + 1].put(_DONE)
+
+        def work(index):
+            stage = self.stages[index]
+            while True:
+                job = queues[index].get()
+                if job is _DONE:
+                    break
+                if self.stopped:
+                    continue
+                try:
+                    if pools[index] is not None:
+                        output = pools[index].submit(stage.func, job).result()
+                    else:
+                        output = stage.func(job)
+                except StopPipeline as error:
+                    logger.error(f"Stage {stage.name} stopped the pipeline: {error}")
+                    self.stop()
+                    continue
+                except Exception as error:
+                    logger.debug(f"Stage {stage.name} failed for job {job!r}: {error}")
+                    with lock:
+                        self.errors.append((stage.name, job, error))
+                    continue
+                if output is None:
+                    continue
+                for next_job in (output if stage.fanout else (output,)):
+                    if self.stopped:
+                        break
+                    forward(index, next_job)
+            finish(index)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                thread = threading.Thread(target=work, args=(index,),
+                                          name=f"{stage.name}-{number}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for job in jobs:
+                if self.stopped:
+                    break
+                queues[0].put(job)
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+            for pool in pools:
+                if pool is not None:
+                    pool.shutdown()
+        return results
@@ -0,0 +1,79 @@
+"""
+Persistent record of the videos the worker already processed.
+
+One SQLite connection in WAL mode is kept for the lifetime of the store and
+every known video ID is loaded into memory at startup, so duplicate checks
+never touch the disk. New IDs are buffered and written in one transaction
+per batch.
+"""
+import sqlite3
+import threading
+
+
+class VideoStateStore:
+    """
+    VideoStateStore(path, batch_size)
+
+    path -> SQLite database file, created if missing.
+    batch_size -> number of buffered IDs that triggers a write. Default to 20.
+
+    Safe to share between the worker's executor threads.
+    """
+
+    def __init__(self, path, batch_size=20):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = []
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS downloaded_videos (
+                    video_id TEXT PRIMARY KEY
+                )
+            """)
+        self._seen = set(row[0] for row in
+                         self.connection.execute("SELECT video_id FROM downloaded_videos"))
+
+    def __contains__(self, video_id):
+        return video_id in self._seen
+
+    def __len__(self):
+        return len(self._seen)
+
+    def add(self, video_id):
+        """Record `video_id`; it is written once the batch is full or on flush()."""
+        with self._lock:
+            if video_id in self._seen:
+                return
+            self._seen.add(video_id)
+            self._pending.append(video_id)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        """Write every buffered ID in a single transaction."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO downloaded_videos (video_id) VALUES (?)",
+                ((video_id,) for video_id in self._pending))
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
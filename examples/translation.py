@@ -0,0 +1,173 @@
+"""
+Batched, memoized translation for video titles and subtitle tracks.
+
+A `TranslationStage` sends many strings per backend request and remembers
+every translation in a persistent cache keyed by (text, source, target), so
+a title or a cue line is only ever translated once across polling cycles.
+
+Backends implement `translate_batch(texts, source, target) -> list`:
+`GoogleBackend` talks to Google Translate through deep_translator,
+`OfflineBackend` is a local stand-in for tests and dry runs.
+"""
+import logging
+import sqlite3
+import threading
+
+from pysrt import SubRipFile, SubRipItem
+
+logger = logging.getLogger(__name__)
+
+
+class OfflineBackend:
+    """
+    Translate without any network access.
+
+    glossary -> optional {(text, source, target): translation} lookup.
+    Unknown strings are returned tagged with the target language.
+    """
+
+    def __init__(self, glossary=None):
+        self.glossary = glossary or {}
+        self.requests = 0
+
+    def translate_batch(self, texts, source, target):
+        self.requests += 1
+        return [self.glossary.get((text, source, target), f"[{target}] {text}") for text in texts]
+
+
+class GoogleBackend:
+    """
+    Google Translate through deep_translator.
+
+    Strings are packed one per line into requests of at most `max_chars`
+    characters. Should the service merge or split lines, the batch is
+    translated string by string instead.
+    """
+
+    def __init__(self, max_chars=4500):
+        self.max_chars = max_chars
+        self._local = threading.local()
+
+    def _translator(self, source, target):
+        from deep_translator import GoogleTranslator
+
+        translators = self._local.__dict__.setdefault("translators", {})
+        if (source, target) not in translators:
+            translators[(source, target)] = GoogleTranslator(source=source, target=target)
+        return translators[(source, target)]
+
+    def _packs(self, texts):
+        pack, size = [], 0
+        for text in texts:
+            if pack and size + len(text) + 1 > self.max_chars:
+                yield pack
+                pack, size = [], 0
+            pack.append(text)
+            size += len(text) + 1
+        if pack:
+            yield pack
+
+    def translate_batch(self, texts, source, target):
+        translator = self._translator(source, target)
+        texts = [" ".join(text.split()) for text in texts]
+        results = []
+        for pack in self._packs(texts):
+            translated = (translator.translate("\n".join(pack)) or "").split("\n")
+            if len(translated) != len(pack):
+                translated = [translator.translate(text) for text in pack]
+            results.extend(line.strip() for line in translated)
+        return results
+
+
+class TranslationCache:
+    """Persistent memo of translations, safe to share between threads."""
+
+    def __init__(self, path=":memory:"):
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    text TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    PRIMARY KEY (text, source, target)
+                )
+            """)
+
+    def get_many(self, texts, source, target):
+        """Return {text: translation} for the cached subset of `texts`."""
+        found = {}
+        texts = list(texts)
+        with self._lock:
+            # Stay well below SQLite's limit on bound parameters
+            for offset in range(0, len(texts), 500):
+                chunk = texts[offset:offset + 500]
+                rows = self.connection.execute(
+                    "SELECT text, translation FROM translations WHERE source = ? AND target = ?"
+                    f" AND text IN ({','.join('?' * len(chunk))})",
+                    [source, target] + chunk)
+                found.update(rows)
+        return found
+
+    def put_many(self, translations, source, target):
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations (text, source, target, translation)"
+                " VALUES (?, ?, ?, ?)",
+                ((text, source, target, translation) for text, translation in translations.items()))
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+class TranslationStage:
+    """
+    TranslationStage(backend, cache, batch_size)
+
+    backend -> object with translate_batch(texts, source, target).
+    cache -> TranslationCache. Default to an in-memory one.
+    batch_size -> maximum number of strings per backend request.
+    """
+
+    def __init__(self, backend, cache=None, batch_size=100):
+        self.backend = backend
+        self.cache = cache if cache is not None else TranslationCache()
+        self.batch_size = batch_size
+
+    def translate_many(self, texts, source, target):
+        """Translate `texts`, hitting the backend only for unseen strings."""
+        texts = list(texts)
+        unique = list(dict.fromkeys(text for text in texts if text.strip()))
+        known = self.cache.get_many(unique, source, target)
+        missing = [text for text in unique if text not in known]
+        for offset in range(0, len(missing), self.batch_size):
+            batch = missing[offset:offset + self.batch_size]
+            translated = dict(zip(batch, self.backend.translate_batch(batch, source, target)))
+            self.cache.put_many(translated, source, target)
+            known.update(translated)
+        return [known.get(text, text) for text in texts]
+
+    def translate(self, text, source, target):
+        return self.translate_many([text], source, target)[0]
+
+    def translate_subtitles(self, subs, source, target):
+        """
+        Return a copy of the SubRipFile `subs` with every cue translated.
+        Cues are sent in chunks of `batch_size`.
+        """
+        texts = [" ".join(item.text.splitlines()) for item in subs]
+        translated = self.translate_many(texts, source, target)
+        items = [SubRipItem(item.index, item.start.ordinal, item.end.ordinal, text, item.position)
+                 for item, text in zip(subs, translated)]
+        return SubRipFile(items, eol=subs.eol, encoding=subs.encoding)
+
+    def bilingual_subtitles(self, subs, source, target):
+        """Return a copy of `subs` showing each original cue above its translation."""
+        translated = self.translate_subtitles(subs, source, target)
+        for original, item in zip(subs, translated):
+            if original.text.strip():
+                item.text = f"{original.text}\n{item.text}"
+        return translated
@@ -1,34 +1,29 @@
 import os
-import sqlite3
-import subprocess
 import time
 import pickle
 import asyncio
 import argparse
+import functools
 from googleapiclient.discovery import build
-from dl import main as download_video_script
+import dl
+from stages import Pipeline, Stage, StopPipeline
+from state import VideoStateStore
+from metadata_cache import MetadataCache
+from translation import GoogleBackend, TranslationCache, TranslationStage
 import isodate
 from googleapiclient.http import MediaFileUpload
-from deep_translator import GoogleTranslator
-from googletrans import Translator
-from httpx import TimeoutException
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 import logging
-import math
 import json
+import threading
 
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # YouTube Data API key
 API_KEY = os.getenv("YOUTUBE_API_KEY")
-if not API_KEY:
-    raise ValueError("YOUTUBE_API_KEY environment variable is not set")
-
 API_KEY_2 = os.getenv("YOUTUBE_API_KEY_2")
-if not API_KEY_2:
-    raise ValueError("YOUTUBE_API_KEY_2 environment variable is not set")
 
 # Combined two-dimensional array of channel lists
 CHANNELS_TO_MONITOR = [
@@ -72,35 +67,48 @@ CHANNELS_TO_MONITOR = [
 # YouTube API scopes
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
 DB_FILE = "downloaded_videos.db"
+# Cached video details are reused for this long unless their ETag changes
+METADATA_TTL = 24 * 3600
+# Point the Data API client at another server, e.g. a local fake for tests
+API_ENDPOINT = os.getenv("YOUTUBE_API_ENDPOINT")
+
+# Memo of every translated title and subtitle line
+TRANSLATIONS_DB = "translations.db"
+
+_state = None
+_metadata_cache = None
+_translator = None
+_clients = threading.local()
 
 def init_db():
-    """Initialize the SQLite database to store downloaded video IDs."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS downloaded_videos (
-            video_id TEXT PRIMARY KEY
-        )
-    """)
-    conn.commit()
-    conn.close()
+    """Open the store of downloaded video IDs, loading them all in memory."""
+    global _state
+    if _state is None:
+        _state = VideoStateStore(DB_FILE)
+    return _state
 
 def is_video_downloaded(video_id):
     """Check if a video ID is already downloaded."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM downloaded_videos WHERE video_id = ?", (video_id,))
-    result = cursor.fetchone()
-    conn.close()
-    return result is not None
+    return video_id in init_db()
 
 def mark_video_as_downloaded(video_id):
-    """Mark a video ID as downloaded by adding it to the database."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR IGNORE INTO downloaded_videos (video_id) VALUES (?)", (video_id,))
-    conn.commit()
-    conn.close()
+    """Mark a video ID as downloaded; the write is batched with other IDs."""
+    init_db().add(video_id)
+
+def init_metadata_cache():
+    """Open the video metadata cache stored next to the downloaded videos."""
+    global _metadata_cache
+    if _metadata_cache is None:
+        _metadata_cache = MetadataCache(DB_FILE, ttl=METADATA_TTL)
+    return _metadata_cache
+
+def youtube_client(api_key):
+    """Return a Data API client for `api_key`, built once per thread."""
+    clients = _clients.__dict__.setdefault("by_key", {})
+    if api_key not in clients:
+        client_options = {"api_endpoint": API_ENDPOINT} if API_ENDPOINT else None
+        clients[api_key] = build("youtube", "v3", developerKey=api_key, client_options=client_options)
+    return clients[api_key]
 
 def authenticate_youtube():
     """Authenticate and return a YouTube API client."""
@@ -129,7 +137,7 @@ def authenticate_youtube():
 
 def get_all_videos(api_key, channel_id, duration):
     """Fetch all videos from a YouTube channel."""
-    youtube = build("youtube", "v3", developerKey=api_key)
+    youtube = youtube_client(api_key)
     videos = []
     next_page_token = None
 
@@ -163,7 +171,7 @@ def get_recent_videos(api_keys, channel_id):
 
     for api_key in api_keys:
         try:
-            youtube = build("youtube", "v3", developerKey=api_key)
+            youtube = youtube_client(api_key)
             request = youtube.search().list(
                 part="snippet",
                 channelId=channel_id,
@@ -176,7 +184,7 @@ def get_recent_videos(api_keys, channel_id):
             videos = []
             for item in response.get("items", []):
                 video_id = item["id"]["videoId"]
-                videos.append({"id": video_id})
+                videos.append({"id": video_id, "etag": item.get("etag")})
             return videos, api_key
         except Exception as e:
             error = json.loads(e.content.decode())
@@ -188,7 +196,7 @@ def get_recent_videos(api_keys, channel_id):
                 break
 
     logger.error("All API keys exhausted or failed.")
-    return []
+    return [], None
 
 def get_video_details(api_key, video_ids):
     """
@@ -204,7 +212,7 @@ def get_video_details(api_key, video_ids):
     # Join the video IDs into a comma-separated string
     video_ids_str = ",".join(video_ids)
     logger.debug(f"Fetching video details for IDs: {video_ids_str}")
-    youtube = build("youtube", "v3", developerKey=api_key)
+    youtube = youtube_client(api_key)
     request = youtube.videos().list(
         part="snippet,contentDetails",
         id=video_ids_str
@@ -242,16 +250,29 @@ def parse_duration(duration):
     parsed_duration = isodate.parse_duration(duration)
     return int(parsed_duration.total_seconds())
 
+def init_translator(backend=None):
+    """Return the shared translation stage, memoized in TRANSLATIONS_DB."""
+    global _translator
+    if _translator is None:
+        _translator = TranslationStage(backend or GoogleBackend(), TranslationCache(TRANSLATIONS_DB))
+    return _translator
+
 def translate_title(title, retries=3, delay=5):
-    """Translate the video title to Chinese using googletrans with retries."""
-    translator = GoogleTranslator(source='en', target='zh-CN')
+    """Translate the video title to Chinese, retrying on transient failures."""
     for attempt in range(retries):
-        result = translator.translate(title)  # Remove 'await' as 'deep_translator' is not async
-        return result
+        try:
+            return init_translator().translate(title, 'en', 'zh-CN')
+        except Exception as e:
+            logger.debug(f"Translation attempt {attempt + 1} failed for {title}: {e}")
+            time.sleep(delay)
     logger.debug(f"Failed to translate title after {retries} attempts: {title}")
     return f"{title} (Translation Failed)"
 
 def main(args=None):
+    if not API_KEY:
+        raise ValueError("YOUTUBE_API_KEY environment variable is not set")
+    if not API_KEY_2:
+        raise ValueError("YOUTUBE_API_KEY_2 environment variable is not set")
     # Set up the proxy if needed. e.g, os.environ["https_proxy"] = "http://my_proxy:port"
     proxy = os.getenv("my_proxy")
     if proxy:
@@ -265,6 +286,8 @@ def main(args=None):
                         help=f"Specify the maximum video length in minutes (default: 15).")
     parser.add_argument("sub_lang", type=str, choices=["0", "1", "2", "3"], default="2", 
                         help=f"Specify which sub_lang to download (default: 2).")
+    parser.add_argument("--subtitle-mode", choices=dl.SUBTITLE_MODES, default="burn",
+                        help="Burn subtitles in (re-encode) or mux them as a soft track (default: burn).")
 
     if args is None:
         args = parser.parse_args()
@@ -285,152 +308,187 @@ def main(args=None):
     # Authenticate YouTube only if not skipping upload
     youtube_upload = authenticate_youtube() if not skip_upload else None
 
-    return channels_to_monitor, skip_upload, censor, max_video_length, sub_lang, youtube_upload
-
+    return channels_to_monitor, skip_upload, censor, max_video_length, sub_lang, youtube_upload, args.subtitle_mode
+
+
+# Pool sizes of the executor stages. Downloads and uploads are network bound,
+# renders are bound by the ffmpeg child processes they wait on.
+STAGE_WORKERS = {
+    "metadata": 2,
+    "download": 3,
+    "subtitles": 2,
+    "render": 2,
+    "upload": 1,
+}
+
+def fetch_metadata_stage(channel, api_keys, max_video_length):
+    """Stage 1: list the recent videos of a channel and turn the new, short
+    enough ones into jobs."""
+    logger.debug(f"Monitoring channel: {channel['name']} (ID: {channel['channel_id']})")
+    videos, api_key = get_recent_videos(api_keys, channel["channel_id"])
+    logger.debug(f"Number of videos fetched for channel {channel['name']}: {len(videos)}")
+    if not videos:
+        return []
 
-async def monitor_channel(channels_to_monitor, skip_upload, censor, max_video_length, sub_lang):
+    # Already processed videos need no details; unchanged ones come from the cache
+    cache = init_metadata_cache()
+    video_details = []
+    missing = {}
+    for video in videos:
+        if is_video_downloaded(video["id"]):
+            logger.debug(f"Skipping video: {video['id']} (Already downloaded in record)")
+            continue
+        cached = cache.get(video["id"], video.get("etag"))
+        if cached is not None:
+            video_details.append(cached)
+        else:
+            missing[video["id"]] = video.get("etag")
+    if missing:
+        for videodetail in get_video_details(api_key, list(missing)):
+            cache.put(videodetail, missing.get(videodetail["video_id"]))
+            video_details.append(videodetail)
+
+    jobs = []
+    for videodetail in video_details:
+        video_id = videodetail["video_id"]
+        title = videodetail["title"]
+        duration = videodetail["duration_seconds"]
+        if duration is None:
+            logger.debug(f"Could not fetch duration for video: {title}")
+            continue
+        if duration > max_video_length * 60:
+            logger.debug(f"Skipping video: {title} (Duration: {duration // 60} minutes)")
+            continue
+        logger.debug(f"Processing video with ID: {video_id}, Duration: {duration} seconds, Title: {title}, Description: {videodetail['description']}, Tags: {videodetail['tags']}")
+        jobs.append({
+            "video_id": video_id,
+            "video_url": f"https://www.youtube.com/watch?v={video_id}",
+            "channel_name": channel["name"],
+            "title": title,
+            "description": videodetail["description"],
+            "duration": duration,
+            "tags": videodetail["tags"],
+            # Telling by duration if this is a short video (1:2 aspect ratio)
+            "font_size": "small" if duration < 240 else "medium",
+            "translated_title": videodetail.get("translated_title"),
+        })
+    return jobs
+
+def download_stage(job, sub_lang):
+    """Stage 2: fetch subtitles, thumbnail and video with yt-dlp."""
+    logger.debug(f"Downloading video: {job['title']} (Duration: {job['duration'] // 60} minutes)")
+    sanitized_title = dl.sanitize_title(dl.get_video_title(job["video_url"]))
+    dl.prepare_workspace(sanitized_title)
+    dl.fetch_assets(job["video_url"], sanitized_title, dl.SUB_LANGS[int(sub_lang)])
+    return dict(job, sanitized_title=sanitized_title)
+
+def subtitle_stage(job, censor):
+    """Stage 3: censor and merge the downloaded subtitle tracks."""
+    subtitle_file = dl.process_subtitles(job["sanitized_title"], censor, init_translator())
+    return dict(job, subtitle_file=subtitle_file)
+
+def render_stage(job, subtitle_mode="burn"):
+    """Stage 4: apply the subtitles to the video, then record the video as done."""
+    downloaded_file = dl.render_video(job["sanitized_title"], job["subtitle_file"], job["font_size"],
+                                      job.get("subtitle_mode", subtitle_mode))
+    logger.debug(f"Downloaded and processed video: {job['title']}")
+    mark_video_as_downloaded(job["video_id"])
+    return dict(job, downloaded_file=downloaded_file)
+
+def write_metadata_file(job, translated_title):
+    """Write the JSON sidecar with the translated title and description."""
+    json_file_path = os.path.splitext(job["downloaded_file"])[0] + ".txt"
+    logger.debug(f"JSON file path: {json_file_path}")
+    modifiedtags = ' '.join([f'#{tag.replace(" ", "")}' for tag in job["tags"]])
+    json_content = {
+        "title": f"{translated_title}",
+        "description": json.dumps(f"{job['title']} {job['description']} {modifiedtags}"),
+        "channel_name": f"{job['channel_name']}",
+    }
+    logger.debug(f"JSON content: {json_content}")
+    try:
+        with open(json_file_path, "w", encoding="utf-8") as json_file:
+            json.dump(json_content, json_file, ensure_ascii=False, indent=4)
+        logger.debug(f"JSON file created: {json_file_path}")
+    except Exception as e:
+        logger.debug(f"Failed to write JSON file for video: {job['title']}. Error: {e}")
+
+def upload_stage(job, youtube_upload=None):
+    """Stage 5: translate the title, write the sidecar and upload the video."""
+    translated_title = job.get("translated_title")
+    if translated_title is None:
+        translated_title = translate_title(job["title"])
+        init_metadata_cache().set_translated_title(job["video_id"], translated_title)
+    write_metadata_file(job, translated_title)
+    if youtube_upload is None:
+        return job
+
+    body = {
+        "snippet": {
+            "title": translated_title,
+            "description": f"{job['title']}. Video URL: {job['video_url']}",
+            "tags": job["tags"],
+            "categoryId": "25"  # Category ID for "News & Politics"
+        },
+        "status": {
+            "privacyStatus": "public"  # Set to "public" if you want it public
+        }
+    }
+    media = MediaFileUpload(job["downloaded_file"], chunksize=-1, resumable=True)
+    request = youtube_upload.videos().insert(
+        part="snippet,status",
+        body=body,
+        media_body=media
+    )
+    try:
+        logger.debug(f"Uploading video: {translated_title}")
+        response = request.execute()
+        logger.debug(f"Uploaded video: {translated_title} (Video ID: {response['id']})")
+    except Exception as e:
+        if "uploadLimitExceeded" in str(e):
+            raise StopPipeline("Upload limit exceeded")
+        logger.debug(f"Failed to upload video: {translated_title}. Error: {e}")
+    return dict(job, translated_title=translated_title)
+
+def build_pipeline(skip_upload, censor, max_video_length, sub_lang, youtube_upload=None, api_keys=None, workers=None,
+                   subtitle_mode="burn"):
+    """Assemble the fetch metadata -> download -> subtitles -> render -> upload pipeline."""
+    workers = dict(STAGE_WORKERS, **(workers or {}))
+    api_keys = api_keys or [API_KEY_2, API_KEY]
+    return Pipeline([
+        Stage("metadata", functools.partial(fetch_metadata_stage, api_keys=api_keys, max_video_length=max_video_length),
+              workers=workers["metadata"], fanout=True),
+        Stage("download", functools.partial(download_stage, sub_lang=sub_lang), workers=workers["download"]),
+        Stage("subtitles", functools.partial(subtitle_stage, censor=censor), workers=workers["subtitles"]),
+        Stage("render", functools.partial(render_stage, subtitle_mode=subtitle_mode), workers=workers["render"]),
+        Stage("upload", functools.partial(upload_stage, youtube_upload=None if skip_upload else youtube_upload),
+              workers=workers["upload"]),
+    ])
+
+async def monitor_channel(channels_to_monitor, skip_upload, censor, max_video_length, sub_lang, youtube_upload=None,
+                          subtitle_mode="burn"):
     """Monitor the channel for new videos and download short ones."""
+    loop = asyncio.get_running_loop()
+    pipeline = build_pipeline(skip_upload, censor, max_video_length, sub_lang, youtube_upload,
+                              subtitle_mode=subtitle_mode)
     while True:
         logger.debug("Checking for new videos...")
-        tasks = []
-        semaphore = asyncio.Semaphore(3)  # Limit to 3 concurrent tasks
-
-        async def process_channel(channel):
-            async with semaphore:
-                CHANNEL_ID = channel["channel_id"]
-                CHANNEL_NAME = channel["name"]
-                logger.debug(f"Monitoring channel: {channel['name']} (ID: {CHANNEL_ID})")
-
-                # Fetch recent videos
-                # videos = get_all_videos(API_KEY, CHANNEL_ID, "short")
-                # Rotate through API keys to avoid quota exhaustion
-                api_keys = [API_KEY_2, API_KEY]
-                
-                videos, api_key = get_recent_videos(api_keys, CHANNEL_ID)
-                logger.debug(f"Number of videos fetched for channel {channel['name']}: {len(videos)}")
-                video_ids = [video["id"] for video in videos]
-                videodetails = get_video_details(api_key, video_ids)
-                for videodetail in videodetails:
-                    video_id = videodetail["video_id"]
-                    logger.debug(f"Processing video with ID: {video_id}")
-                    video_url = f"https://www.youtube.com/watch?v={video_id}"
-                    font_size = "medium"
-                    title = videodetail["title"]
-                    description = videodetail["description"]
-                    duration = videodetail["duration_seconds"]
-                    tags = videodetail["tags"]
-                    # Skip if the video is already downloaded
-                    if not is_video_downloaded(video_id):
-                        logger.debug(f"Video not downloaded yet: {video_id}")
-
-                        logger.debug(f"Processing video with ID: {video_id}, Duration: {duration} seconds, Title: {title}, Description: {description}, Tags: {tags}")
-
-                        # Telling by duration if this is a short video (1:2 aspect ratio)
-                        if duration < 240:
-                            font_size = "small"
-
-                        logger.debug(f"Video ID: {video_id}, Duration: {duration} seconds, Font Size: {font_size}")
-
-                        if duration is None:
-                            logger.debug(f"Could not fetch duration for video: {title}")
-                            continue
-
-                        if duration <= max_video_length * 60:
-                            logger.debug(f"Downloading video: {title} (Duration: {duration // 60} minutes)")
-                            try:
-                                downloaded_file = download_video_script([video_url, sub_lang, font_size], censor=censor, dry=False)
-                                logger.debug(f"Downloaded and processed video: {title}")
-                                mark_video_as_downloaded(video_id)  # Mark the video as downloaded
-                                # Write a JSON file with the translated title and description
-                                if downloaded_file:
-                                    translated_title = translate_title(title)
-                                    logger.debug(f"Write JSON file for video: {title}")
-                                    json_file_path = os.path.splitext(downloaded_file)[0] + ".txt"
-                                    logger.debug(f"JSON file path: {json_file_path}")
-                                    modifiedtags = ' '.join([f'#{tag.replace(" ", "")}' for tag in tags])
-                                    # Translate the title to Chinese
-                                    json_content = {
-                                        "title": f"{translated_title}",
-                                        "description": json.dumps(f"{title} {description} {modifiedtags}"),
-                                        "channel_name": f"{CHANNEL_NAME}",
-                                    }
-                                    logger.debug(f"JSON content: {json_content}")
-                                    try:
-                                        with open(json_file_path, "w", encoding="utf-8") as json_file:
-                                            json.dump(json_content, json_file, ensure_ascii=False, indent=4)
-                                        logger.debug(f"JSON file created: {json_file_path}")
-                                    except Exception as e:
-                                        logger.debug(f"Failed to write JSON file for video: {title}. Error: {e}")
-                            except Exception as e:
-                                logger.debug(f"Failed to download video: {title}. Error: {e}")
-                                downloaded_file = None  # Ensure downloaded_file is set to None if download fails
-                        else:
-                            logger.debug(f"Skipping video: {title} (Duration: {duration // 60} minutes)")
-                            downloaded_file = None  # Set to None if the video is skipped
-                    else:
-                        logger.debug(f"Skipping video: {title} (Already downloaded in record)")
-                        # Only get the video file name
-                        try:
-                            downloaded_file = download_video_script([video_url, "2", "medium"], censor=censor, dry=True)
-                        except Exception as e:
-                            logger.debug(f"Failed to get video file name: {title}. Error: {e}")
-                        if not os.path.exists(downloaded_file):
-                            logger.debug(f"Skipping video: {title} (File not found)")
-                            continue
-
-                    # Ensure downloaded_file is valid before proceeding
-                    if not downloaded_file:
-                        logger.debug(f"Skipping re-gen for video: {title} as it was not downloaded.")
-                        continue
-
-                    if not skip_upload:
-                        # Prepare the video upload request
-                        body = {
-                            "snippet": {
-                                "title": translated_title,
-                                "description": f"{title}. Video URL: https://www.youtube.com/watch?v={video_id}",
-                                "tags": video["tags"],
-                                "categoryId": "25"  # Category ID for "News & Politics"
-                            },
-                            "status": {
-                                "privacyStatus": "public"  # Set to "public" if you want it public
-                            }
-                        }
-
-                        media = MediaFileUpload(downloaded_file, chunksize=-1, resumable=True)
-                        request = youtube_upload.videos().insert(
-                            part="snippet,status",
-                            body=body,
-                            media_body=media
-                        )
-
-                        try:
-                            logger.debug(f"Uploading video: {translated_title}")
-                            response = request.execute()
-                            logger.debug(f"Uploaded video: {translated_title} (Video ID: {response['id']})")
-
-                        except Exception as e:
-                            if "uploadLimitExceeded" in str(e):
-                                logger.error("Upload limit exceeded. Exiting all monitor tasks.")
-                                for task in asyncio.all_tasks():
-                                    if task is not asyncio.current_task():
-                                        task.cancel()
-                                return  # Exit the current upload process
-                            logger.debug(f"Failed to upload video: {translated_title}. Error: {e}")
-
-        for channel in channels_to_monitor:
-            tasks.append(process_channel(channel))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Task ended with exception: {result}")
+        # The stages block on yt-dlp, ffmpeg and the YouTube API; keep them off the event loop.
+        await loop.run_in_executor(None, pipeline.run, channels_to_monitor)
+        init_db().flush()
+        init_metadata_cache().purge()
+        for stage_name, job, error in pipeline.errors:
+            logger.error(f"Stage {stage_name} failed for {job.get('title', job) if isinstance(job, dict) else job}: {error}")
+        if pipeline.stopped:
+            logger.error("Upload limit exceeded. Exiting all monitor tasks.")
+            return
         logger.debug("All channels processed. Waiting for the next check...")
         await asyncio.sleep(3600*4)  # Check 4 hours
 
 if __name__ == "__main__":
     # Get the necessary variables from main
-    channels_to_monitor, skip_upload, censor, max_video_length, sub_lang, youtube_upload = main()
+    channels_to_monitor, skip_upload, censor, max_video_length, sub_lang, youtube_upload, subtitle_mode = main()
     
     # Pass the variables to monitor_channel
-    asyncio.run(monitor_channel(channels_to_monitor, skip_upload, censor, max_video_length, sub_lang))
\ No newline at end of file
+    asyncio.run(monitor_channel(channels_to_monitor, skip_upload, censor, max_video_length, sub_lang, youtube_upload,
+                                subtitle_mode))
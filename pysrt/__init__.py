@@ -1,11 +1,13 @@
 from pysrt.srttime import SubRipTime
 from pysrt.srtitem import SubRipItem
-from pysrt.srtfile import SubRipFile
+from pysrt.srtfile import SubRipFile, SubRipParser
+from pysrt.srtarchive import open_archive, stream_archive
 from pysrt.srtexc import Error, InvalidItem, InvalidTimeString
 from pysrt.version import VERSION, VERSION_STRING
 
 __all__ = [
-    'SubRipFile', 'SubRipItem', 'SubRipFile', 'SUPPORT_UTF_32_LE',
+    'SubRipFile', 'SubRipItem', 'SubRipFile', 'SubRipParser',
+    'open_archive', 'stream_archive', 'SUPPORT_UTF_32_LE',
     'SUPPORT_UTF_32_BE', 'InvalidItem', 'InvalidTimeString'
 ]
 
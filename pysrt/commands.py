@@ -6,19 +6,35 @@ from __future__ import print_function
 import os
 import re
 import sys
+import json
 import codecs
 import shutil
 import argparse
+from functools import partial
 from textwrap import dedent
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
 
 from chardet import detect
 from pysrt import SubRipFile, SubRipTime, VERSION_STRING
+from pysrt.srtfile import AtomicFile, _open_binary
+from pysrt.srttiming import frame_rate
+from pysrt.srtcheck import check_path, stats_path, DEFAULT_MAX_CPS, DEFAULT_SAMPLES
+from pysrt.srtindex import index_path, DEFAULT_BLOCK_SIZE
 
 
 def underline(string):
     return "\033[4m%s\033[0m" % string
 
 
+def index_file(path, block_size=DEFAULT_BLOCK_SIZE):
+    try:
+        index = SubRipFile.build_index(path, block_size=block_size)
+    except (IOError, OSError, UnicodeDecodeError, LookupError) as error:
+        return {'file': path, 'error': '%s: %s' % (type(error).__name__, error)}
+    return {'file': path, 'index': index_path(path), 'blocks': len(index)}
+
+
 class TimeAwareArgumentParser(argparse.ArgumentParser):
 
     RE_TIME_REPRESENTATION = re.compile(r'^\-?(\d+[hms]{0,2}){1,4}$')
@@ -26,7 +42,8 @@ class TimeAwareArgumentParser(argparse.ArgumentParser):
     def parse_args(self, args=None, namespace=None):
         time_index = -1
         for index, arg in enumerate(args):
-            match = self.RE_TIME_REPRESENTATION.match(arg)
+            # Only negative offsets could be mistaken for options
+            match = arg.startswith('-') and self.RE_TIME_REPRESENTATION.match(arg)
             if match:
                 time_index = index
                 break
@@ -40,7 +57,9 @@ class TimeAwareArgumentParser(argparse.ArgumentParser):
 class SubRipShifter(object):
 
     BACKUP_EXTENSION = '.bak'
+    SPLIT_WRITERS = 8
     RE_TIME_STRING = re.compile(r'(\d+)([hms]{0,2})')
+    RE_SIZE_STRING = re.compile(r'^(\d+)([kmg]?)b?$', re.IGNORECASE)
     UNIT_RATIOS = {
         'ms': 1,
         '': SubRipTime.SECONDS_RATIO,
@@ -48,6 +67,7 @@ class SubRipShifter(object):
         'm': SubRipTime.MINUTES_RATIO,
         'h': SubRipTime.HOURS_RATIO,
     }
+    SIZE_RATIOS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
     DESCRIPTION = dedent("""\
         Srt subtitle editor
 
@@ -74,6 +94,9 @@ class SubRipShifter(object):
         Examples:
             Convert 23.9fps subtitles to 25fps:
                 $ srt -i rate 23.9 25 movie.srt
+
+            Convert NTSC film subtitles to 25fps, with the exact frame rate:
+                $ srt -i rate 24000/1001 25 movie.srt
     """)
     LIMITS_HELP = "Each parts duration in the form: [Hh][Mm]S[s][MSms]"
     SPLIT_EPILOG = dedent("""\
@@ -86,16 +109,87 @@ class SubRipShifter(object):
             For a movie in 3 parts of 20 minutes each:
                 $ srt split 20m 20m movie.srt
                 => creates movie.1.srt, movie.2.srt and movie.3.srt
+
+            In parts of 500 subtitles each:
+                $ srt split --count 500 movie.srt
+
+            In parts of at most 64 kilobytes each:
+                $ srt split --size 64k movie.srt
     """)
-    FRAME_RATE_HELP = "A frame rate in fps (commonly 23.9 or 25)"
+    COUNT_HELP = "Split in parts of at most this many subtitles instead of by time"
+    SIZE_HELP = "Split in parts of at most this many bytes (k, m and g suffixes allowed) instead of by time"
+    FRAME_RATE_HELP = "A frame rate in fps (commonly 23.976 or 25), exact fractions like 24000/1001 allowed"
     ENCODING_HELP = dedent("""\
         Change file encoding. Useful for players accepting only latin1 subtitles.
         List of supported encodings: http://docs.python.org/library/codecs.html#standard-encodings
     """)
     BREAK_EPILOG = dedent("""\
         Break lines longer than defined length
+
+        Examples:
+            At most 2 lines of 42 columns, of similar widths:
+                $ srt -i break --lines 2 --balanced 42 movie.srt
+
+            Join the existing lines of subtitles too long to fit before breaking them:
+                $ srt -i break --reflow 32 movie.srt
+    """)
+    LENGTH_HELP = "Maximum width of a line, East Asian wide characters counting for two"
+    LINES_HELP = "Maximum number of lines per subtitle"
+    BALANCED_HELP = "Make lines of similar widths instead of filling them greedily"
+    REFLOW_HELP = "Join the existing lines of subtitles that do not fit instead of breaking each line on its own"
+    RETIME_EPILOG = dedent("""\
+        Move subtitles along a piecewise-linear map going through the given
+        anchors. Subtitles between two anchors are interpolated, the ones
+        before the first or after the last follow the nearest segment.
+
+        Examples:
+            Subtitles drifting by 1.5 seconds over the first 30 minutes, then
+            early by 8 seconds after an ad break at 45 minutes:
+                $ srt -i retime 10m=10m 30m=29m58s500ms 45m=44m52s 1h=59m52s movie.srt
+    """)
+    ANCHOR_HELP = "A source=target pair of timestamps in the form: [Hh][Mm]S[s][MSms]"
+    NORMALIZE_EPILOG = dedent("""\
+        Fix subtitles displayed too briefly, too long or too close to each other
+
+        Examples:
+            At least a second on screen, 17 characters per second at most:
+                $ srt -i normalize --min-duration 1s --max-cps 17 movie.srt
+
+            At most 7 seconds and 80 milliseconds between subtitles:
+                $ srt -i normalize --max-duration 7s --min-gap 80ms movie.srt
+    """)
+    DURATION_HELP = "A duration in the form: [Hh][Mm]S[s][MSms]"
+    CHECK_EPILOG = dedent("""\
+        Report parse errors, overlapping subtitles, zero and negative durations,
+        reading speeds above the limit and non consecutive indexes.
+        Exit with status 1 if any file has a problem.
+
+        Examples:
+            Every file of a directory, one JSON report per line:
+                $ srt check --max-cps 17 subs/*.srt
+    """)
+    STATS_EPILOG = dedent("""\
+        Subtitle counts, durations histogram and reading speed percentiles.
+
+        Examples:
+            Every file of a directory as a single JSON document:
+                $ srt stats --format json subs/*.srt
     """)
-    LENGTH_HELP = "Maximum number of characters per line"
+    INDEX_EPILOG = dedent("""\
+        Write a movie.srt.srtidx sidecar index next to each file, recording
+        where every block of subtitles starts. Reading a time range of an
+        indexed file then only parses that part of it:
+            >>> pysrt.open('movie.srt', between=({'minutes': 83}, {'minutes': 84}))
+
+        Examples:
+            Every file of a directory:
+                $ srt index subs/*.srt
+    """)
+    BLOCK_SIZE_HELP = "Number of subtitles per index entry (default: %s)" % DEFAULT_BLOCK_SIZE
+    MAX_CPS_HELP = "Maximum reading speed, in characters per second (default: %s)" % DEFAULT_MAX_CPS
+    SAMPLES_HELP = "Number of examples reported per kind of problem (default: %s)" % DEFAULT_SAMPLES
+    JOBS_HELP = "Number of files processed in parallel (default: number of CPUs)"
+    FORMAT_HELP = "jsonl: one report per line as soon as it is ready, json: a single list"
 
     def __init__(self):
         self.output_file_path = None
@@ -115,29 +209,77 @@ class SubRipShifter(object):
         shift_parser.set_defaults(action=self.shift)
 
         rate_parser = subparsers.add_parser('rate', help="Convert subtitles from a frame rate to another", epilog=self.RATE_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
-        rate_parser.add_argument('initial', action='store', type=float, help=self.FRAME_RATE_HELP)
-        rate_parser.add_argument('final', action='store', type=float, help=self.FRAME_RATE_HELP)
+        rate_parser.add_argument('initial', action='store', type=self.parse_frame_rate, help=self.FRAME_RATE_HELP)
+        rate_parser.add_argument('final', action='store', type=self.parse_frame_rate, help=self.FRAME_RATE_HELP)
         rate_parser.set_defaults(action=self.rate)
 
         split_parser = subparsers.add_parser('split', help="Split a file in multiple parts", epilog=self.SPLIT_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
-        split_parser.add_argument('limits', action='store', nargs='+', type=self.parse_time, help=self.LIMITS_HELP)
+        split_parser.add_argument('limits', action='store', nargs='*', type=self.parse_time, help=self.LIMITS_HELP)
+        split_group = split_parser.add_mutually_exclusive_group()
+        split_group.add_argument('--count', action='store', type=int, help=self.COUNT_HELP)
+        split_group.add_argument('--size', action='store', type=self.parse_size, help=self.SIZE_HELP)
         split_parser.set_defaults(action=self.split)
 
         break_parser = subparsers.add_parser('break', help="Break long lines", epilog=self.BREAK_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
         break_parser.add_argument('length', action='store', type=int, help=self.LENGTH_HELP)
+        break_parser.add_argument('--lines', action='store', type=int, help=self.LINES_HELP)
+        break_parser.add_argument('--balanced', action='store_true', help=self.BALANCED_HELP)
+        break_parser.add_argument('--reflow', action='store_true', help=self.REFLOW_HELP)
         break_parser.set_defaults(action=self.break_lines)
 
+        retime_parser = subparsers.add_parser('retime', help="Retime subtitles along anchor points", epilog=self.RETIME_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
+        retime_parser.add_argument('anchors', action='store', nargs='+', metavar=underline('anchor'),
+            type=self.parse_anchor, help=self.ANCHOR_HELP)
+        retime_parser.set_defaults(action=self.retime)
+
+        normalize_parser = subparsers.add_parser('normalize', help="Enforce minimum and maximum durations, gaps and reading speed", epilog=self.NORMALIZE_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
+        normalize_parser.add_argument('--min-duration', action='store', type=self.parse_time, dest='min_duration', help=self.DURATION_HELP)
+        normalize_parser.add_argument('--max-duration', action='store', type=self.parse_time, dest='max_duration', help=self.DURATION_HELP)
+        normalize_parser.add_argument('--min-gap', action='store', type=self.parse_time, dest='min_gap', help=self.DURATION_HELP)
+        normalize_parser.add_argument('--max-cps', action='store', type=float, dest='max_cps', help="Maximum reading speed, in characters per second")
+        normalize_parser.set_defaults(action=self.normalize)
+
+        # The last file is taken by the global `file` argument, see process_files
+        check_parser = subparsers.add_parser('check', help="Look for problems in many files", epilog=self.CHECK_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
+        check_parser.add_argument('files', action='store', nargs='*', metavar='file')
+        check_parser.add_argument('--max-cps', action='store', type=float, default=DEFAULT_MAX_CPS, dest='max_cps', help=self.MAX_CPS_HELP)
+        check_parser.add_argument('--samples', action='store', type=int, default=DEFAULT_SAMPLES, help=self.SAMPLES_HELP)
+        check_parser.set_defaults(action=self.check, many_files=True)
+
+        stats_parser = subparsers.add_parser('stats', help="Compute statistics of many files", epilog=self.STATS_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
+        stats_parser.add_argument('files', action='store', nargs='*', metavar='file')
+        stats_parser.set_defaults(action=self.stats, many_files=True)
+
+        index_parser = subparsers.add_parser('index', help="Index many files for fast access to time ranges", epilog=self.INDEX_EPILOG, formatter_class=argparse.RawTextHelpFormatter)
+        index_parser.add_argument('files', action='store', nargs='*', metavar='file')
+        index_parser.add_argument('--block-size', action='store', type=int, default=DEFAULT_BLOCK_SIZE, dest='block_size', help=self.BLOCK_SIZE_HELP)
+        index_parser.set_defaults(action=self.index, many_files=True)
+
+        for many_files_parser in (check_parser, stats_parser, index_parser):
+            many_files_parser.add_argument('-j', '--jobs', action='store', type=int, help=self.JOBS_HELP)
+            many_files_parser.add_argument('--format', action='store', choices=('jsonl', 'json'), default='jsonl', help=self.FORMAT_HELP)
+
         parser.add_argument('file', action='store')
 
         return parser
 
     def run(self, args):
-        self.arguments = self.build_parser().parse_args(args)
+        self.parser = self.build_parser()
+        self.arguments = self.parser.parse_args(args)
+
+        if getattr(self.arguments, 'many_files', False):
+            # Missing or unreadable files are part of the reports
+            return self.arguments.action()
 
         if os.path.isfile(self.arguments.file):
             if self.arguments.in_place:
                 self.create_backup()
-            self.arguments.action()
+            try:
+                self.arguments.action()
+            except BaseException:
+                self.close_output(commit=False)
+                raise
+            self.close_output()
 
         else:
             print('No such file', self.arguments.file)
@@ -150,6 +292,25 @@ class SubRipShifter(object):
                         in self.RE_TIME_STRING.findall(time_string))
         return -ordinal if negative else ordinal
 
+    def parse_frame_rate(self, frame_rate_string):
+        try:
+            return frame_rate(frame_rate_string)
+        except (ValueError, ZeroDivisionError):
+            raise argparse.ArgumentTypeError('invalid frame rate: %r' % frame_rate_string)
+
+    def parse_anchor(self, anchor_string):
+        source, separator, target = anchor_string.partition('=')
+        if not (source and separator and target):
+            raise argparse.ArgumentTypeError('invalid anchor: %r' % anchor_string)
+        return self.parse_time(source), self.parse_time(target)
+
+    def parse_size(self, size_string):
+        match = self.RE_SIZE_STRING.match(size_string)
+        if not match:
+            raise argparse.ArgumentTypeError('invalid size: %r' % size_string)
+        value, unit = match.groups()
+        return int(value) * self.SIZE_RATIOS[unit.lower()]
+
     def parse_encoding(self, encoding_name):
         try:
             codecs.lookup(encoding_name)
@@ -167,26 +328,115 @@ class SubRipShifter(object):
         self.input_file.write_into(self.output_file)
 
     def split(self):
-        limits = [0] + self.arguments.limits + [self.input_file[-1].end.ordinal + 1]
+        if self.arguments.count:
+            parts = self.input_file.partition_by_count(self.arguments.count)
+        elif self.arguments.size:
+            parts = self.input_file.partition_by_size(self.arguments.size,
+                encoding=self.output_encoding)
+        elif self.arguments.limits:
+            parts = self.input_file.partition(self.arguments.limits)
+        else:
+            self.parser.error('split needs either limits, --count or --size')
+
         base_name, extension = os.path.splitext(self.arguments.file)
-        for index, (start, end) in enumerate(zip(limits[:-1], limits[1:])):
+        encoding = self.output_encoding
+
+        def save_part(numbered_part):
+            index, part_file = numbered_part
             file_name = '%s.%s%s' % (base_name, index + 1, extension)
-            part_file = self.input_file.slice(ends_after=start, starts_before=end)
-            part_file.shift(milliseconds=-start)
-            part_file.clean_indexes()
-            part_file.save(path=file_name, encoding=self.output_encoding)
+            part_file.save(path=file_name, encoding=encoding)
+
+        if not parts:
+            return
+        pool = ThreadPool(min(len(parts), self.SPLIT_WRITERS))
+        try:
+            pool.map(save_part, enumerate(parts))
+        finally:
+            pool.close()
+            pool.join()
 
     def create_backup(self):
         backup_file = self.arguments.file + self.BACKUP_EXTENSION
         if not os.path.exists(backup_file):
-            shutil.copy2(self.arguments.file, backup_file)
+            # The edited file is replaced by a new one, so a second link to
+            # the original content is as good as a copy
+            try:
+                os.link(self.arguments.file, backup_file)
+            except (AttributeError, OSError):
+                # Never move the original away: if the command fails, the
+                # file must still be there
+                shutil.copy2(self.arguments.file, backup_file)
         self.output_file_path = self.arguments.file
         self.arguments.file = backup_file
 
+    def close_output(self, commit=True):
+        output_file = getattr(self, '_output_file', None)
+        if isinstance(output_file, AtomicFile):
+            if commit:
+                output_file.commit()
+            else:
+                output_file.discard()
+
+    def retime(self):
+        self.input_file.retime(self.arguments.anchors)
+        self.input_file.write_into(self.output_file)
+
+    def normalize(self):
+        self.input_file.clean_indexes()
+        self.input_file.normalize_timing(min_duration=self.arguments.min_duration,
+                                         max_duration=self.arguments.max_duration,
+                                         min_gap=self.arguments.min_gap,
+                                         max_cps=self.arguments.max_cps)
+        self.input_file.write_into(self.output_file)
+
+    def check(self):
+        worker = partial(check_path, max_cps=self.arguments.max_cps,
+                         samples=self.arguments.samples)
+        reports = self.process_files(worker)
+        return 0 if all(report['ok'] for report in reports) else 1
+
+    def stats(self):
+        self.process_files(stats_path)
+        return 0
+
+    def index(self):
+        worker = partial(index_file, block_size=self.arguments.block_size)
+        reports = self.process_files(worker)
+        return 1 if any('error' in report for report in reports) else 0
+
+    def process_files(self, worker):
+        """
+        Run `worker` on every file given, in a pool of processes, and print
+        the reports in the order of the files.
+        """
+        paths = self.arguments.files + [self.arguments.file]
+        jobs = min(self.arguments.jobs or cpu_count(), len(paths))
+        if jobs > 1:
+            pool = Pool(jobs)
+            reports = pool.imap(worker, paths)
+        else:
+            pool = None
+            reports = (worker(path) for path in paths)
+        done = []
+        try:
+            for report in reports:
+                done.append(report)
+                if self.arguments.format == 'jsonl':
+                    print(json.dumps(report, sort_keys=True))
+                    sys.stdout.flush()
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        if self.arguments.format == 'json':
+            print(json.dumps(done, sort_keys=True, indent=2))
+        return done
+
     def break_lines(self):
-        split_re = re.compile(r'(.{,%i})(?:\s+|$)' % self.arguments.length)
-        for item in self.input_file:
-            item.text = '\n'.join(split_re.split(item.text)[1::2])
+        self.input_file.wrap(self.arguments.length,
+                             max_lines=self.arguments.lines,
+                             balanced=self.arguments.balanced,
+                             reflow=self.arguments.reflow)
         self.input_file.write_into(self.output_file)
 
     @property
@@ -196,7 +446,7 @@ class SubRipShifter(object):
     @property
     def input_file(self):
         if not hasattr(self, '_source_file'):
-            with open(self.arguments.file, 'rb') as f:
+            with _open_binary(self.arguments.file) as f:
                 content = f.read()
                 encoding = detect(content).get('encoding')
                 encoding = self.normalize_encoding(encoding)
@@ -209,7 +459,7 @@ class SubRipShifter(object):
     def output_file(self):
         if not hasattr(self, '_output_file'):
             if self.output_file_path:
-                self._output_file = codecs.open(self.output_file_path, 'w+', encoding=self.output_encoding)
+                self._output_file = AtomicFile(self.output_file_path, encoding=self.output_encoding)
             else:
                 self._output_file = sys.stdout
         return self._output_file
@@ -219,7 +469,7 @@ class SubRipShifter(object):
 
 
 def main():
-    SubRipShifter().run(sys.argv[1:])
+    sys.exit(SubRipShifter().run(sys.argv[1:]))
 
 if __name__ == '__main__':
     main()
@@ -10,6 +10,7 @@ is_py2 = (_ver[0] == 2)
 #: Python 3.x?
 is_py3 = (_ver[0] == 3)
 
+import os
 from io import open as io_open
 
 if is_py2:
@@ -20,3 +21,6 @@ elif is_py3:
     basestring = (str, bytes)
     str = str
     open = open
+
+# os.replace is Python 3.3+, rename is atomic as well on POSIX
+replace = getattr(os, 'replace', os.rename)
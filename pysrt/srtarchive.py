@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Reading .srt files straight out of zip and tar archives
+
+Members are read in archive order without being extracted, and each one
+goes through the same encoding detection as single files, chardet
+included when it is installed, so packs of mixed encodings are fine.
+"""
+import os
+import tarfile
+import zipfile
+from collections import OrderedDict
+from multiprocessing import Pool
+
+from pysrt.srtfile import SubRipFile, _guess_encoding, _strip_bom
+
+EXTENSION = '.srt'
+
+
+def _wanted(name):
+    base_name = os.path.basename(name)
+    # Skip the ._movie.srt resource forks found in zips made on macOS
+    return name.lower().endswith(EXTENSION) and not base_name.startswith('._')
+
+
+def _members(path):
+    """
+    _members(path) -> generator of (name, content)
+
+    Raw content of every .srt member of the zip or tar archive at `path`,
+    compressed tars included.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.filename.endswith('/') and _wanted(info.filename):
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(path):
+        # A single pass over the stream, cheap on compressed tars
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and _wanted(member.name):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError('neither a zip nor a tar archive: %s' % path)
+
+
+def _lines(content, encoding):
+    # Strict decoding, like SubRipFile.open
+    encoding = encoding or _guess_encoding(content)
+    return encoding, _strip_bom(content.decode(encoding)).splitlines(True)
+
+
+def _parse(member):
+    name, content, encoding, error_handling = member
+    encoding, lines = _lines(content, encoding)
+    new_file = SubRipFile(path=name, encoding=encoding)
+    new_file.read(lines, error_handling=error_handling)
+    return name, new_file
+
+
+def open_archive(path, encoding=None, error_handling=SubRipFile.ERROR_PASS,
+                 jobs=1):
+    """
+    open_archive(path[, encoding][, error_handling][, jobs]) -> OrderedDict
+
+    Parse every .srt member of the zip or tar archive at `path` into a
+    SubRipFile, keyed by member name in archive order. The path of each
+    SubRipFile is its member name.
+
+    With `jobs` greater than 1, members are parsed by that many processes
+    while the archive is being read. The parsed files have to be sent back
+    to this process, which costs about half of parsing them, so it only
+    pays off with several cores to spare.
+
+    Raise ValueError if `path` is neither a zip nor a tar archive.
+
+    Example:
+        >>> subs = pysrt.open_archive('season1.zip', jobs=4)
+        >>> subs['S01E01.srt'].shift(seconds=2)
+    """
+    members = ((name, content, encoding, error_handling)
+               for name, content in _members(path))
+    if jobs > 1:
+        pool = Pool(jobs)
+        try:
+            return OrderedDict(pool.imap(_parse, members))
+        finally:
+            pool.close()
+            pool.join()
+    return OrderedDict(map(_parse, members))
+
+
+def stream_archive(path, encoding=None, error_handling=SubRipFile.ERROR_PASS):
+    """
+    stream_archive(path[, encoding][, error_handling])
+
+    Yield (member name, SubRipItem) pairs for every item of every .srt
+    member of the zip or tar archive at `path`, holding a single member in
+    memory at a time.
+
+    Example:
+        >>> for name, sub in pysrt.stream_archive('pack.tar.gz'):
+        ...     print(name, sub.text)
+    """
+    for name, content in _members(path):
+        _, lines = _lines(content, encoding)
+        for item in SubRipFile.stream(lines, error_handling=error_handling):
+            yield name, item
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Quality checks and statistics over .srt files
+
+Files are scanned block by block into plain tuples instead of SubRipItem
+instances, which keeps corpus-wide runs cheap.
+"""
+import re
+from bisect import bisect_right
+from itertools import chain
+
+from pysrt.srtexc import InvalidItem, InvalidTimeString
+from pysrt.srtfile import _open_binary, _guess_encoding, _strip_bom
+from pysrt.srtitem import SubRipItem
+from pysrt.srttext import RE_TAG
+from pysrt.srttime import SubRipTime
+
+RE_TIMESTAMP = re.compile(
+    r'^\s*(\d+):(\d+):(\d+)[,.](\d+)\s*-->\s*(\d+):(\d+):(\d+)[,.](\d+)')
+
+DEFAULT_MAX_CPS = 20.0
+DEFAULT_SAMPLES = 20
+# Upper bounds of the duration histogram buckets, in milliseconds
+DURATION_BUCKETS = (500, 1000, 2000, 4000, 7000, 10000)
+PERCENTILES = (50, 90, 95, 99)
+
+CHECKS = ('parse', 'overlap', 'zero_duration', 'negative_duration',
+          'cps', 'index')
+
+
+class Cue(tuple):
+    """
+    Lightweight parsed subtitle:
+    (line number, index, start ordinal, end ordinal, characters, lines)
+    """
+    __slots__ = ()
+
+
+def _ordinal(hours, minutes, seconds, milliseconds):
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 \
+        + int(milliseconds)
+
+
+def _parse_timestamps(line):
+    match = RE_TIMESTAMP.match(line)
+    if match:
+        parts = match.groups()
+        return _ordinal(*parts[:4]), _ordinal(*parts[4:])
+    # Fall back on SubRipTime's lenient parsing
+    start, end, _ = SubRipItem.split_timestamps(line)
+    return (SubRipTime.from_string(start).ordinal,
+            SubRipTime.from_string(end).ordinal)
+
+
+def scan(lines):
+    """
+    scan(lines) -> generator of Cue or (line number, error message)
+
+    `lines` -> Any iterable of unicode strings, like SubRipFile.stream
+    """
+    block = []
+    block_start = 0
+    for number, line in enumerate(chain(lines, '\n'), 1):
+        if line.strip():
+            if not block:
+                block_start = number
+            block.append(line)
+            continue
+        if not block:
+            continue
+        source, block = block, []
+        index = None
+        if '-->' not in source[0]:
+            index = source.pop(0).strip()
+        if not source or '-->' not in source[0]:
+            yield block_start, 'missing timestamps'
+            continue
+        try:
+            start, end = _parse_timestamps(source[0])
+        except (InvalidItem, InvalidTimeString, ValueError):
+            yield block_start, 'invalid timestamps: %s' % source[0].strip()
+            continue
+        text_lines = [RE_TAG.sub('', l.rstrip('\r\n')) for l in source[1:]]
+        yield Cue((block_start, index, start, end,
+                   sum(len(l) for l in text_lines), len(text_lines)))
+
+
+def _scan_path(path, encoding=None):
+    # Read each file once, encoding detection included
+    with _open_binary(path) as source_file:
+        content = source_file.read()
+    encoding = encoding or _guess_encoding(content)
+    text = _strip_bom(content.decode(encoding))
+    return encoding, list(scan(text.splitlines(True)))
+
+
+def check(cues, max_cps=DEFAULT_MAX_CPS, samples=DEFAULT_SAMPLES):
+    """
+    check(cues[, max_cps][, samples]) -> dict
+
+    Look for problems in the output of scan(). Return a count per problem
+    kind (see CHECKS) and up to `samples` examples of each.
+    """
+    counts = dict((name, 0) for name in CHECKS)
+    examples = dict((name, []) for name in CHECKS)
+
+    def report(name, **details):
+        counts[name] += 1
+        if len(examples[name]) < samples:
+            examples[name].append(details)
+
+    previous_index = None
+    # Latest end seen so far and the line of the cue it belongs to
+    latest_end = latest_line = None
+    total = 0
+    for cue in cues:
+        if not isinstance(cue, Cue):
+            report('parse', line=cue[0], error=cue[1])
+            continue
+        total += 1
+        line, index, start, end, characters, _ = cue
+        duration = end - start
+        if duration < 0:
+            report('negative_duration', line=line, duration=duration)
+        elif duration == 0:
+            report('zero_duration', line=line)
+        elif characters * 1000.0 / duration > max_cps:
+            report('cps', line=line,
+                   cps=round(characters * 1000.0 / duration, 2))
+        if latest_end is not None and start < latest_end:
+            report('overlap', line=line, overlaps_line=latest_line,
+                   overlap=latest_end - start)
+        if latest_end is None or end > latest_end:
+            latest_end, latest_line = end, line
+        try:
+            index = int(index) if index is not None else None
+        except ValueError:
+            report('index', line=line, index=index)
+            index = None
+        else:
+            if index is not None and previous_index is not None and \
+                    index != previous_index + 1:
+                report('index', line=line, index=index,
+                       expected=previous_index + 1)
+        previous_index = index
+    return {
+        'cues': total,
+        'ok': not any(counts.values()),
+        'counts': counts,
+        'examples': dict((k, v) for k, v in examples.items() if v),
+    }
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * percent / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = rank - lower
+    return sorted_values[lower] + \
+        (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def stats(cues):
+    """
+    stats(cues) -> dict
+
+    Cue count, total and per-cue duration figures, a duration histogram and
+    CPS percentiles computed from the output of scan().
+    """
+    durations = []
+    speeds = []
+    errors = 0
+    lines = {}
+    for cue in cues:
+        if not isinstance(cue, Cue):
+            errors += 1
+            continue
+        _, _, start, end, characters, line_count = cue
+        duration = end - start
+        durations.append(duration)
+        if duration > 0:
+            speeds.append(characters * 1000.0 / duration)
+        lines[line_count] = lines.get(line_count, 0) + 1
+
+    histogram = [0] * (len(DURATION_BUCKETS) + 1)
+    for duration in durations:
+        histogram[bisect_right(DURATION_BUCKETS, duration)] += 1
+    labels = ['<%d' % DURATION_BUCKETS[0]] + \
+        ['%d-%d' % bounds for bounds in zip(DURATION_BUCKETS[:-1],
+                                            DURATION_BUCKETS[1:])] + \
+        ['>=%d' % DURATION_BUCKETS[-1]]
+    speeds.sort()
+    ordered_durations = sorted(durations)
+    return {
+        'cues': len(durations),
+        'parse_errors': errors,
+        'duration': {
+            'total': sum(durations),
+            'min': ordered_durations[0] if durations else None,
+            'median': _percentile(ordered_durations, 50),
+            'max': ordered_durations[-1] if durations else None,
+            'histogram': [list(bucket) for bucket in zip(labels, histogram)],
+        },
+        'cps': dict([('p%d' % p, _round(_percentile(speeds, p)))
+                     for p in PERCENTILES] +
+                    [('max', _round(speeds[-1] if speeds else None))]),
+        'lines': dict((str(k), v) for k, v in sorted(lines.items())),
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def check_path(path, encoding=None, max_cps=DEFAULT_MAX_CPS,
+               samples=DEFAULT_SAMPLES):
+    """
+    check_path(path[, encoding][, max_cps][, samples]) -> dict
+
+    check() the file at `path`. Unreadable files are reported as such
+    rather than raising.
+    """
+    try:
+        encoding, cues = _scan_path(path, encoding)
+    except (IOError, OSError, UnicodeDecodeError, LookupError) as error:
+        return {'file': path, 'ok': False, 'error': _describe(error)}
+    report = {'file': path, 'encoding': encoding}
+    report.update(check(cues, max_cps=max_cps, samples=samples))
+    return report
+
+
+def stats_path(path, encoding=None):
+    """
+    stats_path(path[, encoding]) -> dict
+
+    stats() of the file at `path`.
+    """
+    try:
+        encoding, cues = _scan_path(path, encoding)
+    except (IOError, OSError, UnicodeDecodeError, LookupError) as error:
+        return {'file': path, 'error': _describe(error)}
+    report = {'file': path, 'encoding': encoding}
+    report.update(stats(cues))
+    return report
+
+
+def _describe(error):
+    return '%s: %s' % (type(error).__name__, error)
@@ -1,27 +1,299 @@
 # -*- coding: utf-8 -*-
+import io
 import os
 import sys
+import bz2
+import gzip
+import stat
 import codecs
+import tempfile
 
 try:
     from collections import UserList
 except ImportError:
     from UserList import UserList
 
-from itertools import chain
+try:
+    import lzma
+except ImportError:  # Python 2
+    lzma = None
+
+from array import array
+from collections import namedtuple
+from itertools import chain, groupby
 from copy import copy
+from bisect import bisect_left, bisect_right
+from operator import attrgetter, is_
+from heapq import heappush, heappop
 
 from pysrt.srtexc import Error
 from pysrt.srtitem import SubRipItem
-from pysrt.compat import str
+from pysrt.srttime import SubRipTime
+from pysrt.srttext import LineWrapper
+from pysrt.srttiming import normalize_timing, resegment, map_ordinals, \
+    estimate_alignment, to_frames, from_frames
+from pysrt.srtindex import SubRipIndex, DEFAULT_BLOCK_SIZE, index_path, \
+    item_offsets
+from pysrt.compat import str, basestring, replace
 
 BOMS = ((codecs.BOM_UTF32_LE, 'utf_32_le'),
         (codecs.BOM_UTF32_BE, 'utf_32_be'),
         (codecs.BOM_UTF16_LE, 'utf_16_le'),
         (codecs.BOM_UTF16_BE, 'utf_16_be'),
         (codecs.BOM_UTF8, 'utf_8'))
+Metrics = namedtuple('Metrics', ('duration', 'characters_per_second',
+                                 'line_count', 'max_line_width'))
+# Items of a snapshot chunk, and their states at the time
+Chunk = namedtuple('Chunk', ('items', 'states'))
+_cached_state = attrgetter('_state')
+
 CODECS_BOMS = dict((codec, str(bom, codec)) for bom, codec in BOMS)
 BIGGER_BOM = max(len(bom) for bom, encoding in BOMS)
+UNICODE_BOM = CODECS_BOMS['utf_8']
+
+class _BZ2Writer(io.RawIOBase):
+    """
+    _BZ2Writer(file object[, owned])
+
+    Write-only bzip2 stream into a binary file, usable with io buffering
+    and file objects on Python 2 too, unlike BZ2File. The file is closed
+    along with the stream if `owned`, left open otherwise.
+    """
+
+    def __init__(self, target, owned=False):
+        self._target = target
+        self._owned = owned
+        self._compressor = bz2.BZ2Compressor()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = memoryview(data).tobytes()
+        self._target.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._target.write(self._compressor.flush())
+            if self._owned:
+                self._target.close()
+        io.RawIOBase.close(self)
+
+
+def _open_gzip(target, mode):
+    if isinstance(target, basestring):
+        return gzip.GzipFile(target, mode)
+    return gzip.GzipFile(fileobj=target, mode=mode)
+
+
+def _open_bz2(target, mode):
+    if 'r' in mode:
+        return bz2.BZ2File(target, mode)
+    if isinstance(target, basestring):
+        return _BZ2Writer(open(target, mode), owned=True)
+    return _BZ2Writer(target)
+
+
+# Extension, magic bytes and opener of the supported compression formats
+COMPRESSIONS = [('.gz', b'\x1f\x8b', _open_gzip),
+                ('.bz2', b'BZh', _open_bz2)]
+if lzma is not None:
+    COMPRESSIONS.append(('.xz', b'\xfd7zXZ\x00', lzma.LZMAFile))
+BIGGER_MAGIC = max(len(magic) for _, magic, _ in COMPRESSIONS)
+# Compressors are costly to call, so feed them large chunks
+COMPRESSION_BUFFER_SIZE = 64 * 1024
+
+
+class AtomicFile(object):
+    """
+    AtomicFile(path, encoding)
+
+    Text file replacing `path` all at once.
+
+    Written data goes to a temporary file in the same directory, which is
+    flushed to disk and renamed over `path` on commit(). Until then, and if
+    discard() is called instead, `path` is left untouched. Used as a context
+    manager it commits on success and discards on error.
+    """
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        prefix = '.%s.' % os.path.basename(path)
+        descriptor, self.temp_path = tempfile.mkstemp(prefix=prefix,
+                                                      suffix='.tmp',
+                                                      dir=directory)
+        try:
+            self._binary_file = os.fdopen(descriptor, 'wb')
+            compression = _compression(path, 'wb')
+            self._stream = self._binary_file
+            if compression is not None:
+                self._stream = _compressed(compression, self._binary_file,
+                                           'wb')
+            self._file = codecs.getwriter(encoding)(self._stream)
+        except BaseException:
+            # Closing the file object, if any, closes the descriptor
+            binary_file = getattr(self, '_binary_file', None)
+            if binary_file is not None:
+                binary_file.close()
+            else:
+                os.close(descriptor)
+            os.remove(self.temp_path)
+            raise
+        self.closed = False
+
+    def write(self, data):
+        self._file.write(data)
+
+    def commit(self):
+        if self.closed:
+            return
+        self._file.flush()
+        if self._stream is not self._binary_file:
+            self._stream.close()  # Writes the end of the compressed data
+        self._binary_file.flush()
+        os.fsync(self._binary_file.fileno())
+        self._close()
+        os.chmod(self.temp_path, self._target_mode())
+        replace(self.temp_path, self.path)
+
+    def discard(self):
+        if self.closed:
+            return
+        self._close()
+        os.remove(self.temp_path)
+
+    def _close(self):
+        self._stream.close()
+        self._binary_file.close()
+        self.closed = True
+
+    def _target_mode(self):
+        # mkstemp creates files readable by their owner only
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+def _compression(path, mode='rb'):
+    """
+    Opener of the compression format of `path`, recognised by its first
+    bytes when reading and by its extension when writing. None for plain
+    files.
+    """
+    if 'r' in mode:
+        with open(path, 'rb') as source_file:
+            head = source_file.read(BIGGER_MAGIC)
+        for extension, magic, opener in COMPRESSIONS:
+            if head.startswith(magic):
+                return opener
+    else:
+        for extension, magic, opener in COMPRESSIONS:
+            if path.lower().endswith(extension):
+                return opener
+    return None
+
+
+def _open_binary(path, mode='rb'):
+    """
+    Open `path` in binary `mode`, decompressing or compressing on the fly
+    gzip, bzip2 and xz files. See _compression.
+    """
+    opener = _compression(path, mode)
+    if opener is None:
+        return open(path, mode)
+    return _compressed(opener, path, mode)
+
+
+def _compressed(opener, target, mode):
+    stream = opener(target, mode)
+    if 'w' in mode:
+        stream = io.BufferedWriter(stream, COMPRESSION_BUFFER_SIZE)
+    return stream
+
+
+def _sniff_bom(head):
+    """Encoding announced by the BOM at the start of `head`, if any"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+
+def _guess_encoding(content):
+    """
+    Encoding of `content` bytes: the one announced by its BOM if any, else
+    utf-8 if it decodes as such, else chardet's guess if it is installed.
+    """
+    encoding = _sniff_bom(content)
+    if encoding:
+        return encoding
+    try:
+        content.decode(SubRipFile.DEFAULT_ENCODING)
+        return SubRipFile.DEFAULT_ENCODING
+    except UnicodeDecodeError:
+        pass
+    try:
+        from chardet import detect
+    except ImportError:
+        return SubRipFile.DEFAULT_ENCODING
+    return detect(content).get('encoding') or SubRipFile.DEFAULT_ENCODING
+
+
+def _strip_bom(text):
+    # Whatever the encoding, a decoded BOM is U+FEFF
+    if text.startswith(UNICODE_BOM):
+        return text[len(UNICODE_BOM):]
+    return text
+
+
+def _bom_length(path, encoding):
+    try:
+        bom = UNICODE_BOM.encode(encoding)
+    except UnicodeError:
+        return 0
+    with _open_binary(path) as source_file:
+        return len(bom) if source_file.read(len(bom)) == bom else 0
+
+
+def _write_items(items, output_file, output_eol):
+    # Text streams like io.StringIO refuse byte strings on Python 2
+    output_eol = str(output_eol)
+    for item in items:
+        string_repr = str(item)
+        if output_eol != '\n':
+            string_repr = string_repr.replace('\n', output_eol)
+        output_file.write(string_repr)
+        # Only add trailing eol if it's not already present.
+        # It was kept in the SubRipItem's text before but it really
+        # belongs here. Existing applications might give us subtitles
+        # which already contain a trailing eol though.
+        if not string_repr.endswith(2 * output_eol):
+            output_file.write(output_eol)
+
+
+def _save_items(items, path, encoding, eol, atomic):
+    if atomic:
+        with AtomicFile(path, encoding=encoding) as save_file:
+            _write_items(items, save_file, eol)
+        return
+
+    save_file = codecs.getwriter(encoding)(_open_binary(path, 'wb'))
+    _write_items(items, save_file, eol)
+    save_file.close()
 
 
 class SubRipFile(UserList, object):
@@ -45,6 +317,9 @@ class SubRipFile(UserList, object):
 
     DEFAULT_ENCODING = 'utf_8'
 
+    # Read position of a file opened with follow()
+    _tail = None
+
     def __init__(self, items=None, eol=None, path=None, encoding='utf-8'):
         UserList.__init__(self, items or [])
         self._eol = eol
@@ -92,6 +367,105 @@ class SubRipFile(UserList, object):
         clone.data = list(clone.data)
         return clone
 
+    def view(self, start=None, end=None):
+        """
+        view([start][, end]) -> SubRipFileView
+
+        Items starting at or after `start` and before `end`, both optional
+        and coercible to SubRipTime. Items must be sorted, see
+        clean_indexes. The range is found by binary search and no item nor
+        list is copied: shifting the view shifts the items of this file.
+
+        Example:
+            >>> subs.view({'minutes': 10}, {'minutes': 20}).shift(seconds=2)
+            >>> subs.view(end={'minutes': 48}).save('first_part.srt')
+        """
+        starts = _StartOrdinals(self.data)
+        first = 0
+        last = len(self.data)
+        if start is not None:
+            first = bisect_left(starts, SubRipTime.coerce(start).ordinal)
+        if end is not None:
+            last = bisect_left(starts, SubRipTime.coerce(end).ordinal)
+        return SubRipFileView(self, first, max(first, last))
+
+    def partition(self, limits):
+        """
+        partition(limits) -> list of SubRipFile
+
+        `limits` is a sequence of timestamps coercible to SubRipTime object.
+
+        Split the file at each limit in a single pass over the sorted
+        subtitles. Part N holds the subtitles visible between limits[N - 1]
+        and limits[N], shifted so that the part starts at zero and indexed
+        from 1. A subtitle straddling a limit goes to both parts.
+
+        Unlike slice, the parts contain copies of the original subtitles.
+
+        Example:
+            >>> first, second = subs.partition([{'minutes': 48, 'seconds': 18}])
+        """
+        bounds = sorted(SubRipTime.coerce(limit).ordinal for limit in limits)
+        offsets = [0] + bounds
+        parts = [[] for _ in offsets]
+        for item in sorted(self.data, key=self.sort_key):
+            start, end = item.start.ordinal, item.end.ordinal
+            first = bisect_right(bounds, start)
+            last = max(first, bisect_left(bounds, end))
+            for part in range(first, last + 1):
+                items = parts[part]
+                offset = offsets[part]
+                items.append(SubRipItem(len(items) + 1, start - offset,
+                                        end - offset, item.text,
+                                        item.position))
+        return [self._derive(items) for items in parts]
+
+    def partition_by_count(self, count):
+        """
+        partition_by_count(count) -> list of SubRipFile
+
+        Split the file in parts of at most `count` subtitles. Timings are left
+        untouched and each part is indexed from 1.
+        """
+        if count < 1:
+            raise ValueError('count must be a positive integer')
+        return [self._derive(self._reindexed(self.data[i:i + count]))
+                for i in range(0, len(self.data), count)]
+
+    def partition_by_size(self, size, encoding=None, eol=None):
+        """
+        partition_by_size(size[, encoding][, eol]) -> list of SubRipFile
+
+        Split the file in parts weighing at most `size` bytes once saved
+        with `encoding` and `eol` (default to the file's own). A subtitle
+        bigger than `size` gets a part of its own. Timings are left untouched
+        and each part is indexed from 1.
+        """
+        encoder = codecs.getincrementalencoder(encoding or self.encoding)()
+        output_eol = eol or self.eol
+        parts = []
+        items, weight = [], 0
+        for item in self.data:
+            string_repr = str(item).replace('\n', output_eol) + output_eol
+            item_weight = len(encoder.encode(string_repr))
+            if items and weight + item_weight > size:
+                parts.append(items)
+                items, weight = [], 0
+            items.append(item)
+            weight += item_weight
+        if items:
+            parts.append(items)
+        return [self._derive(self._reindexed(items)) for items in parts]
+
+    def _derive(self, items):
+        return self.__class__(items, eol=self._eol, encoding=self.encoding)
+
+    @staticmethod
+    def _reindexed(items):
+        return [SubRipItem(index + 1, item.start.ordinal, item.end.ordinal,
+                           item.text, item.position)
+                for index, item in enumerate(items)]
+
     def at(self, timestamp=None, **kwargs):
         """
         at(timestamp) -> SubRipFile clone
@@ -125,6 +499,30 @@ class SubRipFile(UserList, object):
         for item in self:
             item.shift(*args, **kwargs)
 
+    def wrap(self, max_width, max_lines=None, balanced=False, reflow=False):
+        """
+        wrap(max_width[, max_lines][, balanced][, reflow])
+
+        Break the text of each item so that lines are at most `max_width`
+        columns wide. See SubRipItem.wrap.
+
+        Example:
+            >>> subs.wrap(42, max_lines=2, balanced=True)
+        """
+        wrapper = LineWrapper.get(max_width, max_lines, balanced, reflow)
+        for item in self:
+            item.text = wrapper.wrap(item.text)
+
+    @staticmethod
+    def sort_key(item):
+        """
+        sort_key(item) -> tuple
+
+        Chronological order of items: by start, then by end. Same order as
+        comparing the items themselves, only faster.
+        """
+        return item.start.ordinal, item.end.ordinal
+
     def clean_indexes(self):
         """
         clean_indexes()
@@ -132,28 +530,484 @@ class SubRipFile(UserList, object):
         Sort subs and reset their index attribute. Should be called after
         destructive operations like split or such.
         """
-        self.sort()
+        self.sort(key=self.sort_key)
         for index, item in enumerate(self):
             item.index = index + 1
 
+    def find_overlaps(self, groups=False):
+        """
+        find_overlaps([groups]) -> list of tuples of SubRipItem
+
+        Return every pair of items displayed at the same time, the earliest
+        starting first. With `groups`, return instead the sets of items
+        overlapping each other directly or through other items, in
+        chronological order. Items merely touching (one ending when the
+        other starts) do not overlap.
+
+        Example:
+            >>> for first, second in subs.find_overlaps():
+            ...     print(first.index, second.index)
+        """
+        if groups:
+            return [tuple(group) for group in self._overlap_groups()
+                    if len(group) > 1]
+        pairs = []
+        # Items still displayed, as (end, order, item)
+        active = []
+        for order, item in enumerate(sorted(self.data, key=self.sort_key)):
+            start = item.start.ordinal
+            while active and active[0][0] <= start:
+                heappop(active)
+            for _, _, other in sorted(active, key=lambda entry: entry[1]):
+                pairs.append((other, item))
+            heappush(active, (item.end.ordinal, order, item))
+        return pairs
+
+    def _overlap_groups(self):
+        group = []
+        group_end = None
+        for item in sorted(self.data, key=self.sort_key):
+            if group and item.start.ordinal >= group_end:
+                yield group
+                group = []
+            if not group or item.end.ordinal > group_end:
+                group_end = item.end.ordinal
+            group.append(item)
+        if group:
+            yield group
+
+    OVERLAP_STRATEGIES = ('trim', 'merge', 'stack')
+
+    def fix_overlaps(self, strategy='trim'):
+        """
+        fix_overlaps([strategy])
+
+        Repair overlapping items in place, then sort and reindex them like
+        clean_indexes().
+
+        strategy -> 'trim': end each item when the next one starts. Items
+                        starting together are merged, trimming would leave
+                        all but one of them empty.
+                    'merge': turn each group of overlapping items into one
+                        item showing their texts one below the other.
+                    'stack': cut each group at every start and end, each piece
+                        showing the texts of all the items displayed then.
+
+        Example:
+            >>> subs.fix_overlaps('stack')
+        """
+        if strategy not in self.OVERLAP_STRATEGIES:
+            raise ValueError('unknown strategy %r, expected one of %s' %
+                             (strategy, ', '.join(self.OVERLAP_STRATEGIES)))
+        items = []
+        for group in self._overlap_groups():
+            if len(group) == 1:
+                items.extend(group)
+            elif strategy == 'trim':
+                group = list(self._merged_starts(group))
+                for item, following in zip(group, group[1:]):
+                    if item.end.ordinal > following.start.ordinal:
+                        item.end = SubRipTime.from_ordinal(
+                            following.start.ordinal)
+                items.extend(group)
+            elif strategy == 'merge':
+                end = max(item.end.ordinal for item in group)
+                items.append(SubRipItem(0, group[0].start.ordinal, end,
+                                        '\n'.join(item.text for item in group),
+                                        group[0].position))
+            else:
+                items.extend(self._stacked(group))
+        self.data[:] = items
+        for index, item in enumerate(self.data):
+            item.index = index + 1
+
+    def normalize_timing(self, min_duration=None, max_duration=None,
+                         min_gap=None, max_cps=None):
+        """
+        normalize_timing([min_duration][, max_duration][, min_gap][, max_cps])
+
+        Enforce timing constraints on every item in a single pass over the
+        items, which must be sorted (see clean_indexes). Durations are
+        SubRipTime or coercible, int being milliseconds. See
+        pysrt.srttiming.normalize_timing for details, and for a version
+        working on streams.
+
+        Example:
+            >>> subs.normalize_timing(min_duration=1000, min_gap=80, max_cps=17)
+        """
+        for _ in normalize_timing(self.data, min_duration, max_duration,
+                                  min_gap, max_cps):
+            pass
+
+    def resegment(self, target_cps=None, max_chars=None, max_duration=None,
+                  max_gap=500, min_duration=1000):
+        """
+        resegment([target_cps][, max_chars][, max_duration][, max_gap]
+                  [, min_duration])
+
+        Merge short adjacent items and split long ones between words, in a
+        single pass over the items, which must be sorted (see clean_indexes).
+        Items are renumbered. See pysrt.srttiming.resegment for details, and
+        for a version working on streams.
+
+        Example:
+            >>> subs.resegment(target_cps=17, max_chars=84, max_duration=7000)
+            >>> subs.wrap(42, max_lines=2, balanced=True)
+        """
+        self.data[:] = resegment(self.data, target_cps, max_chars,
+                                 max_duration, max_gap, min_duration)
+
+    def retime(self, anchors):
+        """
+        retime(anchors)
+
+        Move every start and end along the piecewise-linear map defined by
+        `anchors`, a list of (source, target) pairs of SubRipTime or
+        coercible. Useful when subtitles drift in a different way on each
+        part of a video, after an edit for example. See
+        pysrt.srttiming.map_ordinals.
+
+        Example:
+            >>> subs.retime([((0, 10, 0, 0), (0, 10, 0, 0)),
+            ...              ((0, 30, 0, 0), (0, 28, 30, 0))])
+        """
+        ordinals = map_ordinals(self._timings(), anchors)
+        for index, item in enumerate(self):
+            item.start = SubRipTime.from_ordinal(ordinals[2 * index])
+            item.end = SubRipTime.from_ordinal(ordinals[2 * index + 1])
+
+    def to_frames(self, fps):
+        """
+        to_frames(fps) -> (array, array)
+
+        Frame numbers of the starts and of the ends of all items, in item
+        order. `fps` is an exact frame rate like 25, '24000/1001' or a
+        Fraction; see pysrt.srttiming.frame_rate.
+
+        Example:
+            >>> starts, ends = subs.to_frames('24000/1001')
+        """
+        frames = to_frames(self._timings(), fps)
+        return frames[::2], frames[1::2]
+
+    def from_frames(self, frames, fps):
+        """
+        from_frames(frames, fps)
+
+        Set the starts and ends of all items from `frames`, a pair of
+        sequences of frame numbers like the one returned by to_frames.
+        """
+        starts, ends = frames
+        if not len(starts) == len(ends) == len(self):
+            raise ValueError('expected %d starts and ends' % len(self))
+        for item, start, end in zip(self, from_frames(starts, fps),
+                                    from_frames(ends, fps)):
+            item.start = SubRipTime.from_ordinal(start)
+            item.end = SubRipTime.from_ordinal(end)
+
+    def snap_to_frames(self, fps):
+        """
+        snap_to_frames(fps)
+
+        Move every start and end to the start of the nearest frame.
+
+        Example:
+            >>> subs.snap_to_frames(25)
+        """
+        self.from_frames(self.to_frames(fps), fps)
+
+    def estimate_alignment(self, reference, **kwargs):
+        """
+        estimate_alignment(reference[, resolution][, tolerance][, ratios]) \
+-> dict
+
+        Estimate the offset and the drift between these subtitles and the
+        `reference` SubRipFile, another track of the same video for example.
+        Return a correction to pass to shift. Requires numpy. See
+        pysrt.srttiming.estimate_alignment for the optional arguments.
+
+        Example:
+            >>> subs.shift(**subs.estimate_alignment(reference))
+        """
+        return estimate_alignment(self._timings(), reference._timings(),
+                                  **kwargs)
+
+    def _timings(self):
+        timings = array('l')
+        for item in self:
+            timings.append(item.start.ordinal)
+            timings.append(item.end.ordinal)
+        return timings
+
+    @staticmethod
+    def _merged_starts(group):
+        for start, shown in groupby(group, lambda item: item.start.ordinal):
+            shown = list(shown)
+            if len(shown) == 1:
+                yield shown[0]
+                continue
+            end = max(item.end.ordinal for item in shown)
+            yield SubRipItem(0, start, end,
+                             '\n'.join(item.text for item in shown),
+                             shown[0].position)
+
+    @staticmethod
+    def _stacked(group):
+        bounds = sorted(set(chain.from_iterable(
+            (item.start.ordinal, item.end.ordinal) for item in group)))
+        for start, end in zip(bounds, bounds[1:]):
+            shown = [item for item in group
+                     if item.start.ordinal <= start and
+                     item.end.ordinal >= end]
+            if shown:
+                yield SubRipItem(0, start, end,
+                                 '\n'.join(item.text for item in shown),
+                                 shown[0].position)
+
     @property
     def text(self):
         return '\n'.join(i.text for i in self)
 
+    def metrics(self):
+        """
+        metrics() -> Metrics
+
+        Compute the metrics of every item in a single pass. Return a named
+        tuple of four columns, in item order:
+
+            duration -> array of durations in milliseconds
+            characters_per_second -> array of floats
+            line_count -> array of line counts
+            max_line_width -> array of display widths of the widest lines
+
+        Each column supports the buffer protocol, so it can be handed over to
+        numpy.frombuffer without copy.
+
+        Example:
+            >>> metrics = subs.metrics()
+            >>> too_fast = [i for i, cps in enumerate(metrics.characters_per_second) if cps > 20]
+        """
+        durations = array('l')
+        speeds = array('d')
+        line_counts = array('l')
+        widths = array('l')
+        for item in self:
+            text_metrics = item._get_text_metrics()
+            duration = item.end.ordinal - item.start.ordinal
+            durations.append(duration)
+            speeds.append(text_metrics[1] / (duration / 1000.0)
+                          if duration else 0.0)
+            line_counts.append(text_metrics[2])
+            widths.append(text_metrics[3])
+        return Metrics(durations, speeds, line_counts, widths)
+
+    SNAPSHOT_CHUNK_SIZE = 256
+
+    def snapshot(self):
+        """
+        snapshot() -> SubRipSnapshot
+
+        Record the current state of every item, to get back to it later with
+        restore(). Unchanged items share their state with the previous
+        snapshot, and chunks of unchanged items are shared as a whole, so a
+        snapshot costs memory and time for the changed items only, plus a
+        quick identity check of the others.
+
+        Only changes made through the items' attributes and methods are
+        seen. A SubRipTime modified in place must be assigned again:
+            >>> item.start.seconds += 1   # not seen
+            >>> item.start += 1000        # seen
+
+        Example:
+            >>> undo = subs.snapshot()
+            >>> subs.shift(seconds=2)
+            >>> subs.restore(undo)
+        """
+        previous = getattr(self, '_last_snapshot', None)
+        previous_chunks = previous.chunks if previous is not None else ()
+        size = self.SNAPSHOT_CHUNK_SIZE
+        chunks = []
+        for number, offset in enumerate(range(0, len(self.data), size)):
+            items = self.data[offset:offset + size]
+            states = tuple(map(_cached_state, items))
+            if None in states:
+                states = tuple(item._get_state() for item in items)
+            elif number < len(previous_chunks):
+                chunk = previous_chunks[number]
+                if len(chunk.items) == len(items) and \
+                        all(map(is_, chunk.states, states)) and \
+                        all(map(is_, chunk.items, items)):
+                    chunks.append(chunk)
+                    continue
+            chunks.append(Chunk(items, states))
+        self._last_snapshot = SubRipSnapshot(tuple(chunks), self._eol,
+                                             self.path, self.encoding)
+        return self._last_snapshot
+
+    def restore(self, snapshot):
+        """
+        restore(snapshot)
+
+        Put items back in the state recorded by `snapshot`. Items unchanged
+        since are kept, the others are replaced by new items.
+        """
+        items = []
+        for chunk in snapshot.chunks:
+            if all(map(is_, map(_cached_state, chunk.items), chunk.states)):
+                items.extend(chunk.items)
+                continue
+            for item, state in zip(chunk.items, chunk.states):
+                if item._state is not state:
+                    item = SubRipItem._from_state(state)
+                items.append(item)
+        self.data = items
+        self._eol = snapshot.eol
+        self.path = snapshot.path
+        self.encoding = snapshot.encoding
+        self._last_snapshot = snapshot
+
     @classmethod
-    def open(cls, path='', encoding=None, error_handling=ERROR_PASS):
+    def open(cls, path='', encoding=None, error_handling=ERROR_PASS,
+             between=None):
         """
-        open([path, [encoding]])
+        open([path, [encoding]][, between])
 
         If you do not provide any encoding, it can be detected if the file
         contain a bit order mark, unless it is set to utf-8 as default.
+
+        With `between`, a (start, end) pair coercible to SubRipTime, only
+        the items shown during that time range are kept. If the file has an
+        up to date index, see build_index, only the part of the file holding
+        them is read.
+
+        Example:
+            >>> SubRipFile.build_index('movie.srt')
+            >>> subs = SubRipFile.open('movie.srt', between=({'minutes': 83},
+            ...                                             {'minutes': 84}))
         """
+        if between is not None:
+            return cls._open_between(path, encoding, error_handling, between)
         source_file, encoding = cls._open_unicode_file(path, claimed_encoding=encoding)
         new_file = cls(path=path, encoding=encoding)
         new_file.read(source_file, error_handling=error_handling)
         source_file.close()
         return new_file
 
+    @classmethod
+    def _open_between(cls, path, encoding, error_handling, between):
+        start, end = [SubRipTime.coerce(time).ordinal for time in between]
+        index = cls._load_index(path)
+        if index is not None and encoding and \
+                codecs.lookup(encoding).name != \
+                codecs.lookup(index.encoding).name:
+            # Offsets only hold for the encoding the index was built with
+            index = None
+        if index is None:
+            new_file = cls.open(path, encoding, error_handling)
+            items = new_file.data
+        else:
+            encoding = index.encoding
+            first, stop = index.byte_range(start, end)
+            decoder = codecs.getincrementaldecoder(encoding)()
+            with _open_binary(path) as source_file:
+                if first:
+                    # Let codecs like utf-16 read the byte order of the BOM
+                    bom = codecs.getincrementalencoder(encoding)().encode(u'')
+                    decoder.decode(source_file.read(len(bom)))
+                source_file.seek(first)
+                size = -1 if stop is None else stop - first
+                lines = decoder.decode(source_file.read(size), True)\
+                    .splitlines(True)
+            new_file = cls(path=path, encoding=encoding)
+            if lines:
+                new_file.eol = cls._guess_eol(lines)
+            items = cls.stream(lines, error_handling=error_handling)
+        new_file.data = [item for item in items
+                         if item.end.ordinal > start and item.start.ordinal < end]
+        return new_file
+
+    @classmethod
+    def build_index(cls, path, encoding=None, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        build_index(path[, encoding][, block_size]) -> SubRipIndex
+
+        Record the byte offsets of every `block_size` items of the file at
+        `path`, along with their timing, in a `path.srtidx` sidecar file.
+        open() then uses it to read time ranges without parsing the whole
+        file. The index is ignored once the file size or modification time
+        change.
+        """
+        status = os.stat(path)
+        source_file, encoding = cls._open_unicode_file(path, claimed_encoding=encoding)
+        try:
+            offset = _bom_length(path, encoding)
+            index = SubRipIndex.build(item_offsets(source_file, offset, encoding),
+                                      status, encoding, block_size)
+        finally:
+            source_file.close()
+        index.save(index_path(path))
+        return index
+
+    @classmethod
+    def _load_index(cls, path):
+        try:
+            index = SubRipIndex.load(index_path(path))
+        except (IOError, OSError, ValueError):
+            return None
+        return index if index.is_valid_for(path) else None
+
+    @classmethod
+    def follow(cls, path, encoding=None, error_handling=ERROR_PASS):
+        """
+        follow(path[, encoding][, error_handling]) -> SubRipFile
+
+        Open a file that is still being written to, like a live captioning
+        output. Call refresh() later on to read the items appended since.
+
+        An item is read once the blank line following it has been written,
+        so a half written item is never returned.
+
+        Example:
+            >>> subs = SubRipFile.follow('live.srt')
+            >>> while True:
+            ...     for item in subs.refresh():
+            ...         print(item.text)
+            ...     time.sleep(1)
+        """
+        new_file = cls(path=path, encoding=encoding or cls.DEFAULT_ENCODING)
+        new_file._tail = _Tail(path, encoding)
+        new_file.refresh(error_handling=error_handling)
+        return new_file
+
+    def refresh(self, error_handling=ERROR_PASS):
+        """
+        refresh([error_handling]) -> list of new SubRipItem
+
+        Parse the items appended to a followed file since the last call, add
+        them to the current instance and return them. Only the new bytes are
+        read, plus the end of an item that was incomplete last time.
+
+        If the file was truncated or replaced by a new one (log rotation),
+        the current items are dropped and the file is read from the start.
+        A file truncated and written again past its previous size since the
+        last call is only noticed if its first 64 bytes changed. While the
+        file is missing, nothing new is returned.
+        """
+        if self._tail is None:
+            raise ValueError('refresh() needs a file opened with follow()')
+        data, replaced = self._tail.read()
+        if replaced:
+            del self.data[:]
+        parser = self._tail.parser
+        lines = parser._complete_lines(data)
+        if parser.eol and self._eol is None:
+            self.eol = parser.eol
+        if parser.encoding:
+            self.encoding = parser.encoding
+        new_items = list(self.stream(lines, error_handling=error_handling))
+        self.extend(new_items)
+        return new_items
+
     @classmethod
     def from_string(cls, source, **kwargs):
         """
@@ -214,20 +1068,19 @@ class SubRipFile(UserList, object):
                         error.args += (''.join(source), )
                         cls._handle_error(error, error_handling, index)
 
-    def save(self, path=None, encoding=None, eol=None):
+    def save(self, path=None, encoding=None, eol=None, atomic=False):
         """
-        save([path][, encoding][, eol])
+        save([path][, encoding][, eol][, atomic])
 
         Use initial path if no other provided.
         Use initial encoding if no other provided.
         Use initial eol if no other provided.
-        """
-        path = path or self.path
-        encoding = encoding or self.encoding
 
-        save_file = codecs.open(path, 'w+', encoding=encoding)
-        self.write_into(save_file, eol=eol)
-        save_file.close()
+        With `atomic`, the file is written aside and then renamed over `path`,
+        so that a crash never leaves it half written.
+        """
+        _save_items(self, path or self.path, encoding or self.encoding,
+                    eol or self.eol, atomic)
 
     def write_into(self, output_file, eol=None):
         """
@@ -238,19 +1091,7 @@ class SubRipFile(UserList, object):
         `output_file` -> Any instance that respond to `write()`, typically a
         file object
         """
-        output_eol = eol or self.eol
-
-        for item in self:
-            string_repr = str(item)
-            if output_eol != '\n':
-                string_repr = string_repr.replace('\n', output_eol)
-            output_file.write(string_repr)
-            # Only add trailing eol if it's not already present.
-            # It was kept in the SubRipItem's text before but it really
-            # belongs here. Existing applications might give us subtitles
-            # which already contain a trailing eol though.
-            if not string_repr.endswith(2 * output_eol):
-                output_file.write(output_eol)
+        _write_items(self, output_file, eol or self.eol)
 
     @classmethod
     def _guess_eol(cls, string_iterable):
@@ -276,28 +1117,21 @@ class SubRipFile(UserList, object):
 
     @classmethod
     def _detect_encoding(cls, path):
-        file_descriptor = open(path, 'rb')
+        file_descriptor = _open_binary(path)
         first_chars = file_descriptor.read(BIGGER_BOM)
         file_descriptor.close()
 
-        for bom, encoding in BOMS:
-            if first_chars.startswith(bom):
-                return encoding
-
         # TODO: maybe a chardet integration
-        return cls.DEFAULT_ENCODING
+        return _sniff_bom(first_chars) or cls.DEFAULT_ENCODING
 
     @classmethod
     def _open_unicode_file(cls, path, claimed_encoding=None):
         encoding = claimed_encoding or cls._detect_encoding(path)
-        source_file = codecs.open(path, 'r', encoding=encoding)
+        source_file = codecs.getreader(encoding)(_open_binary(path))
 
         # get rid of BOM if any
-        possible_bom = CODECS_BOMS.get(encoding, None)
-        if possible_bom:
-            file_bom = source_file.read(len(possible_bom))
-            if not file_bom == possible_bom:
-                source_file.seek(0)  # if not rewind
+        if not source_file.read(len(UNICODE_BOM)) == UNICODE_BOM:
+            source_file.seek(0)  # if not rewind
         return source_file, encoding
 
     @classmethod
@@ -310,3 +1144,248 @@ class SubRipFile(UserList, object):
             sys.stderr.write('PySRT-%s(line %s): \n' % (name, index))
             sys.stderr.write(error.args[0].encode('ascii', 'replace'))
             sys.stderr.write('\n')
+
+
+class SubRipParser(object):
+    """
+    SubRipParser([encoding][, error_handling])
+
+    Push parser for .srt data arriving as chunks of bytes, from a socket or
+    a pipe for instance. Chunks may be cut anywhere, even in the middle of
+    a character. feed() returns the items completed by each chunk, as soon
+    as the blank line following them is received, and close() the last
+    one. Only the current incomplete item is kept in memory.
+
+    Without `encoding`, it is detected from the BOM and defaults to utf-8.
+
+    Example:
+        >>> parser = SubRipParser()
+        >>> for chunk in iter(lambda: pipe.read(4096), b''):
+        ...     for sub in parser.feed(chunk):
+        ...         print(sub.text)
+        >>> last_subs = parser.close()
+    """
+
+    def __init__(self, encoding=None, error_handling=SubRipFile.ERROR_PASS):
+        self.encoding = encoding
+        self.error_handling = error_handling
+        self.eol = None
+        self._decoder = None
+        self._head = b''
+        self._at_start = True
+        self._pending = ''
+
+    def feed(self, data):
+        """
+        feed(data) -> list of SubRipItem
+
+        `data` -> bytes, the next chunk of the file
+        """
+        return self._parse(self._complete_lines(data))
+
+    def close(self):
+        """
+        close() -> list of SubRipItem
+
+        Parse what is left once the whole file has been fed. Raise
+        UnicodeDecodeError if it ends in the middle of a character.
+        """
+        return self._parse(self._complete_lines(b'', final=True))
+
+    def _parse(self, lines):
+        return list(SubRipFile.stream(lines,
+                                      error_handling=self.error_handling))
+
+    def _complete_lines(self, data, final=False):
+        """
+        Decode `data` and return the lines of the items completed by it.
+        """
+        if self._decoder is None:
+            data = self._head + data
+            if self.encoding is None:
+                if not final and len(data) < BIGGER_BOM and \
+                        any(bom.startswith(data) for bom, _ in BOMS):
+                    self._head = data  # Wait for the whole BOM
+                    return []
+                self.encoding = _sniff_bom(data) or SubRipFile.DEFAULT_ENCODING
+            self._head = b''
+            self._decoder = codecs.getincrementaldecoder(self.encoding)()
+        text = self._decoder.decode(data, final)
+        if self._at_start and text:
+            self._at_start = False
+            text = _strip_bom(text)
+        text = self._pending + text
+        # A trailing \r may be the first half of a \r\n
+        cut = len(text) - 1 if text.endswith('\r') and not final \
+            else len(text)
+        lines = text[:cut].splitlines(True)
+        # Items are complete up to the last blank line
+        complete = len(lines)
+        while complete and not final and (
+                lines[complete - 1].strip() or
+                not lines[complete - 1].endswith(('\n', '\r'))):
+            complete -= 1
+        self._pending = ''.join(lines[complete:]) + text[cut:]
+        if self.eol is None and complete:
+            self.eol = SubRipFile._guess_eol(lines)
+        return lines[:complete]
+
+
+class SubRipSnapshot(object):
+    """
+    State of a SubRipFile at some point, see SubRipFile.snapshot.
+
+    Immutable: item states are (index, start, end, text, position) tuples,
+    times being ordinals.
+    """
+
+    def __init__(self, chunks, eol, path, encoding):
+        self.chunks = chunks
+        self.eol = eol
+        self.path = path
+        self.encoding = encoding
+
+    def __len__(self):
+        return sum(len(chunk.states) for chunk in self.chunks)
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            for state in chunk.states:
+                yield state
+
+
+class _Tail(object):
+    """
+    Read position in a growing file: byte offset, identity and first bytes
+    of the file, plus a parser holding the incomplete item at its end.
+    """
+
+    HEAD_SIZE = 64
+
+    def __init__(self, path, encoding=None):
+        self.path = path
+        self.encoding = encoding
+        self.reset()
+
+    def reset(self):
+        self.parser = SubRipParser(self.encoding)
+        self.identity = None
+        self.head = b''
+        self.offset = 0
+
+    def read(self):
+        """
+        read() -> (data, replaced)
+
+        Bytes appended since the last call, and whether the file was
+        truncated or replaced in between.
+        """
+        try:
+            source = open(self.path, 'rb')
+        except (IOError, OSError):
+            # Maybe rotated and not created again yet
+            if self.identity is not None and not os.path.exists(self.path):
+                return b'', False
+            raise
+        try:
+            status = os.fstat(source.fileno())
+            identity = (status.st_dev, status.st_ino)
+            # A file truncated then grown back past the offset between two
+            # calls keeps its identity and size, but not its first bytes
+            head = source.read(len(self.head))
+            replaced = self.identity is not None and (
+                identity != self.identity or status.st_size < self.offset or
+                head != self.head)
+            if replaced:
+                self.reset()
+            self.identity = identity
+            source.seek(self.offset)
+            data = source.read()
+        finally:
+            source.close()
+        self.offset += len(data)
+        if len(self.head) < self.HEAD_SIZE:
+            self.head = (self.head + data)[:self.HEAD_SIZE]
+        return data, replaced
+
+
+class _StartOrdinals(object):
+    """Start ordinals of a list of items, read on demand by bisect."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index].start.ordinal
+
+
+class SubRipFileView(object):
+    """
+    SubRipFileView(parent, first, last)
+
+    Items parent[first:last] of a SubRipFile, read and written in place.
+    See SubRipFile.view.
+
+    The view covers a range of positions: inserting or removing items in
+    the parent moves the items it shows.
+    """
+
+    def __init__(self, parent, first, last):
+        self.parent = parent
+        self.first = first
+        self.last = last
+
+    @property
+    def eol(self):
+        return self.parent.eol
+
+    @property
+    def encoding(self):
+        return self.parent.encoding
+
+    def __len__(self):
+        return max(0, min(self.last, len(self.parent.data)) - self.first)
+
+    def __iter__(self):
+        data = self.parent.data
+        for index in range(self.first, min(self.last, len(data))):
+            yield data[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('view index out of range')
+        return self.parent.data[self.first + index]
+
+    def shift(self, *args, **kwargs):
+        """
+        shift(hours, minutes, seconds, milliseconds, ratio)
+
+        Shift the items of the view, see SubRipFile.shift.
+        """
+        for item in self:
+            item.shift(*args, **kwargs)
+
+    def write_into(self, output_file, eol=None):
+        """
+        write_into(output_file [, eol])
+
+        Serialize the items of the view into `output_file`.
+        """
+        _write_items(self, output_file, eol or self.eol)
+
+    def save(self, path, encoding=None, eol=None, atomic=False):
+        """
+        save(path[, encoding][, eol][, atomic])
+
+        Save the items of the view to `path`, see SubRipFile.save. Use the
+        parent's encoding and eol if no other provided.
+        """
+        _save_items(self, path, encoding or self.encoding, eol or self.eol,
+                    atomic)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Sidecar byte offset index of .srt files
+
+The index of `movie.srt` is stored next to it as `movie.srt.srtidx`. It
+records, for each block of consecutive items, the byte offset of its first
+item along with timing bounds, so that the items shown during a time range
+can be read without parsing the whole file.
+"""
+import os
+import codecs
+import struct
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+from pysrt.srtexc import Error
+from pysrt.srtitem import SubRipItem
+
+INDEX_EXTENSION = '.srtidx'
+DEFAULT_BLOCK_SIZE = 64
+
+MAGIC = b'SRTIDX\x00\x01'
+# Magic, size and modification time of the indexed file, block size, block
+# count and length of the encoding name which follows
+HEADER = struct.Struct('<8sqdIIB')
+# Latest end up to the block, earliest start from the block on and byte
+# offset of the block
+ENTRY = struct.Struct('<qqq')
+
+
+def index_path(path):
+    return path + INDEX_EXTENSION
+
+
+def item_offsets(lines, offset, encoding):
+    """
+    item_offsets(lines, offset, encoding) -> generator of (offset, item)
+
+    Parse the unicode `lines` of a file, starting at byte `offset` and
+    encoded with `encoding`, and yield every valid item along with the
+    byte offset of its first line. Invalid items are skipped.
+    """
+    # Codecs like utf-16 write a BOM before the first line only
+    encode = codecs.getincrementalencoder(encoding)().encode
+    block = []
+    block_offset = offset
+    for line in chain(lines, '\n'):
+        if line.strip():
+            if not block:
+                block_offset = offset
+            block.append(line)
+        elif block:
+            source, block = block, []
+            try:
+                yield block_offset, SubRipItem.from_lines(source)
+            except Error:
+                pass
+        offset += len(encode(line))
+
+
+class SubRipIndex(object):
+    """
+    SubRipIndex(size, mtime, encoding, block_size, ends, starts, offsets)
+
+    Byte offsets of the blocks of items of an .srt file of `size` bytes
+    last modified at `mtime`, which only tell whether the index is stale:
+    offsets count decompressed bytes when the file is compressed. `ends` holds the latest end ordinal of the
+    items up to each block and `starts` the earliest start ordinal of the
+    items from each block on, so both are sorted even when the items are
+    not.
+    """
+
+    def __init__(self, size, mtime, encoding, block_size, ends, starts,
+                 offsets):
+        self.size = size
+        self.mtime = mtime
+        self.encoding = encoding
+        self.block_size = block_size
+        self.ends = ends
+        self.starts = starts
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, items, status, encoding, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        build(items, status, encoding[, block_size]) -> SubRipIndex
+
+        `items` -> (offset, item) pairs, see item_offsets
+        `status` -> os.stat() result of the indexed file
+        """
+        ends, starts, offsets = [], [], []
+        latest_end = None
+        for number, (offset, item) in enumerate(items):
+            start, end = item.start.ordinal, item.end.ordinal
+            if number % block_size == 0:
+                offsets.append(offset)
+                starts.append(start)
+                ends.append(end if latest_end is None else latest_end)
+            starts[-1] = min(starts[-1], start)
+            latest_end = max(end, ends[-1])
+            ends[-1] = latest_end
+        for block in range(len(starts) - 2, -1, -1):
+            starts[block] = min(starts[block], starts[block + 1])
+        return cls(status.st_size, status.st_mtime, encoding, block_size,
+                   ends, starts, offsets)
+
+    @classmethod
+    def load(cls, path):
+        """
+        load(path) -> SubRipIndex
+
+        Raise ValueError if `path` is not an index file.
+        """
+        with open(path, 'rb') as source:
+            header = source.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError('truncated index: %s' % path)
+            magic, size, mtime, block_size, count, encoding_length = \
+                HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError('not an index: %s' % path)
+            encoding = source.read(encoding_length).decode('ascii')
+            data = source.read(ENTRY.size * count)
+        if len(data) < ENTRY.size * count:
+            raise ValueError('truncated index: %s' % path)
+        entries = [ENTRY.unpack_from(data, position)
+                   for position in range(0, len(data), ENTRY.size)]
+        ends, starts, offsets = [list(column) for column in zip(*entries)] \
+            if entries else ([], [], [])
+        return cls(size, mtime, encoding, block_size, ends, starts, offsets)
+
+    def save(self, path):
+        encoding = self.encoding.encode('ascii')
+        with open(path, 'wb') as target:
+            target.write(HEADER.pack(MAGIC, self.size, self.mtime,
+                                     self.block_size, len(self),
+                                     len(encoding)))
+            target.write(encoding)
+            for entry in zip(self.ends, self.starts, self.offsets):
+                target.write(ENTRY.pack(*entry))
+
+    def is_valid_for(self, path):
+        """
+        is_valid_for(path) -> bool
+
+        Whether the file at `path` is still the one that was indexed, judging
+        by its size and modification time.
+        """
+        try:
+            status = os.stat(path)
+        except OSError:
+            return False
+        return status.st_size == self.size and status.st_mtime == self.mtime
+
+    def byte_range(self, start, end):
+        """
+        byte_range(start, end) -> (first offset, stop offset)
+
+        Bytes holding every item shown between the `start` and `end`
+        ordinals, and possibly a few more. The stop offset is None when they
+        run to the end of the file.
+        """
+        first = bisect_right(self.ends, start)
+        stop = bisect_left(self.starts, end)
+        if first >= stop:
+            return 0, 0
+        stop_offset = self.offsets[stop] if stop < len(self) else None
+        return self.offsets[first], stop_offset
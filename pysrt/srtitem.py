@@ -5,9 +5,9 @@ SubRip's subtitle parser
 
 from pysrt.srtexc import InvalidItem, InvalidIndex
 from pysrt.srttime import SubRipTime
+from pysrt.srttext import LineWrapper, RE_TAG, display_width
 from pysrt.comparablemixin import ComparableMixin
 from pysrt.compat import str, is_py2
-import re
 
 
 class SubRipItem(ComparableMixin):
@@ -24,14 +24,68 @@ class SubRipItem(ComparableMixin):
 
     def __init__(self, index=0, start=None, end=None, text='', position=''):
         try:
-            self.index = int(index)
+            index = int(index)
         except (TypeError, ValueError):  # try to cast as int, but it's not mandatory
-            self.index = index
+            pass
+
+        # Straight into __dict__, see __setattr__
+        attributes = self.__dict__
+        attributes['index'] = index
+        attributes['start'] = SubRipTime.coerce(start or 0)
+        attributes['end'] = SubRipTime.coerce(end or 0)
+        attributes['position'] = str(position)
+        attributes['_text'] = str(text)
+        attributes['_text_metrics'] = None
+        attributes['_state'] = None
+
+    def __setattr__(self, name, value):
+        # Assigning any public attribute drops the state recorded by the last
+        # snapshot, see SubRipFile.snapshot. SubRipTime instances changed in
+        # place behind the item's back (item.start.seconds = 3) go unnoticed:
+        # assign them again.
+        object.__setattr__(self, name, value)
+        if name[0] != '_':
+            self.__dict__['_state'] = None
+
+    def _get_text(self):
+        return self._text
+
+    def _set_text(self, text):
+        self.__dict__.update(_text=text, _text_metrics=None)
+
+    text = property(_get_text, _set_text)
+
+    def _get_state(self):
+        """
+        Immutable copy of the item: (index, start, end, text, position),
+        cached until the item changes.
+        """
+        state = self._state
+        if state is None:
+            state = (self.index, self.start.ordinal, self.end.ordinal,
+                     self._text, self.position)
+            self.__dict__['_state'] = state
+        return state
 
-        self.start = SubRipTime.coerce(start or 0)
-        self.end = SubRipTime.coerce(end or 0)
-        self.position = str(position)
-        self.text = str(text)
+    @classmethod
+    def _from_state(cls, state):
+        item = cls(*state)
+        item.__dict__['_state'] = state
+        return item
+
+    def _get_text_metrics(self):
+        # Derived from text only, so computed once per text assignment.
+        # Timings are read straight from the ordinals, which is cheap.
+        if self._text_metrics is None:
+            text_without_tags = RE_TAG.sub('', self._text)
+            lines = text_without_tags.split('\n')
+            self._text_metrics = (
+                text_without_tags,
+                len(text_without_tags) - len(lines) + 1,
+                len(lines) if self._text else 0,
+                max(display_width(line) for line in lines),
+            )
+        return self._text_metrics
 
     @property
     def duration(self):
@@ -39,14 +93,27 @@ class SubRipItem(ComparableMixin):
 
     @property
     def text_without_tags(self):
-        RE_TAG = re.compile(r'<[^>]*?>')
-        return RE_TAG.sub('', self.text)
+        return self._get_text_metrics()[0]
+
+    @property
+    def characters_count(self):
+        """Number of characters displayed, tags and line breaks excluded"""
+        return self._get_text_metrics()[1]
+
+    @property
+    def line_count(self):
+        return self._get_text_metrics()[2]
+
+    @property
+    def max_line_width(self):
+        """Display width of the widest line, see pysrt.srttext.display_width"""
+        return self._get_text_metrics()[3]
 
     @property
     def characters_per_second(self):
-        characters_count = len(self.text_without_tags.replace('\n', ''))
+        duration = self.end.ordinal - self.start.ordinal
         try:
-            return characters_count / (self.duration.ordinal / 1000.0)
+            return self._get_text_metrics()[1] / (duration / 1000.0)
         except ZeroDivisionError:
             return 0.0
 
@@ -72,6 +139,18 @@ class SubRipItem(ComparableMixin):
         """
         self.start.shift(*args, **kwargs)
         self.end.shift(*args, **kwargs)
+        self.__dict__['_state'] = None
+
+    def wrap(self, max_width, max_lines=None, balanced=False, reflow=False):
+        """
+        wrap(max_width[, max_lines][, balanced][, reflow])
+
+        Break text so that lines are at most `max_width` columns wide. East
+        Asian wide characters count for two columns and tags for none.
+        See pysrt.srttext.LineWrapper for other arguments.
+        """
+        wrapper = LineWrapper.get(max_width, max_lines, balanced, reflow)
+        self.text = wrapper.wrap(self.text)
 
     @classmethod
     def from_string(cls, source):
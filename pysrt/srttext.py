@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Display width and line breaking of subtitle text
+"""
+import re
+from unicodedata import east_asian_width, combining
+
+RE_TAG = re.compile(r'<[^>]*?>')
+RE_TOKEN = re.compile(r'(<[^>]*?>)|(\s+)|([^\s<]+|<)')
+RE_ASCII = re.compile(r'^[\x00-\x7f]*$')
+
+WIDE = frozenset(('W', 'F'))
+# Punctuation that must not start a line (kinsoku shori)
+NO_BREAK_BEFORE = frozenset(
+    u'、。，．・：；？！‼⁇⁈⁉ー）」』】〕〉》〗〙〛’”｠»…‥ヽヾゝゞ々'
+    u',.:;?!)]}%'
+)
+
+_char_widths = {}
+_char_breaks = {}
+
+
+def char_width(char):
+    """
+    char_width(char) -> int
+
+    Number of columns `char` takes on screen: 2 for East Asian wide and
+    fullwidth characters, 0 for combining marks, 1 otherwise.
+    """
+    try:
+        return _char_widths[char]
+    except KeyError:
+        if combining(char):
+            width = 0
+        elif east_asian_width(char) in WIDE:
+            width = 2
+        else:
+            width = 1
+        _char_widths[char] = width
+        return width
+
+
+def display_width(text):
+    """
+    display_width(text) -> int
+
+    Number of columns `text` takes on screen, tags excluded.
+    """
+    if RE_ASCII.match(text):
+        if '<' in text:
+            return len(RE_TAG.sub('', text))
+        return len(text)
+    return sum(char_width(c) for c in RE_TAG.sub('', text))
+
+
+def strip_tags(text):
+    """
+    strip_tags(text) -> unicode
+
+    Remove every <tag> from text.
+    """
+    return RE_TAG.sub('', text)
+
+
+class LineWrapper(object):
+    """
+    LineWrapper(max_width[, max_lines][, balanced][, reflow])
+
+    max_width -> int: maximum display width of a line, East Asian wide
+        characters counting for two columns and tags for none.
+    max_lines -> int: maximum number of lines. When the text does not fit,
+        the overflow is spread on the last lines. Default to no limit.
+    balanced -> bool: use minimum raggedness breaking, so that lines are of
+        similar width, instead of filling lines greedily.
+    reflow -> bool: join existing lines before breaking text that does not
+        fit. By default each existing line is broken on its own, which keeps
+        bilingual cues and dialogue lines apart.
+
+    Text whose lines all fit is always left untouched.
+
+    Results are memoized, so repeated lines are only broken once.
+    """
+    MAX_CACHE_SIZE = 100000
+    _instances = {}
+
+    def __init__(self, max_width, max_lines=None, balanced=False, reflow=False):
+        if max_width < 1:
+            raise ValueError('max_width must be a positive integer')
+        self.max_width = max_width
+        self.max_lines = max_lines
+        self.balanced = balanced
+        self.reflow = reflow
+        self._cache = {}
+
+    @classmethod
+    def get(cls, max_width, max_lines=None, balanced=False, reflow=False):
+        """Shared instance for these settings, so its memo is reused."""
+        key = (max_width, max_lines, balanced, reflow)
+        try:
+            return cls._instances[key]
+        except KeyError:
+            instance = cls._instances[key] = cls(*key)
+            return instance
+
+    def wrap(self, text):
+        """
+        wrap(text) -> unicode
+
+        Return `text` with line breaks inserted.
+        """
+        try:
+            return self._cache[text]
+        except KeyError:
+            pass
+        if self._fits(text):
+            wrapped = text
+        elif self.reflow:
+            wrapped = self._wrap(text, self.max_lines)
+        else:
+            wrapped = '\n'.join(self._wrap(line, None)
+                                for line in text.splitlines())
+            if self.max_lines and wrapped.count('\n') >= self.max_lines:
+                wrapped = self._wrap(text, self.max_lines)
+        if len(self._cache) >= self.MAX_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[text] = wrapped
+        return wrapped
+
+    def _fits(self, text):
+        lines = text.splitlines()
+        if self.max_lines and len(lines) > self.max_lines:
+            return False
+        return all(display_width(line) <= self.max_width for line in lines)
+
+    def wrap_items(self, items):
+        """
+        wrap_items(items) -> generator of SubRipItem
+
+        Wrap the text of each item of `items`, as they come. Suited to
+        SubRipFile.stream.
+        """
+        for item in items:
+            item.text = self.wrap(item.text)
+            yield item
+
+    def _wrap(self, text, max_lines):
+        texts, widths, separators = self._units(text)
+        if not texts:
+            return ''
+        # positions[i]: width of the units before i, separators included
+        positions = [0]
+        for width, separator in zip(widths, separators):
+            positions.append(positions[-1] + len(separator) + width)
+        if positions[-1] <= self.max_width:
+            return self._render(texts, separators, 0, len(texts))
+
+        lines = self._greedy(widths, separators)
+        if max_lines and len(lines) > max_lines:
+            lines = self._balance(widths, separators, positions, max_lines,
+                                  overflow=True)
+        elif self.balanced and len(lines) > 1:
+            lines = self._balance(widths, separators, positions, len(lines))
+        return '\n'.join(self._render(texts, separators, start, end)
+                         for start, end in lines)
+
+    @staticmethod
+    def _units(text):
+        """
+        Cut `text` in units that are never broken. Return the units' texts,
+        their display widths and the separator to print before each one.
+        """
+        if '<' not in text and RE_ASCII.match(text):
+            texts = text.split()
+            return (texts, [len(t) for t in texts],
+                    [''] + [' '] * (len(texts) - 1) if texts else [])
+
+        texts, widths, separators = [], [], []
+        wide_end = False
+        space = ''
+        tags = ''
+        for tag, blank, word in RE_TOKEN.findall(text):
+            if tag:
+                if texts and not space:
+                    texts[-1] += tag
+                else:
+                    tags += tag
+                continue
+            if blank:
+                if texts or tags:
+                    only_newlines = not blank.strip('\r\n')
+                    space = '\n' if only_newlines and space != ' ' else ' '
+                continue
+            if RE_ASCII.match(word):
+                pieces = [[word, len(word), False]]
+            else:
+                pieces = []
+                for char in word:
+                    try:
+                        width, sticky = _char_breaks[char]
+                    except KeyError:
+                        width = char_width(char)
+                        sticky = char in NO_BREAK_BEFORE or width == 0
+                        _char_breaks[char] = width, sticky
+                    if pieces and (sticky or
+                                   not (width == 2 or pieces[-1][2])):
+                        piece = pieces[-1]
+                        piece[0] += char
+                        piece[1] += width
+                        piece[2] = piece[2] and width == 2
+                    else:
+                        pieces.append([char, width, width == 2])
+            for index, (piece, width, wide) in enumerate(pieces):
+                first_wide = char_width(piece[0]) == 2
+                last_wide = char_width(piece[-1]) == 2
+                if index == 0:
+                    piece = tags + piece
+                    tags = ''
+                if index == 0 and texts and not space:
+                    # Words separated by a tag only are still one word
+                    texts[-1] += piece
+                    widths[-1] += width
+                else:
+                    if not texts or not space:
+                        separator = ''
+                    elif space == '\n' and wide_end and first_wide:
+                        # Line breaks between ideographs do not turn
+                        # into spaces when reflowed
+                        separator = ''
+                    else:
+                        separator = ' '
+                    texts.append(piece)
+                    widths.append(width)
+                    separators.append(separator)
+                space = ''
+                wide_end = last_wide
+        if tags:
+            if texts:
+                texts[-1] += tags
+            else:
+                texts.append(tags)
+                widths.append(0)
+                separators.append('')
+        return texts, widths, separators
+
+    def _greedy(self, widths, separators):
+        lines = []
+        start = 0
+        line_width = widths[0]
+        for index in range(1, len(widths)):
+            added = widths[index] + len(separators[index])
+            if line_width + added > self.max_width:
+                lines.append((start, index))
+                start = index
+                line_width = widths[index]
+            else:
+                line_width += added
+        lines.append((start, len(widths)))
+        return lines
+
+    def _balance(self, widths, separators, positions, line_count,
+                 overflow=False):
+        """
+        Minimum raggedness breaking in exactly `line_count` lines: minimize
+        the sum of the squared free space left on each line. Unless
+        `overflow` is allowed, only lines fitting in max_width (or made of a
+        single unit) are considered; otherwise overflowing lines are heavily
+        penalized.
+        """
+        count = len(widths)
+        line_count = min(line_count, count)
+        max_width = self.max_width
+        penalty = count * 1000
+        # Width of the line made of units[start:end]
+        starts = [positions[i] + len(separators[i]) for i in range(count)]
+
+        def cost(start, end):
+            slack = max_width - positions[end] + starts[start]
+            if slack < 0:
+                return slack * slack * penalty
+            return slack * slack
+
+        if line_count == 2:
+            # By far the most common case, no need for the whole table
+            split = min(range(1, count),
+                        key=lambda i: cost(0, i) + cost(i, count))
+            return [(0, split), (split, count)]
+
+        infinity = float('inf')
+        # best[j]: cost of breaking the first j units in the lines so far
+        best = [0] + [infinity] * count
+        choices = []
+        for lines in range(1, line_count + 1):
+            current = [infinity] * (count + 1)
+            choice = [None] * (count + 1)
+            for end in range(lines, count - (line_count - lines) + 1):
+                end_position = positions[end]
+                for start in range(end - 1, lines - 2, -1):
+                    slack = max_width - end_position + starts[start]
+                    if slack < 0:
+                        if not overflow and start < end - 1:
+                            break
+                        total = best[start] + slack * slack * penalty
+                    else:
+                        total = best[start] + slack * slack
+                    if total < current[end]:
+                        current[end] = total
+                        choice[end] = start
+            best = current
+            choices.append(choice)
+        lines = []
+        end = count
+        for choice in reversed(choices):
+            start = choice[end]
+            lines.append((start, end))
+            end = start
+        lines.reverse()
+        return lines
+
+    @staticmethod
+    def _render(texts, separators, start, end):
+        parts = [texts[start]]
+        for index in range(start + 1, end):
+            parts.append(separators[index])
+            parts.append(texts[index])
+        return ''.join(parts)
@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+"""
+Timing transforms working on streams of SubRipItem
+"""
+from array import array
+from bisect import bisect_right
+from fractions import Fraction
+
+from pysrt.srtitem import SubRipItem
+from pysrt.srttime import SubRipTime
+from pysrt.srttext import RE_TAG
+from pysrt.compat import basestring
+
+# Bounds of the items resegment merges when max_chars or max_duration are
+# not given, two lines of 42 characters for at most 7 seconds
+MERGED_MAX_CHARS = 84
+MERGED_MAX_DURATION = 7000
+
+
+def _ordinal(value):
+    if value is None:
+        return None
+    return SubRipTime.coerce(value).ordinal
+
+
+def frame_rate(fps):
+    """
+    frame_rate(fps) -> Fraction
+
+    Exact frame rate from an int, a float, a Fraction or a string like
+    '25', '23.976' or '24000/1001'. Decimal approximations of the NTSC rates
+    (23.976, 29.97, 59.94...) are taken for the exact N*1000/1001 rate.
+    """
+    if isinstance(fps, Fraction):
+        rate = fps
+    elif isinstance(fps, basestring):
+        rate = Fraction(fps.strip())
+    else:
+        rate = Fraction(str(fps))
+    if rate <= 0:
+        raise ValueError('frame rate must be positive: %r' % fps)
+    if rate.denominator != 1 and rate.denominator != 1001:
+        nominal = int(round(rate * Fraction(1001, 1000)))
+        if abs(rate - Fraction(nominal * 1000, 1001)) < Fraction(1, 100):
+            rate = Fraction(nominal * 1000, 1001)
+    return rate
+
+
+def to_frames(ordinals, fps):
+    """
+    to_frames(ordinals, fps) -> array of int
+
+    Number of the frame nearest to each ordinal, frame 0 starting at 0.
+    `fps` can be anything frame_rate() accepts. Computed with integers only.
+    """
+    rate = frame_rate(fps)
+    numerator, denominator = rate.numerator, rate.denominator * 1000
+    half = denominator // 2
+    return array('l', ((ordinal * numerator + half) // denominator
+                       for ordinal in ordinals))
+
+
+def from_frames(frames, fps):
+    """
+    from_frames(frames, fps) -> array of int
+
+    Ordinal of the start of each frame, rounded to the millisecond.
+    """
+    rate = frame_rate(fps)
+    numerator, denominator = rate.denominator * 1000, rate.numerator
+    half = denominator // 2
+    return array('l', ((frame * numerator + half) // denominator
+                       for frame in frames))
+
+
+def map_ordinals(ordinals, anchors):
+    """
+    map_ordinals(ordinals, anchors) -> array of int
+
+    Apply to every ordinal the piecewise-linear map going through the
+    (source, target) `anchors`, which are SubRipTime or coercible. Between
+    two anchors, times are interpolated. Before the first and after the last,
+    the nearest segment is extended, so a single anchor is a plain offset.
+
+    Example:
+        >>> map_ordinals([0, 60000], [(0, 1000), (60000, 62000)])
+        array('l', [1000, 62000])
+    """
+    pairs = sorted((_ordinal(source), _ordinal(target))
+                   for source, target in anchors)
+    if not pairs:
+        raise ValueError('at least one anchor is needed')
+    sources = [source for source, _ in pairs]
+    if len(set(sources)) != len(sources):
+        raise ValueError('anchors must have distinct source times')
+    targets = [target for _, target in pairs]
+    if len(pairs) == 1:
+        offset = targets[0] - sources[0]
+        return array('l', (ordinal + offset for ordinal in ordinals))
+
+    # One (source, target, slope) line per segment, the first and last ones
+    # covering the times outside the anchors too
+    lines = [(sources[i], targets[i], (targets[i + 1] - targets[i]) /
+              float(sources[i + 1] - sources[i]))
+             for i in range(len(pairs) - 1)]
+    last = len(lines) - 1
+    inner = sources[1:-1]
+    result = array('l')
+    for ordinal in ordinals:
+        source, target, slope = lines[min(bisect_right(inner, ordinal), last)]
+        result.append(target + int(round((ordinal - source) * slope)))
+    return result
+
+
+def normalize_timing(items, min_duration=None, max_duration=None,
+                     min_gap=None, max_cps=None):
+    """
+    normalize_timing(items[, min_duration][, max_duration][, min_gap]
+                     [, max_cps]) -> generator of SubRipItem
+
+    Adjust the timing of `items`, which must come in chronological order,
+    and yield them as soon as the following one is known. Starts are never
+    moved forward, so the order is preserved.
+
+    min_duration, max_duration, min_gap -> SubRipTime or coercible
+        (int being milliseconds).
+    max_cps -> float: maximum reading speed. Items are lengthened until
+        their characters_per_second is at most this.
+
+    Items are first lengthened, or shortened, by moving their end, which
+    stays at least `min_gap` before the next item's start. Items still too
+    short then start earlier, down to `min_gap` after the previous item's
+    end. All arguments are optional.
+
+    Example:
+        >>> for item in normalize_timing(SubRipFile.stream(f), min_gap=80):
+        ...     output.write(str(item))
+    """
+    min_duration = _ordinal(min_duration)
+    max_duration = _ordinal(max_duration)
+    min_gap = _ordinal(min_gap) or 0
+    previous_end = None
+    current = None
+    for item in items:
+        if current is not None:
+            previous_end = _normalize(current, item.start.ordinal,
+                                      previous_end, min_duration,
+                                      max_duration, min_gap, max_cps)
+            yield current
+        current = item
+    if current is not None:
+        _normalize(current, None, previous_end, min_duration, max_duration,
+                   min_gap, max_cps)
+        yield current
+
+
+def _normalize(item, next_start, previous_end, min_duration, max_duration,
+               min_gap, max_cps):
+    """
+    Fix the timing of one item given its neighbours, return its new end.
+    """
+    start, end = item.start.ordinal, item.end.ordinal
+    needed = min_duration or 0
+    if max_cps:
+        characters = item.characters_count
+        if characters:
+            needed = max(needed, int(-(-characters * 1000 // max_cps)))
+    if max_duration is not None:
+        needed = min(needed, max_duration)
+        end = min(end, start + max_duration)
+
+    end = max(end, start + needed)
+    if next_start is not None and end > next_start - min_gap:
+        end = max(next_start - min_gap, start)
+    if end - start < needed:
+        # No room ahead, use the room behind
+        earliest = 0 if previous_end is None else previous_end + min_gap
+        start = min(start, max(end - needed, earliest))
+
+    if start != item.start.ordinal:
+        item.start = SubRipTime.from_ordinal(start)
+    if end != item.end.ordinal:
+        item.end = SubRipTime.from_ordinal(end)
+    return end
+
+
+def resegment(items, target_cps=None, max_chars=None, max_duration=None,
+              max_gap=500, min_duration=1000):
+    """
+    resegment(items[, target_cps][, max_chars][, max_duration][, max_gap]
+              [, min_duration]) -> generator of SubRipItem
+
+    Merge runs of short adjacent items and split long ones, yielding items
+    numbered from 1. `items` must come in chronological order.
+
+    target_cps -> float: merged items are not read faster than this, unless
+        their parts already were.
+    max_chars -> int: maximum number of characters of an item, tags and line
+        breaks excluded. Merged items never go over MERGED_MAX_CHARS when
+        not given.
+    max_duration -> SubRipTime or coercible (int being milliseconds).
+        Merged items never go over MERGED_MAX_DURATION when not given.
+    max_gap -> only items at most this far apart are merged. Default to
+        half a second.
+    min_duration -> SubRipTime or coercible. Default to one second.
+
+    Items are short when they last less than min_duration or are read
+    faster than target_cps. An item is merged into the previous one only
+    if one of them is short, so merging stops once the merged item is long
+    and slow enough. Merged texts are joined on a single line, see
+    SubRipFile.wrap.
+
+    Items going over max_chars or max_duration are split between words,
+    each piece getting a share of the time proportional to its length.
+    Untouched items are yielded as is, other ones are created once.
+
+    Example:
+        >>> subs = SubRipFile(resegment(subs, 17, 84, 7000))
+    """
+    max_duration = _ordinal(max_duration)
+    max_gap = _ordinal(max_gap) or 0
+    min_duration = _ordinal(min_duration) or 0
+    merged_max_chars = MERGED_MAX_CHARS if max_chars is None else max_chars
+    merged_max_duration = MERGED_MAX_DURATION if max_duration is None \
+        else max_duration
+    index = 0
+    group = []
+    # Start, end and number of characters of the merged group, whether one
+    # of its parts is already read faster than target_cps and whether it is
+    # still short
+    start = end = characters = 0
+    fast = short = False
+    for item in items:
+        item_start, item_end = item.start.ordinal, item.end.ordinal
+        item_characters = item.characters_count
+        item_fast = _too_fast(item_characters, item_end - item_start,
+                              target_cps)
+        item_short = item_fast or item_end - item_start < min_duration
+        if _too_long(item_characters, item_end - item_start, max_chars,
+                     max_duration):
+            for result in _merged(group, start, end, index):
+                index += 1
+                yield result
+            group = []
+            for result in _split(item, max_chars, max_duration, index):
+                index += 1
+                yield result
+            continue
+        if group:
+            merged_start = min(start, item_start)
+            merged_end = max(end, item_end)
+            merged_characters = characters + 1 + item_characters
+            if item_start - end <= max_gap and (short or item_short) and \
+                    not _too_long(merged_characters, merged_end - merged_start,
+                                  merged_max_chars, merged_max_duration) and \
+                    (fast or item_fast or
+                     not _too_fast(merged_characters,
+                                   merged_end - merged_start, target_cps)):
+                group.append(item)
+                start, end = merged_start, merged_end
+                characters = merged_characters
+                fast = fast or item_fast
+                short = end - start < min_duration or \
+                    _too_fast(characters, end - start, target_cps)
+                continue
+            for result in _merged(group, start, end, index):
+                index += 1
+                yield result
+        group = [item]
+        start, end, characters = item_start, item_end, item_characters
+        fast, short = item_fast, item_short
+    for result in _merged(group, start, end, index):
+        yield result
+
+
+def _too_long(characters, duration, max_chars, max_duration):
+    return (max_chars is not None and characters > max_chars) or \
+        (max_duration is not None and duration > max_duration)
+
+
+def _cps(characters, duration):
+    return characters * 1000.0 / duration if duration > 0 else float('inf')
+
+
+def _too_fast(characters, duration, target_cps):
+    return bool(target_cps) and _cps(characters, duration) > target_cps
+
+
+def _merged(group, start, end, index):
+    if not group:
+        return
+    if len(group) == 1:
+        item = group[0]
+        item.index = index + 1
+        yield item
+        return
+    text = ' '.join(' '.join(part.text.split()) for part in group)
+    yield SubRipItem(index + 1, start, end, text, group[0].position)
+
+
+def _split(item, max_chars, max_duration, index):
+    """
+    Cut `item` between words in the fewest pieces fitting max_chars and
+    max_duration, sharing its time according to the pieces' lengths.
+    """
+    words = item.text.split()
+    start, end = item.start.ordinal, item.end.ordinal
+    duration = end - start
+    lengths = [len(RE_TAG.sub('', word)) for word in words]
+    total = sum(lengths) + len(words) - 1
+    if len(words) < 2 or total <= 0:
+        item.index = index + 1
+        yield item
+        return
+    count = 1
+    if max_chars:
+        count = max(count, -(-total // max_chars))
+    if max_duration:
+        count = max(count, -(-duration // max_duration))
+    while True:
+        pieces = _cut(words, lengths, total, count)
+        longest = max(length for _, length in pieces)
+        if count >= len(words) or not _too_long(
+                longest, duration * (longest + 1) // total, max_chars,
+                max_duration):
+            break
+        count += 1
+
+    done = 0
+    piece_start = start
+    for number, (piece, length) in enumerate(pieces):
+        # The separating space counts for the piece before it
+        done += length + (1 if number < len(pieces) - 1 else 0)
+        piece_end = start + int(round(duration * done / float(total)))
+        yield SubRipItem(index + number + 1, piece_start, piece_end,
+                         ' '.join(piece), item.position)
+        piece_start = piece_end
+
+
+def _cut(words, lengths, total, count):
+    """
+    Cut `words` in at most `count` pieces of similar lengths, each word going
+    to the piece its middle falls in. Return (words, length) pairs.
+    """
+    pieces = []
+    current = -1
+    position = 0
+    for word, length in zip(words, lengths):
+        piece = min(int((position + length / 2.0) * count / total), count - 1)
+        if piece != current:
+            pieces.append(([word], length))
+            current = piece
+        else:
+            piece_words, piece_length = pieces[-1]
+            piece_words.append(word)
+            pieces[-1] = (piece_words, piece_length + 1 + length)
+        position += length + 1
+    return pieces
+
+
+# Ratios between the usual frame rates: 23.976 (24000/1001), 24 and 25 fps
+FRAME_RATE_RATIOS = tuple(sorted(set(
+    float(a) / b for a in (24000.0 / 1001, 24, 25)
+    for b in (24000.0 / 1001, 24, 25))))
+
+
+def estimate_alignment(timings, reference, resolution=200, tolerance=1000,
+                       ratios=FRAME_RATE_RATIOS):
+    """
+    estimate_alignment(timings, reference[, resolution][, tolerance]
+                       [, ratios]) -> dict
+
+    Estimate how to shift subtitles so that they line up with `reference`.
+    Both arguments are sequences of (start, end) ordinals. Requires numpy.
+
+    For each candidate ratio of `ratios`, the offset is found by
+    cross-correlating, with FFTs, the timelines of both tracks rasterised in
+    slots of `resolution` milliseconds, and the best match is kept. Starts
+    are then paired with the reference starts less than `tolerance`
+    milliseconds away once shifted, and the ratio and offset best mapping
+    one on the other are fitted by least squares.
+
+    Return {'ratio': float, 'milliseconds': int}, to be passed to shift:
+        >>> subs.shift(**estimate_alignment(timings, reference))
+    """
+    import numpy
+
+    timings = numpy.asarray(timings, dtype=numpy.int64).reshape(-1, 2)
+    reference = numpy.asarray(reference, dtype=numpy.int64).reshape(-1, 2)
+    if not len(timings) or not len(reference):
+        return {'ratio': 1.0, 'milliseconds': 0}
+
+    reference_coverage = _coverage(numpy, reference, resolution)
+    spectrums = {}
+    best = None
+    for candidate in ratios or (1.0,):
+        scaled = numpy.round(timings * candidate).astype(numpy.int64)
+        # Negative times are cut off, the lag takes them back into account
+        origin = min(scaled.min(), 0)
+        coverage = _coverage(numpy, scaled - origin, resolution)
+        size = 1
+        while size < len(coverage) + len(reference_coverage):
+            size *= 2
+        if size not in spectrums:
+            spectrums[size] = numpy.fft.rfft(reference_coverage, size)
+        correlation = numpy.fft.irfft(
+            spectrums[size] * numpy.conj(numpy.fft.rfft(coverage, size)),
+            size)
+        lag = int(numpy.argmax(correlation))
+        score = correlation[lag]
+        if lag > size - len(coverage):
+            lag -= size
+        if best is None or score > best[0]:
+            best = (score, candidate, float(lag * resolution - origin))
+    _, ratio, offset = best
+
+    starts = numpy.sort(timings[:, 0]).astype(numpy.float64)
+    reference_starts = numpy.sort(reference[:, 0]).astype(numpy.float64)
+    # A second round pairs more starts once the fit is refined
+    for _ in range(2):
+        predicted = starts * ratio + offset
+        nearest = _nearest(numpy, reference_starts, predicted)
+        paired = numpy.abs(nearest - predicted) <= tolerance
+        if paired.sum() < 2 or numpy.ptp(starts[paired]) == 0:
+            break
+        ratio, offset = numpy.polyfit(starts[paired], nearest[paired], 1)
+    return {'ratio': float(ratio), 'milliseconds': int(round(offset))}
+
+
+def _coverage(numpy, timings, resolution):
+    """
+    Array of 0 and 1 telling whether a subtitle is displayed in each slot.
+    """
+    slots = numpy.maximum(timings // resolution, 0)
+    starts, ends = slots[:, 0], numpy.maximum(slots[:, 1], slots[:, 0])
+    changes = numpy.zeros(int(ends.max()) + 2, dtype=numpy.int64)
+    numpy.add.at(changes, starts, 1)
+    numpy.add.at(changes, ends, -1)
+    return (numpy.cumsum(changes) > 0).astype(numpy.float64)
+
+
+def _nearest(numpy, sorted_values, values):
+    indexes = numpy.clip(numpy.searchsorted(sorted_values, values), 1,
+                         len(sorted_values) - 1)
+    if len(sorted_values) == 1:
+        return numpy.repeat(sorted_values, len(values))
+    before, after = sorted_values[indexes - 1], sorted_values[indexes]
+    return numpy.where(values - before <= after - values, before, after)
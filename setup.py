@@ -25,6 +25,7 @@ setup(name='pysrt',
       description = "SubRip (.srt) subtitle parser and writer",
       long_description=README,
       install_requires=REQUIRES,
+      extras_require={'alignment': ['numpy']},
       entry_points={'console_scripts': ['srt = pysrt.commands:main']},
       license="GPLv3",
       platforms=["Independent"],
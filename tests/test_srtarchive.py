@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import tarfile
+import zipfile
+import unittest
+
+file_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.abspath(file_path))
+
+import pysrt
+from pysrt.compat import str
+
+STATIC_PATH = os.path.join(file_path, 'tests', 'static')
+MEMBERS = ('utf-8.srt', 'windows-1252.srt', 'bom-utf-16-le.srt')
+
+
+def read(name):
+    with open(os.path.join(STATIC_PATH, name), 'rb') as source:
+        return source.read()
+
+
+def zip_archive(path):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name in MEMBERS:
+            archive.writestr('subs/' + name, read(name))
+        archive.writestr('subs/', b'')
+        archive.writestr('readme.txt', b'Not a subtitle')
+        archive.writestr('__MACOSX/subs/._utf-8.srt', b'\x00\x05\x16\x07')
+
+
+def tar_archive(path):
+    with tarfile.open(path, 'w:gz') as archive:
+        for name in MEMBERS + ('readme.txt',):
+            content = read(name) if name in MEMBERS else b'Not a subtitle'
+            info = tarfile.TarInfo('subs/' + name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = {
+            'zip': os.path.join(STATIC_PATH, 'temp.zip'),
+            'tar': os.path.join(STATIC_PATH, 'temp.tar.gz'),
+        }
+        zip_archive(self.paths['zip'])
+        tar_archive(self.paths['tar'])
+
+    def tearDown(self):
+        for path in self.paths.values():
+            os.remove(path)
+
+    def assertSameFile(self, subs, name, **kwargs):
+        expected = pysrt.open(os.path.join(STATIC_PATH, name), **kwargs)
+        self.assertEqual([str(item) for item in subs],
+                         [str(item) for item in expected])
+
+    def test_open_archive(self):
+        for path in self.paths.values():
+            subs = pysrt.open_archive(path)
+            self.assertEqual(list(subs), ['subs/' + name for name in MEMBERS])
+            self.assertSameFile(subs['subs/utf-8.srt'], 'utf-8.srt')
+            self.assertSameFile(subs['subs/windows-1252.srt'],
+                                'windows-1252.srt', encoding='windows-1252')
+            self.assertSameFile(subs['subs/bom-utf-16-le.srt'],
+                                'bom-utf-16-le.srt')
+            self.assertEqual(subs['subs/bom-utf-16-le.srt'].encoding,
+                             'utf_16_le')
+            self.assertEqual(subs['subs/utf-8.srt'].path, 'subs/utf-8.srt')
+
+    def test_jobs(self):
+        subs = pysrt.open_archive(self.paths['zip'], jobs=2)
+        self.assertEqual(list(subs), ['subs/' + name for name in MEMBERS])
+        self.assertSameFile(subs['subs/utf-8.srt'], 'utf-8.srt')
+
+    def test_stream_archive(self):
+        pairs = list(pysrt.stream_archive(self.paths['tar']))
+        self.assertEqual(len(pairs), 1332 + 1332 + 7)
+        self.assertEqual(pairs[0][0], 'subs/utf-8.srt')
+        self.assertEqual(pairs[-1][0], 'subs/bom-utf-16-le.srt')
+        self.assertEqual(pairs[-1][1].index, 7)
+
+    def test_wrong_encoding(self):
+        # Like pysrt.open, undecodable members are not silently mangled
+        for path in self.paths.values():
+            self.assertRaises(UnicodeDecodeError, pysrt.open_archive, path,
+                              encoding='utf_8')
+
+    def test_not_an_archive(self):
+        self.assertRaises(ValueError, pysrt.open_archive,
+                          os.path.join(STATIC_PATH, 'utf-8.srt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import gzip
+import unittest
+
+file_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.abspath(file_path))
+
+from pysrt.srtcheck import Cue, scan, check, stats, check_path, stats_path
+from pysrt.compat import str
+
+
+BROKEN = str("""1
+00:00:01,000 --> 00:00:02,000
+Hello world, far too fast to read
+
+3
+00:00:01,500 --> 00:00:01,500
+Zero
+
+bogus
+00:00:0x --> 1
+Bad
+
+4
+00:00:05,000 --> 00:00:04,000
+Negative
+""").splitlines(True)
+
+
+class TestScan(unittest.TestCase):
+
+    def test_cues(self):
+        cues = list(scan(BROKEN))
+        self.assertEqual(len(cues), 4)
+        self.assertEqual(cues[0], (1, '1', 1000, 2000, 33, 1))
+        self.assertTrue(isinstance(cues[0], Cue))
+        self.assertFalse(isinstance(cues[2], Cue))
+        self.assertEqual(cues[2][0], 9)
+
+    def test_tags_not_counted(self):
+        cue, = scan([str('1\n'), str('00:00:01,000 --> 00:00:02,000\n'),
+                     str('<i>Hi</i>\n')])
+        self.assertEqual(cue[4], 2)
+
+    def test_lenient_timestamps(self):
+        cue, = scan([str('00:01:02,5ms --> 00:01:03,000\n'), str('Hi\n')])
+        self.assertEqual(cue[1:4], (None, 62005, 63000))
+
+
+class TestCheck(unittest.TestCase):
+
+    def test_problems(self):
+        report = check(scan(BROKEN))
+        self.assertFalse(report['ok'])
+        self.assertEqual(report['cues'], 3)
+        self.assertEqual(report['counts'], {
+            'parse': 1, 'overlap': 1, 'zero_duration': 1,
+            'negative_duration': 1, 'cps': 1, 'index': 1})
+        self.assertEqual(report['examples']['overlap'],
+                         [{'line': 5, 'overlaps_line': 1, 'overlap': 500}])
+        self.assertEqual(report['examples']['index'],
+                         [{'line': 5, 'index': 3, 'expected': 2}])
+
+    def test_max_cps(self):
+        report = check(scan(BROKEN), max_cps=40)
+        self.assertEqual(report['counts']['cps'], 0)
+
+    def test_samples(self):
+        report = check(scan(BROKEN * 3), samples=2)
+        self.assertEqual(report['counts']['parse'], 3)
+        self.assertEqual(len(report['examples']['parse']), 2)
+
+    def test_clean_file(self):
+        path = os.path.join(file_path, 'tests', 'static', 'utf-8.srt')
+        report = check_path(path, max_cps=30)
+        self.assertTrue(report['ok'])
+        self.assertEqual(report['cues'], 1332)
+        self.assertEqual(report['encoding'], 'utf_8')
+
+    def test_bom(self):
+        path = os.path.join(file_path, 'tests', 'static', 'bom-utf-16-le.srt')
+        report = check_path(path)
+        self.assertEqual(report['encoding'], 'utf_16_le')
+        self.assertEqual(report['cues'], 7)
+        self.assertEqual(report['counts']['index'], 0)
+
+    def test_compressed_file(self):
+        path = os.path.join(file_path, 'tests', 'static', 'temp.srt.gz')
+        with open(os.path.join(file_path, 'tests', 'static', 'utf-8.srt'),
+                  'rb') as source:
+            target = gzip.open(path, 'wb')
+            target.write(source.read())
+            target.close()
+        try:
+            report = check_path(path, max_cps=30)
+        finally:
+            os.remove(path)
+        self.assertTrue(report['ok'])
+        self.assertEqual(report['cues'], 1332)
+
+    def test_missing_file(self):
+        report = check_path('/does/not/exist.srt')
+        self.assertFalse(report['ok'])
+        self.assertTrue('error' in report)
+
+
+class TestStats(unittest.TestCase):
+
+    def test_stats(self):
+        report = stats(scan(BROKEN))
+        self.assertEqual(report['cues'], 3)
+        self.assertEqual(report['parse_errors'], 1)
+        self.assertEqual(report['duration']['total'], 0)
+        self.assertEqual(report['duration']['min'], -1000)
+        self.assertEqual(report['duration']['histogram'][0], ['<500', 2])
+        self.assertEqual(report['cps']['max'], 33.0)
+        self.assertEqual(report['lines'], {'1': 3})
+
+    def test_empty(self):
+        report = stats([])
+        self.assertEqual(report['cues'], 0)
+        self.assertEqual(report['cps']['p50'], None)
+
+    def test_file(self):
+        path = os.path.join(file_path, 'tests', 'static', 'utf-8.srt')
+        report = stats_path(path)
+        self.assertEqual(report['cues'], 1332)
+        self.assertEqual(sum(count for _, count
+                             in report['duration']['histogram']), 1332)
+        self.assertTrue(report['cps']['p50'] <= report['cps']['p99'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,8 @@
 
 import os
 import sys
+import bz2
+import gzip
 import codecs
 from datetime import time
 import unittest
@@ -12,8 +14,14 @@ from io import StringIO
 file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, os.path.abspath(file_path))
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 import pysrt
 from pysrt import SubRipFile, SubRipItem, SubRipTime
+from pysrt.srtfile import COMPRESSIONS
 from pysrt.compat import str, open
 
 
@@ -89,6 +97,40 @@ class TestSerialization(unittest.TestCase):
                           bytes(open(self.utf8_path, 'rb').read()))
         os.remove(self.temp_path)
 
+    def test_atomic_save(self):
+        srt_file = pysrt.open(self.windows_path, encoding='windows-1252')
+        srt_file.save(self.temp_path, eol='\n', encoding='utf-8', atomic=True)
+        self.assertEqual(bytes(open(self.temp_path, 'rb').read()),
+                          bytes(open(self.utf8_path, 'rb').read()))
+        self.assertEqual([f for f in os.listdir(self.static_path)
+                          if f.endswith('.tmp')], [])
+        os.remove(self.temp_path)
+
+    def test_atomic_save_failure(self):
+        srt_file = pysrt.open(self.utf8_path)
+        srt_file.save(self.temp_path)
+
+        class BrokenItem(object):
+            def __str__(self):
+                raise ValueError()
+            __unicode__ = __str__
+
+        srt_file.append(BrokenItem())
+        self.assertRaises(ValueError, srt_file.save, self.temp_path,
+                          atomic=True)
+        self.assertEqual(len(pysrt.open(self.temp_path)), 1332)
+        self.assertEqual([f for f in os.listdir(self.static_path)
+                          if f.endswith('.tmp')], [])
+        os.remove(self.temp_path)
+
+    def test_atomic_save_bad_encoding(self):
+        srt_file = pysrt.open(self.utf8_path)
+        self.assertRaises(LookupError, srt_file.save, self.temp_path,
+                          encoding='nope', atomic=True)
+        self.assertEqual([f for f in os.listdir(self.static_path)
+                          if f.endswith('.tmp')], [])
+        self.assertFalse(os.path.exists(self.temp_path))
+
     def test_eol_conversion(self):
         input_file = open(self.windows_path, 'r', encoding='windows-1252')
         input_file.read()
@@ -121,6 +163,144 @@ class TestSlice(unittest.TestCase):
         self.assertEqual(len(self.file.at(seconds=31)), 1)
 
 
+class TestView(unittest.TestCase):
+
+    def setUp(self):
+        self.static_path = os.path.join(file_path, 'tests', 'static')
+        self.file = pysrt.open(os.path.join(self.static_path, 'utf-8.srt'))
+        self.temp_path = os.path.join(self.static_path, 'temp.srt')
+
+    def test_matches_slice(self):
+        start, end = (0, 1, 2, 3), (0, 10, 0, 0)
+        view = self.file.view(start, end)
+        clone = self.file.slice(starts_after=(0, 1, 2, 2), starts_before=end)
+        self.assertEqual(len(view), len(clone))
+        self.assertEqual(list(view), list(clone))
+        self.assertTrue(view[0] is clone[0])
+        self.assertEqual(view[-1], clone[-1])
+        self.assertEqual(view[1:3], clone[1:3])
+
+    def test_open_ended(self):
+        self.assertEqual(len(self.file.view()), 1332)
+        self.assertEqual(len(self.file.view(end=(0, 0, 0, 0))), 0)
+        self.assertEqual(len(self.file.view(start=(9, 0, 0, 0))), 0)
+        self.assertRaises(IndexError, self.file.view(end=(0, 0, 0, 0)).__getitem__, 0)
+
+    def test_shift(self):
+        view = self.file.view({'minutes': 10}, {'minutes': 20})
+        first = view[0].start.ordinal
+        view.shift(seconds=2)
+        self.assertEqual(view[0].start.ordinal, first + 2000)
+        self.assertEqual(self.file[0].start, (0, 0, 1, 0))
+
+    def test_save(self):
+        view = self.file.view(end={'minutes': 1})
+        view.save(self.temp_path)
+        self.assertEqual(list(pysrt.open(self.temp_path)), list(view))
+        os.remove(self.temp_path)
+
+    def test_write_into(self):
+        output = StringIO()
+        self.file.view(end=(0, 0, 20, 0)).write_into(output)
+        self.assertEqual(output.getvalue(), str(self.file[0]) + '\n')
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.file = pysrt.open(os.path.join(file_path, 'tests', 'static',
+                                            'utf-8.srt'))
+        self.original = [str(item) for item in self.file]
+
+    def assertOriginal(self):
+        self.assertEqual([str(item) for item in self.file], self.original)
+
+    def test_restore(self):
+        snapshot = self.file.snapshot()
+        self.assertEqual(len(snapshot), 1332)
+        self.file.shift(seconds=2)
+        self.file[10].text = 'Changed'
+        self.file[20].start += 500
+        del self.file[30:40]
+        self.file.insert(0, SubRipItem(0, 0, 1000, 'Inserted'))
+        self.file.restore(snapshot)
+        self.assertOriginal()
+
+    def test_unchanged_items_kept(self):
+        snapshot = self.file.snapshot()
+        untouched = self.file[500]
+        self.file[10].text = 'Changed'
+        changed = self.file[10]
+        self.file.restore(snapshot)
+        self.assertTrue(self.file[500] is untouched)
+        self.assertFalse(self.file[10] is changed)
+        self.assertEqual(changed.text, 'Changed')
+        self.assertOriginal()
+
+    def test_structural_sharing(self):
+        first = self.file.snapshot()
+        second = self.file.snapshot()
+        self.assertTrue(all(a is b for a, b in zip(first.chunks,
+                                                   second.chunks)))
+        self.file[300].end = SubRipTime(1, 0, 0)
+        third = self.file.snapshot()
+        shared = [a is b for a, b in zip(second.chunks, third.chunks)]
+        self.assertEqual(shared.count(False), 1)
+        changed = zip(second.chunks[1].states, third.chunks[1].states)
+        self.assertEqual([a is b for a, b in changed].count(False), 1)
+
+    def test_undo_redo(self):
+        states = [self.file.snapshot()]
+        for seconds in (1, 2, 3):
+            self.file.shift(seconds=seconds)
+            states.append(self.file.snapshot())
+        self.file.restore(states[1])
+        self.assertEqual(self.file[0].start, (0, 0, 2, 0))
+        self.file.restore(states[3])
+        self.assertEqual(self.file[0].start, (0, 0, 7, 0))
+        self.file.restore(states[0])
+        self.assertOriginal()
+
+
+class TestPartition(unittest.TestCase):
+
+    def setUp(self):
+        self.file = pysrt.open(os.path.join(file_path, 'tests', 'static',
+            'utf-8.srt'))
+
+    def test_partition_matches_slice(self):
+        limit = SubRipTime(0, 30)
+        first, second = self.file.partition([limit])
+        self.assertEqual(len(first), len(self.file.slice(starts_before=limit)))
+        self.assertEqual(len(second), len(self.file.slice(ends_after=limit)))
+
+    def test_straddling_item(self):
+        srt_file = SubRipFile([
+            SubRipItem(1, {'seconds': 1}, {'seconds': 3}, 'Hello'),
+            SubRipItem(2, {'seconds': 4}, {'seconds': 5}, 'World'),
+        ])
+        first, second = srt_file.partition([{'seconds': 2}])
+        self.assertEqual([i.text for i in first], ['Hello'])
+        self.assertEqual([i.text for i in second], ['Hello', 'World'])
+        self.assertEqual(second[1].start, (0, 0, 2, 0))
+        self.assertEqual([i.index for i in second], [1, 2])
+        self.assertEqual(srt_file[0].start, (0, 0, 1, 0))
+
+    def test_partition_by_count(self):
+        parts = self.file.partition_by_count(500)
+        self.assertEqual([len(p) for p in parts], [500, 500, 332])
+        self.assertEqual(parts[1][0].index, 1)
+        self.assertEqual(parts[1][0].start, self.file[500].start)
+
+    def test_partition_by_size(self):
+        parts = self.file.partition_by_size(20000, encoding='utf-8')
+        self.assertEqual(sum(len(p) for p in parts), len(self.file))
+        for part in parts:
+            output = StringIO()
+            part.write_into(output)
+            self.assertTrue(len(output.getvalue().encode('utf-8')) <= 20000)
+
+
 class TestShifting(unittest.TestCase):
 
     def test_shift(self):
@@ -147,6 +327,27 @@ class TestText(unittest.TestCase):
         self.assertEqual(srt_file.text, 'Hello\nWorld !')
 
 
+class TestMetrics(unittest.TestCase):
+
+    def test_metrics(self):
+        srt_file = SubRipFile([
+            SubRipItem(1, {'seconds': 0}, {'seconds': 2}, 'Hello\nWorld !'),
+            SubRipItem(2, {'seconds': 2}, {'seconds': 2}, '<i>Bye</i>'),
+        ])
+        metrics = srt_file.metrics()
+        self.assertEqual(list(metrics.duration), [2000, 0])
+        self.assertEqual(list(metrics.characters_per_second), [6.0, 0.0])
+        self.assertEqual(list(metrics.line_count), [2, 1])
+        self.assertEqual(list(metrics.max_line_width), [7, 3])
+
+    def test_consistency(self):
+        srt_file = pysrt.open(os.path.join(file_path, 'tests', 'static',
+            'utf-8.srt'))
+        metrics = srt_file.metrics()
+        self.assertEqual(list(metrics.characters_per_second),
+                         [i.characters_per_second for i in srt_file])
+
+
 class TestDuckTyping(unittest.TestCase):
 
     def setUp(self):
@@ -200,6 +401,474 @@ class TestCleanIndexes(unittest.TestCase):
             self.assertTrue(first <= second)
 
 
+class TestOverlaps(unittest.TestCase):
+
+    def setUp(self):
+        self.file = SubRipFile([
+            SubRipItem(1, 5000, 8000, 'C'),
+            SubRipItem(2, 0, 3000, 'A'),
+            SubRipItem(3, 1000, 2000, 'B'),
+            SubRipItem(4, 2500, 5000, 'D'),
+            SubRipItem(5, 9000, 10000, 'E'),
+        ])
+
+    def texts(self):
+        return [(i.index, i.start.ordinal, i.end.ordinal, i.text)
+                for i in self.file]
+
+    def test_pairs(self):
+        pairs = self.file.find_overlaps()
+        self.assertEqual([(a.text, b.text) for a, b in pairs],
+                         [('A', 'B'), ('A', 'D')])
+
+    def test_groups(self):
+        groups = self.file.find_overlaps(groups=True)
+        self.assertEqual([[i.text for i in group] for group in groups],
+                         [['A', 'B', 'D']])
+
+    def test_touching(self):
+        self.file.pop(3)
+        self.file.append(SubRipItem(6, 3000, 4000, 'F'))
+        self.assertEqual(len(self.file.find_overlaps()), 1)
+
+    def test_no_overlaps_on_file(self):
+        srt_file = pysrt.open(os.path.join(file_path, 'tests', 'static',
+                                           'utf-8.srt'))
+        self.assertEqual(srt_file.find_overlaps(), [])
+
+    def test_trim(self):
+        self.file.fix_overlaps('trim')
+        self.assertEqual(self.texts(), [
+            (1, 0, 1000, 'A'), (2, 1000, 2000, 'B'), (3, 2500, 5000, 'D'),
+            (4, 5000, 8000, 'C'), (5, 9000, 10000, 'E')])
+        self.assertEqual(self.file.find_overlaps(), [])
+
+    def test_trim_same_start(self):
+        self.file.append(SubRipItem(7, 9000, 9500, 'F'))
+        self.file.fix_overlaps('trim')
+        self.assertEqual(self.texts()[-1], (5, 9000, 10000, 'F\nE'))
+        self.assertTrue(all(item.duration.ordinal > 0 for item in self.file))
+
+    def test_merge(self):
+        self.file.fix_overlaps('merge')
+        self.assertEqual(self.texts(), [
+            (1, 0, 5000, 'A\nB\nD'), (2, 5000, 8000, 'C'),
+            (3, 9000, 10000, 'E')])
+
+    def test_stack(self):
+        self.file.fix_overlaps('stack')
+        self.assertEqual(self.texts(), [
+            (1, 0, 1000, 'A'), (2, 1000, 2000, 'A\nB'), (3, 2000, 2500, 'A'),
+            (4, 2500, 3000, 'A\nD'), (5, 3000, 5000, 'D'),
+            (6, 5000, 8000, 'C'), (7, 9000, 10000, 'E')])
+        self.assertEqual(self.file.find_overlaps(), [])
+
+    def test_unknown_strategy(self):
+        self.assertRaises(ValueError, self.file.fix_overlaps, 'drop')
+
+
+class TestRetime(unittest.TestCase):
+
+    def test_retime(self):
+        srt_file = SubRipFile([SubRipItem(1, 0, 1000, 'a'),
+                               SubRipItem(2, 10000, 11000, 'b'),
+                               SubRipItem(3, 20000, 21000, 'c')])
+        srt_file.retime([(10000, 10000), ('00:00:20,000', (0, 0, 22, 0))])
+        self.assertEqual([(i.start.ordinal, i.end.ordinal) for i in srt_file],
+                         [(-2000, -800), (10000, 11200), (22000, 23200)])
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestEstimateAlignment(unittest.TestCase):
+
+    def test_estimate_alignment(self):
+        path = os.path.join(file_path, 'tests', 'static', 'utf-8.srt')
+        reference, srt_file = pysrt.open(path), pysrt.open(path)
+        srt_file.shift(seconds=-4, ratio=25 / 24.0)
+        srt_file.shift(**srt_file.estimate_alignment(reference))
+        for item, reference_item in zip(srt_file, reference):
+            self.assertTrue(abs(item.start.ordinal -
+                                reference_item.start.ordinal) <= 2)
+
+
+class TestFrames(unittest.TestCase):
+
+    def setUp(self):
+        self.file = SubRipFile([SubRipItem(1, 1000, 2010, 'a'),
+                                SubRipItem(2, 2021, 3000, 'b')])
+
+    def test_to_frames(self):
+        starts, ends = self.file.to_frames('24000/1001')
+        self.assertEqual((list(starts), list(ends)), ([24, 48], [48, 72]))
+
+    def test_from_frames(self):
+        self.file.from_frames(([0, 25], [25, 50]), 25)
+        self.assertEqual([(i.start.ordinal, i.end.ordinal) for i in self.file],
+                         [(0, 1000), (1000, 2000)])
+        self.assertRaises(ValueError, self.file.from_frames, ([0], [1]), 25)
+
+    def test_snap_to_frames(self):
+        self.file.snap_to_frames(25)
+        self.assertEqual([(i.start.ordinal, i.end.ordinal) for i in self.file],
+                         [(1000, 2000), (2040, 3000)])
+
+
+class TestNormalizeTiming(unittest.TestCase):
+
+    def test_normalize_timing(self):
+        srt_file = pysrt.open(os.path.join(file_path, 'tests', 'static',
+                                           'utf-8.srt'))
+        srt_file.normalize_timing(min_duration={'seconds': 1}, min_gap=100,
+                                  max_duration=(0, 0, 7, 0))
+        metrics = srt_file.metrics()
+        self.assertTrue(min(metrics.duration) >= 1000)
+        self.assertTrue(max(metrics.duration) <= 7000)
+        for first, second in zip(srt_file[:-1], srt_file[1:]):
+            self.assertTrue(second.start.ordinal - first.end.ordinal >= 100)
+
+
+class TestResegment(unittest.TestCase):
+
+    def test_resegment(self):
+        srt_file = pysrt.open(os.path.join(file_path, 'tests', 'static',
+                                           'utf-8.srt'))
+        text = ' '.join(srt_file.text.split())
+        srt_file.resegment(target_cps=17, max_chars=84, max_duration=7000)
+        self.assertTrue(len(srt_file) < 1332)
+        self.assertEqual(' '.join(srt_file.text.split()), text)
+        self.assertEqual([i.index for i in srt_file],
+                         list(range(1, len(srt_file) + 1)))
+        metrics = srt_file.metrics()
+        self.assertTrue(max(metrics.duration) <= 7000)
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.static_path = os.path.join(file_path, 'tests', 'static')
+        self.temp_path = os.path.join(self.static_path, 'indexed.srt')
+
+    def tearDown(self):
+        for path in (self.temp_path, self.temp_path + '.srtidx'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def copy(self, name):
+        with open(os.path.join(self.static_path, name), 'rb') as source:
+            with open(self.temp_path, 'wb') as target:
+                target.write(source.read())
+
+    def assertWindows(self, **kwargs):
+        full = pysrt.open(self.temp_path, **kwargs)
+        for start, end in ((0, 1000), (27074, 27075), ((0, 10, 0, 0),
+                           (0, 12, 30, 0)), (0, (100, 0, 0, 0)),
+                           ((100, 0, 0, 0), (101, 0, 0, 0))):
+            part = pysrt.open(self.temp_path, between=(start, end), **kwargs)
+            start = SubRipTime.coerce(start)
+            end = SubRipTime.coerce(end)
+            self.assertEqual([str(item) for item in part],
+                             [str(item) for item in full
+                              if item.end > start and item.start < end])
+        return part
+
+    def test_between(self):
+        self.copy('utf-8.srt')
+        index = SubRipFile.build_index(self.temp_path, block_size=16)
+        self.assertEqual(len(index), 84)
+        self.assertEqual(len(self.assertWindows()), 0)
+        part = pysrt.open(self.temp_path, between=(27074, 27075))
+        self.assertEqual(part[0].index, 1)
+        self.assertEqual(part.eol, '\n')
+
+    def test_bom(self):
+        self.copy('bom-utf-16-le.srt')
+        index = SubRipFile.build_index(self.temp_path, block_size=1)
+        self.assertEqual(index.encoding, 'utf_16_le')
+        self.assertWindows()
+        part = pysrt.open(self.temp_path, between=(0, (100, 0, 0, 0)))
+        self.assertEqual(part[0].index, 1)
+
+    def test_encoding(self):
+        self.copy('windows-1252.srt')
+        SubRipFile.build_index(self.temp_path, encoding='windows-1252')
+        self.assertWindows(encoding='windows-1252')
+
+    def test_byte_order_mark_codec(self):
+        self.copy('bom-utf-16-le.srt')
+        with open(self.temp_path, 'rb') as source:
+            text = source.read().decode('utf_16')
+        for bom, encoding in ((codecs.BOM_UTF16_LE, 'utf_16_le'),
+                              (codecs.BOM_UTF16_BE, 'utf_16_be')):
+            with open(self.temp_path, 'wb') as target:
+                target.write(bom + text.encode(encoding))
+            SubRipFile.build_index(self.temp_path, encoding='utf-16',
+                                   block_size=1)
+            self.assertWindows(encoding='utf-16')
+
+    def test_other_encoding(self):
+        self.copy('utf-8.srt')
+        SubRipFile.build_index(self.temp_path, block_size=16)
+        part = self.assertWindows(encoding='latin-1')
+        self.assertEqual(part.encoding, 'latin-1')
+
+    def test_compressed(self):
+        self.temp_path += '.gz'
+        with open(os.path.join(self.static_path, 'utf-8.srt'), 'rb') as source:
+            with gzip.open(self.temp_path, 'wb') as target:
+                target.write(source.read())
+        SubRipFile.build_index(self.temp_path, block_size=16)
+        self.assertWindows()
+        part = pysrt.open(self.temp_path, between=((0, 10, 0, 0),
+                                                   (100, 0, 0, 0)))
+        self.assertEqual(part[-1].index, 1331)
+
+    def test_without_index(self):
+        self.copy('utf-8.srt')
+        self.assertWindows()
+
+    def test_stale_index(self):
+        self.copy('utf-8.srt')
+        SubRipFile.build_index(self.temp_path, block_size=16)
+        subs = pysrt.open(self.temp_path)
+        del subs[:5]
+        subs.save(self.temp_path)
+        self.assertEqual(SubRipFile._load_index(self.temp_path), None)
+        self.assertWindows()
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.static_path = os.path.join(file_path, 'tests', 'static')
+        self.temp_paths = []
+
+    def tearDown(self):
+        for path in self.temp_paths:
+            for leftover in (path, path + '.srtidx'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def temp_path(self, name):
+        path = os.path.join(self.static_path, name)
+        self.temp_paths.append(path)
+        return path
+
+    def compressed(self, source_name, name, opener):
+        with open(os.path.join(self.static_path, source_name), 'rb') as source:
+            content = source.read()
+        path = self.temp_path(name)
+        target = opener(path, 'wb')
+        target.write(content)
+        target.close()
+        return path
+
+    def assertSameItems(self, subs, name, **kwargs):
+        expected = pysrt.open(os.path.join(self.static_path, name), **kwargs)
+        self.assertEqual([str(item) for item in subs],
+                         [str(item) for item in expected])
+
+    def test_open(self):
+        for extension, _, opener in COMPRESSIONS:
+            path = self.compressed('utf-8.srt', 'temp.srt' + extension,
+                                   opener)
+            self.assertSameItems(pysrt.open(path), 'utf-8.srt')
+
+    def test_bom(self):
+        path = self.compressed('bom-utf-16-le.srt', 'temp.srt.gz', gzip.open)
+        subs = pysrt.open(path)
+        self.assertEqual(subs.encoding, 'utf_16_le')
+        self.assertEqual(subs[0].index, 1)
+        self.assertSameItems(subs, 'bom-utf-16-le.srt')
+
+    def test_magic_bytes(self):
+        path = self.compressed('windows-1252.srt', 'temp.srt', bz2.BZ2File)
+        self.assertSameItems(pysrt.open(path, encoding='windows-1252'),
+                             'windows-1252.srt', encoding='windows-1252')
+        path = self.compressed('utf-8.srt', 'plain.srt.gz', open)
+        self.assertSameItems(pysrt.open(path), 'utf-8.srt')
+
+    def test_save(self):
+        subs = pysrt.open(os.path.join(self.static_path, 'utf-8.srt'))
+        with open(os.path.join(self.static_path, 'utf-8.srt'), 'rb') as source:
+            expected = source.read()
+        for extension, _, opener in COMPRESSIONS:
+            for atomic in (False, True):
+                path = self.temp_path('temp.srt' + extension.upper())
+                subs.save(path, eol='\n', atomic=atomic)
+                saved = opener(path, 'rb')
+                self.assertEqual(saved.read(), expected)
+                saved.close()
+        self.assertEqual([f for f in os.listdir(self.static_path)
+                          if f.endswith('.tmp')], [])
+
+    def test_between(self):
+        path = self.compressed('utf-8.srt', 'temp.srt.gz', gzip.open)
+        SubRipFile.build_index(path, block_size=16)
+        part = pysrt.open(path, between=((0, 10, 0, 0), (0, 10, 10, 0)))
+        full = pysrt.open(path)
+        self.assertEqual([str(item) for item in part],
+                         [str(item) for item in full
+                          if item.end > (0, 10, 0, 0) and
+                          item.start < (0, 10, 10, 0)])
+        self.assertTrue(len(part))
+
+
+class TestFollow(unittest.TestCase):
+
+    def setUp(self):
+        self.static_path = os.path.join(file_path, 'tests', 'static')
+        self.temp_path = os.path.join(self.static_path, 'follow.srt')
+        with open(os.path.join(self.static_path, 'utf-8.srt'), 'rb') as source:
+            self.content = source.read()
+        self.write(b'')
+
+    def tearDown(self):
+        for path in (self.temp_path, self.temp_path + '.1'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def write(self, data, mode='wb'):
+        with open(self.temp_path, mode) as target:
+            target.write(data)
+
+    def test_growing_file(self):
+        subs = SubRipFile.follow(self.temp_path)
+        self.assertEqual(len(subs), 0)
+        read = []
+        for offset in range(0, 2100, 7):
+            self.write(self.content[offset:offset + 7], 'ab')
+            read.extend(subs.refresh())
+        self.write(self.content[2100:], 'ab')
+        read.extend(subs.refresh())
+        self.assertEqual(subs.refresh(), [])
+        expected = pysrt.open(os.path.join(self.static_path, 'utf-8.srt'))
+        self.assertEqual([str(item) for item in read],
+                         [str(item) for item in expected])
+        self.assertEqual(len(subs), 1332)
+        self.assertEqual(subs.eol, '\n')
+
+    def test_incomplete_item(self):
+        self.write(b'1\r\n00:00:01,000 --> 00:00:02,000\r\nHello\r')
+        subs = SubRipFile.follow(self.temp_path)
+        self.assertEqual(len(subs), 0)
+        self.write(b'\nworld\r\n\r', 'ab')
+        self.assertEqual(subs.refresh(), [])
+        self.write(b'\n', 'ab')
+        item, = subs.refresh()
+        self.assertEqual(item.text, 'Hello\nworld')
+        self.assertEqual(subs.eol, '\r\n')
+
+    def test_truncation(self):
+        self.write(self.content)
+        subs = SubRipFile.follow(self.temp_path)
+        self.assertEqual(len(subs), 1332)
+        self.write(b'1\n00:00:01,000 --> 00:00:02,000\nAgain\n\n')
+        self.assertEqual([item.text for item in subs.refresh()], ['Again'])
+        self.assertEqual(len(subs), 1)
+
+    def test_truncation_and_growth(self):
+        self.write(self.content[:500])
+        subs = SubRipFile.follow(self.temp_path)
+        self.write(b'1\n00:00:01,000 --> 00:00:02,000\nAgain\n\n' * 20)
+        self.assertEqual([item.text for item in subs.refresh()],
+                         ['Again'] * 20)
+        self.assertEqual(len(subs), 20)
+
+    def test_rotation(self):
+        self.write(self.content)
+        subs = SubRipFile.follow(self.temp_path)
+        os.rename(self.temp_path, self.temp_path + '.1')
+        self.assertEqual(subs.refresh(), [])
+        self.write(self.content[:100])
+        self.assertEqual(len(subs.refresh()), 1)
+        self.assertEqual(len(subs), 1)
+
+    def test_bom(self):
+        with open(os.path.join(self.static_path, 'bom-utf-16-le.srt'),
+                  'rb') as source:
+            content = source.read()
+        self.write(content[:1])
+        subs = SubRipFile.follow(self.temp_path)
+        self.write(content[1:], 'ab')
+        subs.refresh()
+        self.assertEqual(subs.encoding, 'utf_16_le')
+        self.assertEqual(len(subs), 7)
+        self.assertEqual(subs[0].index, 1)
+
+    def test_not_followed(self):
+        self.assertRaises(ValueError, SubRipFile().refresh)
+
+
+class TestParser(unittest.TestCase):
+
+    def setUp(self):
+        self.static_path = os.path.join(file_path, 'tests', 'static')
+
+    def read(self, name):
+        with open(os.path.join(self.static_path, name), 'rb') as source:
+            return source.read()
+
+    def parse(self, content, size, **kwargs):
+        parser = pysrt.SubRipParser(**kwargs)
+        items = []
+        for offset in range(0, len(content), size):
+            items.extend(parser.feed(content[offset:offset + size]))
+        return parser, items + parser.close()
+
+    def assertSameItems(self, items, name, **kwargs):
+        expected = pysrt.open(os.path.join(self.static_path, name), **kwargs)
+        self.assertEqual([str(item) for item in items],
+                         [str(item) for item in expected])
+
+    def test_chunks(self):
+        content = self.read('utf-8.srt')
+        for size in (1, 7, 4096, len(content)):
+            parser, items = self.parse(content, size)
+            self.assertSameItems(items, 'utf-8.srt')
+            self.assertEqual(parser.encoding, 'utf_8')
+            self.assertEqual(parser.eol, '\n')
+
+    def test_items_emitted_early(self):
+        parser = pysrt.SubRipParser()
+        self.assertEqual(parser.feed(b'1\r\n00:00:01,000 --> 00:00:02,000'
+                                     b'\r\nHello\r\n\r'), [])
+        item, = parser.feed(b'\n2\r\n00:00:03,000 --> 00:00:04,000\r\n')
+        self.assertEqual(item.text, 'Hello')
+        self.assertEqual(parser.eol, '\r\n')
+        self.assertEqual(parser.feed(b'World'), [])
+        item, = parser.close()
+        self.assertEqual((item.index, item.text), (2, 'World'))
+
+    def test_bom(self):
+        for name, encoding in (('bom-utf-8.srt', 'utf_8'),
+                               ('bom-utf-16-le.srt', 'utf_16_le'),
+                               ('bom-utf-16-be.srt', 'utf_16_be'),
+                               ('bom-utf-32-le.srt', 'utf_32_le'),
+                               ('bom-utf-32-be.srt', 'utf_32_be')):
+            parser, items = self.parse(self.read(name), 1)
+            self.assertEqual(parser.encoding, encoding)
+            self.assertSameItems(items, name)
+            self.assertEqual(items[0].index, 1)
+
+    def test_claimed_encoding(self):
+        parser, items = self.parse(self.read('windows-1252.srt'), 3,
+                                   encoding='windows-1252')
+        self.assertSameItems(items, 'windows-1252.srt',
+                             encoding='windows-1252')
+        parser, items = self.parse(self.read('bom-utf-8.srt'), 2,
+                                   encoding='utf-8')
+        self.assertEqual(items[0].index, 1)
+
+    def test_truncated_character(self):
+        parser = pysrt.SubRipParser()
+        parser.feed(b'1\n00:00:01,000 --> 00:00:02,000\n\xc3')
+        self.assertRaises(UnicodeDecodeError, parser.close)
+
+    def test_error_handling(self):
+        parser = pysrt.SubRipParser(error_handling=SubRipFile.ERROR_RAISE)
+        self.assertRaises(pysrt.Error, parser.feed, b'1\nfoo\nbar\n\n')
+
+
 class TestBOM(unittest.TestCase):
     "In response of issue #6 https://github.com/byroot/pysrt/issues/6"
 
@@ -226,6 +895,11 @@ class TestBOM(unittest.TestCase):
     def test_utf32be(self):
         self.__test_encoding('bom-utf-32-be.srt')
 
+    def test_claimed_encoding(self):
+        srt_file = pysrt.open(os.path.join(self.base_path, 'bom-utf-8.srt'),
+                              encoding='utf-8')
+        self.assertEqual(srt_file[0].index, 1)
+
 
 class TestIntegration(unittest.TestCase):
     """
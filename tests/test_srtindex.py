@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import codecs
+import unittest
+
+file_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.abspath(file_path))
+
+from pysrt import SubRipItem
+from pysrt.srtindex import SubRipIndex, item_offsets, index_path
+from pysrt.compat import str
+
+
+class Status(object):
+
+    def __init__(self, size, mtime=1.5):
+        self.st_size = size
+        self.st_mtime = mtime
+
+
+def offsets(timings):
+    return [(number * 10, SubRipItem(number + 1, start, end))
+            for number, (start, end) in enumerate(timings)]
+
+
+class TestItemOffsets(unittest.TestCase):
+
+    def test_offsets(self):
+        lines = (u'1\n00:00:01,000 --> 00:00:02,000\nHé\n\n'
+                 'bogus\n\n\n'
+                    '2\n00:00:03,000 --> 00:00:04,000\nHo').splitlines(True)
+        for encoding, bom in (('utf_8', 3), ('utf_16_le', 2)):
+            found = list(item_offsets(lines, bom, encoding))
+            self.assertEqual([item.index for _, item in found], [1, 2])
+            content = codecs.BOM_UTF8 if bom == 3 else codecs.BOM_UTF16_LE
+            content += ''.join(lines).encode(encoding)
+            second = content[found[1][0]:].decode(encoding)
+            self.assertTrue(second.startswith('2\n00:00:03,000'))
+
+
+class TestSubRipIndex(unittest.TestCase):
+
+    def setUp(self):
+        # Second block starts early, third one ends late
+        self.index = SubRipIndex.build(
+            offsets([(0, 1000), (1000, 2000), (500, 3000), (3000, 4000),
+                     (4000, 9000), (5000, 6000), (6000, 7000)]),
+            Status(70), 'utf_8', block_size=2)
+
+    def test_build(self):
+        self.assertEqual(self.index.offsets, [0, 20, 40, 60])
+        self.assertEqual(self.index.ends, [2000, 4000, 9000, 9000])
+        self.assertEqual(self.index.starts, [0, 500, 4000, 6000])
+
+    def test_byte_range(self):
+        self.assertEqual(self.index.byte_range(0, 100), (0, 20))
+        self.assertEqual(self.index.byte_range(2500, 2600), (20, 40))
+        self.assertEqual(self.index.byte_range(8000, 8500), (40, None))
+        self.assertEqual(self.index.byte_range(9000, 10000), (0, 0))
+
+    def test_empty(self):
+        index = SubRipIndex.build([], Status(0), 'utf_8')
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.byte_range(0, 1000), (0, 0))
+
+    def test_save_and_load(self):
+        path = os.path.join(file_path, 'tests', 'static', 'temp.srt')
+        self.index.save(index_path(path))
+        try:
+            loaded = SubRipIndex.load(index_path(path))
+        finally:
+            os.remove(index_path(path))
+        for name in ('size', 'mtime', 'encoding', 'block_size', 'ends',
+                     'starts', 'offsets'):
+            self.assertEqual(getattr(loaded, name), getattr(self.index, name))
+
+    def test_load_invalid(self):
+        path = os.path.join(file_path, 'tests', 'static', 'utf-8.srt')
+        self.assertRaises(ValueError, SubRipIndex.load, path)
+
+    def test_is_valid_for(self):
+        path = os.path.join(file_path, 'tests', 'static', 'utf-8.srt')
+        status = os.stat(path)
+        self.assertTrue(SubRipIndex.build([], status, 'utf_8')
+                        .is_valid_for(path))
+        self.assertFalse(SubRipIndex.build([], Status(status.st_size),
+                                           'utf_8').is_valid_for(path))
+        self.assertFalse(self.index.is_valid_for('/does/not/exist.srt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -71,6 +71,36 @@ class TestCPS(unittest.TestCase):
 	    self.assertEqual(self.item.characters_per_second, 2.45)
 
 
+class TestTextMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.item = SubRipItem(1, text="Hello world !")
+        self.item.shift(minutes=1)
+        self.item.end.shift(seconds=20)
+
+    def test_metrics(self):
+        self.item.text = "<i>Hello</i>\nworld !"
+        self.assertEqual(self.item.characters_count, 12)
+        self.assertEqual(self.item.line_count, 2)
+        self.assertEqual(self.item.max_line_width, 7)
+
+    def test_text_change_invalidates(self):
+        self.assertEqual(self.item.text_without_tags, 'Hello world !')
+        self.item.text = "<b>Bye</b>"
+        self.assertEqual(self.item.text_without_tags, 'Bye')
+        self.assertEqual(self.item.characters_count, 3)
+
+    def test_timing_change(self):
+        self.assertEqual(self.item.characters_per_second, 0.65)
+        self.item.end.shift(seconds=-10)
+        self.assertEqual(self.item.characters_per_second, 1.3)
+
+    def test_empty_text(self):
+        self.item.text = ''
+        self.assertEqual(self.item.line_count, 0)
+        self.assertEqual(self.item.max_line_width, 0)
+
+
 class TestTagRemoval(unittest.TestCase):
 
     def setUp(self):
@@ -132,6 +162,46 @@ class TestShifting(unittest.TestCase):
         self.assertEqual(self.item.characters_per_second, 0.325)
 
 
+class TestState(unittest.TestCase):
+
+    def setUp(self):
+        self.item = SubRipItem(1, 1000, 2000, 'Hello world !')
+        self.state = self.item._get_state()
+
+    def test_cached(self):
+        self.assertEqual(self.state, (1, 1000, 2000, 'Hello world !', ''))
+        self.assertTrue(self.item._get_state() is self.state)
+
+    def assertReset(self):
+        state = self.item._get_state()
+        self.assertFalse(state is self.state)
+        self.assertNotEqual(state, self.state)
+
+    def test_text(self):
+        self.item.text = 'Bye'
+        self.assertReset()
+
+    def test_timing(self):
+        self.item.end += 500
+        self.assertReset()
+
+    def test_index_and_position(self):
+        self.item.index = 2
+        self.assertReset()
+        self.state = self.item._get_state()
+        self.item.position = 'X1:1'
+        self.assertReset()
+
+    def test_shift(self):
+        self.item.shift(seconds=1)
+        self.assertReset()
+
+    def test_from_state(self):
+        item = SubRipItem._from_state(self.state)
+        self.assertEqual(str(item), str(self.item))
+        self.assertTrue(item._get_state() is self.state)
+
+
 class TestOperators(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import unittest
+
+file_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.abspath(file_path))
+
+from pysrt import SubRipFile, SubRipItem
+from pysrt.srttext import LineWrapper, display_width
+from pysrt.compat import str
+
+
+class TestDisplayWidth(unittest.TestCase):
+
+    def test_ascii(self):
+        self.assertEqual(display_width('Hello'), 5)
+
+    def test_tags(self):
+        self.assertEqual(display_width('<i>Hello</i>'), 5)
+
+    def test_east_asian_wide(self):
+        self.assertEqual(display_width(u'中文字幕'), 8)
+        self.assertEqual(display_width(u'<b>中文</b> ok'), 7)
+
+
+class TestLineWrapper(unittest.TestCase):
+
+    def test_short_line(self):
+        self.assertEqual(LineWrapper(20).wrap('Hello world'), 'Hello world')
+
+    def test_greedy(self):
+        wrapper = LineWrapper(20)
+        self.assertEqual(
+            wrapper.wrap('Hello world this is a rather long subtitle'),
+            'Hello world this is\na rather long\nsubtitle')
+
+    def test_balanced(self):
+        wrapper = LineWrapper(30, balanced=True)
+        self.assertEqual(
+            wrapper.wrap('Hello world this is a rather long subtitle'),
+            'Hello world this is a\nrather long subtitle')
+
+    def test_reflow(self):
+        wrapper = LineWrapper(11, reflow=True)
+        self.assertEqual(wrapper.wrap('Hello there my\nfriend'),
+                         'Hello there\nmy friend')
+        self.assertEqual(wrapper.wrap('Hello\nworld'), 'Hello\nworld')
+
+    def test_keep_lines(self):
+        wrapper = LineWrapper(42)
+        for text in (u'Hello there\n你好', '- Yes.\n- No.'):
+            self.assertEqual(wrapper.wrap(text), text)
+        self.assertEqual(LineWrapper(11).wrap('Hello there my\nfriend'),
+                         'Hello there\nmy\nfriend')
+
+    def test_east_asian_width(self):
+        wrapped = LineWrapper(10).wrap(u'这是一个很长的中文字幕')
+        self.assertEqual(wrapped, u'这是一个很\n长的中文字\n幕')
+
+    def test_no_break_before_punctuation(self):
+        wrapped = LineWrapper(10).wrap(u'这是一个很。长的中文字幕')
+        self.assertEqual(wrapped, u'这是一个\n很。长的中\n文字幕')
+
+    def test_reflow_ideographs(self):
+        self.assertEqual(LineWrapper(6, reflow=True).wrap(u'中文字幕\n好'),
+                         u'中文字\n幕好')
+
+    def test_tags_are_not_broken(self):
+        wrapped = LineWrapper(12).wrap(
+            '<font color="#ff0000">Hello</font> dear world')
+        self.assertEqual(wrapped, '<font color="#ff0000">Hello</font> dear\n'
+                                  'world')
+
+    def test_max_lines(self):
+        wrapped = LineWrapper(10, max_lines=2).wrap(
+            'aaa bbb ccc ddd eee fff ggg hhh')
+        self.assertEqual(wrapped, 'aaa bbb ccc ddd\neee fff ggg hhh')
+
+    def test_long_word(self):
+        self.assertEqual(LineWrapper(3).wrap('abcdef a'), 'abcdef\na')
+
+    def test_memoization(self):
+        wrapper = LineWrapper(5)
+        wrapper.wrap('Hello world')
+        self.assertEqual(wrapper._cache, {'Hello world': 'Hello\nworld'})
+
+    def test_wrap_items(self):
+        items = [SubRipItem(text='Hello world'), SubRipItem(text='Hi')]
+        wrapped = list(LineWrapper(5).wrap_items(iter(items)))
+        self.assertEqual([i.text for i in wrapped], ['Hello\nworld', 'Hi'])
+
+
+class TestWrap(unittest.TestCase):
+
+    def test_item(self):
+        item = SubRipItem(text='Hello world')
+        item.wrap(5)
+        self.assertEqual(item.text, 'Hello\nworld')
+
+    def test_file(self):
+        srt_file = SubRipFile([SubRipItem(text='Hello world'),
+                               SubRipItem(text=u'中文字幕')])
+        srt_file.wrap(5)
+        self.assertEqual(srt_file.text, u'Hello\nworld\n中文\n字幕')
+
+
+if __name__ == '__main__':
+    unittest.main()
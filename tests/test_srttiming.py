@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+file_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.abspath(file_path))
+
+from pysrt import SubRipItem
+from pysrt import SubRipFile
+from fractions import Fraction
+from pysrt.srttiming import normalize_timing, resegment, map_ordinals, \
+    estimate_alignment, frame_rate, to_frames, from_frames
+
+
+def items(*timings):
+    return [SubRipItem(index + 1, start, end, text)
+            for index, (start, end, text) in enumerate(timings)]
+
+
+def timings(items):
+    return [(i.start.ordinal, i.end.ordinal) for i in items]
+
+
+class TestFrames(unittest.TestCase):
+
+    def test_frame_rate(self):
+        self.assertEqual(frame_rate(25), 25)
+        self.assertEqual(frame_rate('24000/1001'), Fraction(24000, 1001))
+        self.assertEqual(frame_rate('23.976'), Fraction(24000, 1001))
+        self.assertEqual(frame_rate(29.97), Fraction(30000, 1001))
+        self.assertEqual(frame_rate('23.9'), Fraction(239, 10))
+        self.assertRaises(ValueError, frame_rate, 0)
+        self.assertRaises(ValueError, frame_rate, 'fast')
+
+    def test_to_frames(self):
+        self.assertEqual(list(to_frames([0, 19, 20, 60, 3600000], 25)),
+                         [0, 0, 1, 2, 90000])
+        self.assertEqual(list(to_frames([3600000], '24000/1001')), [86314])
+
+    def test_from_frames(self):
+        self.assertEqual(list(from_frames([0, 1, 2, 90000], 25)),
+                         [0, 40, 80, 3600000])
+        self.assertEqual(list(from_frames([1, 86314], '24000/1001')),
+                         [42, 3600013])
+
+    def test_round_trip(self):
+        frames = list(range(0, 200000, 7))
+        for fps in (25, '24000/1001', '30000/1001', 50):
+            self.assertEqual(list(to_frames(from_frames(frames, fps), fps)),
+                             frames)
+
+
+class TestMapOrdinals(unittest.TestCase):
+
+    def test_offset(self):
+        self.assertEqual(list(map_ordinals([0, 1500], [(1000, 3000)])),
+                         [2000, 3500])
+
+    def test_interpolation(self):
+        anchors = [(0, 0), (10000, 10000), (20000, 30000)]
+        self.assertEqual(list(map_ordinals([5000, 15000, 20000], anchors)),
+                         [5000, 20000, 30000])
+
+    def test_extrapolation(self):
+        anchors = [((0, 1, 0, 0), (0, 1, 0, 500)), ((0, 2, 0, 0), (0, 2, 1, 0))]
+        self.assertEqual(list(map_ordinals([0, 180000], anchors)),
+                         [0, 181500])
+
+    def test_unsorted_anchors(self):
+        self.assertEqual(list(map_ordinals([5], [(10, 20), (0, 0)])), [10])
+
+    def test_invalid_anchors(self):
+        self.assertRaises(ValueError, map_ordinals, [0], [])
+        self.assertRaises(ValueError, map_ordinals, [0], [(0, 1), (0, 2)])
+
+
+class TestNormalizeTiming(unittest.TestCase):
+
+    def test_min_duration(self):
+        result = normalize_timing(items((0, 500, 'a'), (5000, 5200, 'b')),
+                                  min_duration=1000)
+        self.assertEqual(timings(result), [(0, 1000), (5000, 6000)])
+
+    def test_min_duration_backward(self):
+        result = normalize_timing(items((0, 1000, 'a'), (3000, 3200, 'b'),
+                                        (3300, 5000, 'c')),
+                                  min_duration=1000, min_gap=100)
+        self.assertEqual(timings(result),
+                         [(0, 1000), (2200, 3200), (3300, 5000)])
+
+    def test_first_item_backward(self):
+        result = normalize_timing(items((500, 1000, 'a'), (1000, 3000, 'b')),
+                                  min_duration=2000)
+        self.assertEqual(timings(result), [(0, 1000), (1000, 3000)])
+
+    def test_max_duration(self):
+        result = normalize_timing(items((0, 10000, 'a')), max_duration=7000)
+        self.assertEqual(timings(result), [(0, 7000)])
+
+    def test_min_gap(self):
+        result = normalize_timing(items((0, 2000, 'a'), (1950, 3000, 'b')),
+                                  min_gap=100)
+        self.assertEqual(timings(result), [(0, 1850), (1950, 3000)])
+
+    def test_max_cps(self):
+        result = normalize_timing(items((0, 1000, '<i>Twenty characters!!!</i>'),
+                                        (10000, 11000, '')),
+                                  max_cps=10)
+        self.assertEqual(timings(result), [(0, 2000), (10000, 11000)])
+
+    def test_streaming(self):
+        def source():
+            for item in items((0, 500, 'a'), (600, 700, 'b')):
+                yield item
+        result = normalize_timing(source(), min_duration=200)
+        first = next(result)
+        self.assertEqual(timings([first]), [(0, 500)])
+        self.assertEqual(timings(result), [(600, 800)])
+
+    def test_empty(self):
+        self.assertEqual(list(normalize_timing([], min_duration=1000)), [])
+
+
+
+class TestResegment(unittest.TestCase):
+
+    def texts(self, items):
+        return [(i.index, i.start.ordinal, i.end.ordinal, i.text)
+                for i in items]
+
+    def test_merge(self):
+        result = resegment(items((0, 500, 'so'), (500, 1000, 'I went'),
+                                 (1100, 1600, 'to the'),
+                                 (1600, 2000, 'store')),
+                           max_chars=12)
+        self.assertEqual(self.texts(result), [(1, 0, 1000, 'so I went'),
+                                              (2, 1100, 2000, 'to the store')])
+
+    def test_max_gap(self):
+        result = resegment(items((0, 500, 'a'), (2000, 2500, 'b')))
+        self.assertEqual(len(list(result)), 2)
+        result = resegment(items((0, 500, 'a'), (2000, 2500, 'b')),
+                           max_gap=1500)
+        self.assertEqual(self.texts(result), [(1, 0, 2500, 'a b')])
+
+    def test_target_cps(self):
+        source = items((0, 1000, 'ten chars.'), (1000, 1100, 'ten chars.'))
+        self.assertEqual(len(list(resegment(source, target_cps=10))), 1)
+        source = items((0, 1000, 'ten chars.'), (1000, 1100, 'a'))
+        self.assertEqual(len(list(resegment(source, target_cps=10.5))), 2)
+
+    def test_only_target_cps(self):
+        source = items(*[(start, start + 2000, 'ten chars.')
+                         for start in range(0, 40000, 2000)])
+        self.assertEqual(list(resegment(source, target_cps=17)), source)
+        # A fast item takes its neighbour in, until read slowly enough
+        source = items((0, 200, 'ten chars.'), (200, 2200, 'ten chars.'),
+                       (2200, 4200, 'ten chars.'))
+        self.assertEqual(self.texts(resegment(source, target_cps=17)),
+                         [(1, 0, 2200, 'ten chars. ten chars.'),
+                          (2, 2200, 4200, 'ten chars.')])
+
+    def test_merged_size(self):
+        source = items(*[(start, start + 200, 'word')
+                         for start in range(0, 20000, 200)])
+        result = list(resegment(source, target_cps=100))
+        self.assertEqual(len(result), 6)
+        self.assertTrue(all(item.characters_count <= 84 for item in result))
+        self.assertTrue(all(item.duration.ordinal <= 7000 for item in result))
+
+    def test_untouched(self):
+        source = items((0, 1000, 'a'), (5000, 6000, 'b'))
+        self.assertEqual(list(resegment(source)), source)
+
+    def test_split(self):
+        result = resegment(items((0, 2300, 'aaaa bbbb\ncccc dddd eeee')),
+                           max_chars=10)
+        self.assertEqual(self.texts(result), [(1, 0, 958, 'aaaa bbbb'),
+                                              (2, 958, 1438, 'cccc'),
+                                              (3, 1438, 2300, 'dddd eeee')])
+
+    def test_split_by_duration(self):
+        result = resegment(items((0, 10000, 'one two three four five')),
+                           max_duration=5000)
+        self.assertEqual(self.texts(result),
+                         [(1, 0, 3478, 'one two'),
+                          (2, 3478, 6087, 'three'),
+                          (3, 6087, 10000, 'four five')])
+
+    def test_single_word(self):
+        result = resegment(items((0, 10000, 'Supercalifragilistic')),
+                           max_chars=5, max_duration=5000)
+        self.assertEqual(self.texts(result),
+                         [(1, 0, 10000, 'Supercalifragilistic')])
+
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestEstimateAlignment(unittest.TestCase):
+
+    def setUp(self):
+        srt_file = SubRipFile.open(os.path.join(file_path, 'tests', 'static',
+                                                'utf-8.srt'))
+        self.reference = [(i.start.ordinal, i.end.ordinal) for i in srt_file]
+
+    def moved(self, ratio, offset):
+        return [(int(round(start * ratio)) + offset,
+                 int(round(end * ratio)) + offset)
+                for start, end in self.reference]
+
+    def assertCorrection(self, timings, ratio, offset):
+        correction = estimate_alignment(timings, self.reference)
+        self.assertAlmostEqual(correction['ratio'], ratio, places=5)
+        self.assertTrue(abs(correction['milliseconds'] - offset) <= 2)
+
+    def test_aligned(self):
+        self.assertCorrection(self.reference, 1.0, 0)
+
+    def test_offset(self):
+        self.assertCorrection(self.moved(1, -7777), 1.0, 7777)
+        self.assertCorrection(self.moved(1, 120000), 1.0, -120000)
+
+    def test_frame_rate(self):
+        ratio = 25 / (24000 / 1001.0)
+        self.assertCorrection(self.moved(ratio, 3200), 1 / ratio,
+                              -3200 / ratio)
+
+    def test_empty(self):
+        self.assertEqual(estimate_alignment([], self.reference),
+                         {'ratio': 1.0, 'milliseconds': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()